@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+from array import array
+from typing import Any, Iterable, List, Union
+
+# Range of an `array('q')` item: a signed 64-bit integer.
+MIN_COMPACT = -(2**63)
+MAX_COMPACT = 2**63 - 1
+
+
+def _compact(value: Any) -> bool:
+    # Exactly `int`: a boolean stored in `array('q')` would come back as 1.
+    return type(value) is int and MIN_COMPACT <= value <= MAX_COMPACT
+
+
+class BanglaArray:
+    """The value of a `[...]` literal: a fixed-length, mutable sequence.
+
+    While every item is an int that fits in 64 bits, the items live in an
+    `array('q')`, eight bytes each instead of a pointer to a boxed int, so a
+    million numbers take 8 MB. Storing anything else (a string, a boolean,
+    null, another array, a bigger int) moves the items to a plain list for
+    good. Both index in constant time; which one is in use never shows in
+    the language.
+    """
+
+    __slots__ = ("items",)
+
+    def __init__(self, items: Union[array, List[Any]]) -> None:
+        self.items = items
+
+    @classmethod
+    def of(cls, values: Iterable[Any]) -> BanglaArray:
+        values = list(values)
+        if all(map(_compact, values)):
+            return cls(array("q", values))
+        return cls(values)
+
+    @property
+    def compact(self) -> bool:
+        return isinstance(self.items, array)
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def __getitem__(self, index: int) -> Any:
+        return self.items[index]
+
+    def __setitem__(self, index: int, value: Any) -> None:
+        items = self.items
+        if type(items) is array and not _compact(value):
+            items = self.items = list(items)
+        items[index] = value
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, BanglaArray):
+            return NotImplemented
+        if self.compact and other.compact:
+            return self.items == other.items
+        return self is other or list(self.items) == list(other.items)
+
+    # Mutable, so never a dict key (or a memo key).
+    __hash__ = None  # type: ignore[assignment]
+
+    def repeat(self, times: int) -> BanglaArray:
+        return BanglaArray(self.items * max(times, 0))
+
+    def __repr__(self) -> str:
+        return f"BanglaArray({list(self.items)!r})"
@@ -1,112 +1,168 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import List, Optional
 
 
 class Node:
-    pass
+    # Nodes are slotted dataclasses: no per-instance `__dict__`, which is
+    # most of the memory of a large AST.
+    __slots__ = ()
 
 
-@dataclass
+@dataclass(slots=True)
 class Program(Node):
     statements: List[Node]
 
 
-@dataclass
+@dataclass(slots=True)
 class Block(Node):
     statements: List[Node]
 
 
-@dataclass
+# Statements carry the line and column of their first token.
+
+
+@dataclass(slots=True)
 class VarDecl(Node):
     name: "Identifier"
     value: Node
+    line: int = 0
+    column: int = 0
 
 
-@dataclass
+@dataclass(slots=True)
 class AssignStmt(Node):
     name: "Identifier"
     value: Node
+    line: int = 0
+    column: int = 0
 
 
-@dataclass
+@dataclass(slots=True)
 class PrintStmt(Node):
     expression: Node
+    line: int = 0
+    column: int = 0
 
 
-@dataclass
+@dataclass(slots=True)
 class ExprStmt(Node):
     expression: Node
+    line: int = 0
+    column: int = 0
 
 
-@dataclass
+@dataclass(slots=True)
 class IfStmt(Node):
     condition: Node
     consequence: Block
     alternative: Optional[Block]
+    line: int = 0
+    column: int = 0
 
 
-@dataclass
+@dataclass(slots=True)
 class WhileStmt(Node):
     condition: Node
     body: Block
+    # Hidden variables for `CachedExpr`s in the body; set to null on entry.
+    hoisted: List["Identifier"] = field(default_factory=list)
+    line: int = 0
+    column: int = 0
 
 
-@dataclass
+@dataclass(slots=True)
 class FunctionDef(Node):
     name: "Identifier"
     params: List["Identifier"]
     body: Block
+    line: int = 0
+    column: int = 0
+
 
+@dataclass(slots=True)
+class IndexAssignStmt(Node):
+    """`collection[index] = value`."""
 
-@dataclass
+    collection: Node
+    index: Node
+    value: Node
+    line: int = 0
+    column: int = 0
+
+
+@dataclass(slots=True)
 class ReturnStmt(Node):
     value: Optional[Node]
+    line: int = 0
+    column: int = 0
 
 
-@dataclass
+@dataclass(slots=True)
 class Identifier(Node):
     name: str
     line: int = 0
     column: int = 0
 
 
-@dataclass
+@dataclass(slots=True)
 class IntegerLiteral(Node):
     value: int
     line: int = 0
     column: int = 0
 
 
-@dataclass
+@dataclass(slots=True)
 class StringLiteral(Node):
     value: str
     line: int = 0
     column: int = 0
 
 
-@dataclass
+@dataclass(slots=True)
 class BooleanLiteral(Node):
     value: bool
     line: int = 0
     column: int = 0
 
 
-@dataclass
+@dataclass(slots=True)
+class ArrayLiteral(Node):
+    elements: List[Node]
+    line: int = 0
+    column: int = 0
+
+
+@dataclass(slots=True)
 class PrefixExpr(Node):
     operator: str
     right: Node
 
 
-@dataclass
+@dataclass(slots=True)
 class InfixExpr(Node):
     left: Node
     operator: str
     right: Node
 
 
-@dataclass
+@dataclass(slots=True)
 class CallExpr(Node):
     function: Node
     args: List[Node]
+
+
+@dataclass(slots=True)
+class IndexExpr(Node):
+    collection: Node
+    index: Node
+
+
+@dataclass(slots=True)
+class CachedExpr(Node):
+    """Loop-invariant expression; its value is kept in the hidden `slot`
+    variable of the enclosing loop after the first evaluation."""
+
+    slot: Identifier
+    expression: Node
@@ -1,8 +1,7 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
 from enum import Enum
-from typing import Any
+from typing import Any, NamedTuple
 
 
 class TokenType(Enum):
@@ -40,6 +39,8 @@ class TokenType(Enum):
     RPAREN = ")"
     LBRACE = "{"
     RBRACE = "}"
+    LBRACKET = "["
+    RBRACKET = "]"
 
     DHORO = "DHORO"
     LEKHO = "LEKHO"
@@ -48,10 +49,14 @@ class TokenType(Enum):
     JOKHON = "JOKHON"
     FUNCTION = "FUNCTION"
     FEROT = "FEROT"
+    DOIRGHO = "DOIRGHO"
 
+    # Enum hashes members by name in Python code; the parser looks token
+    # types up in dicts for every token, so use the identity hash in C.
+    __hash__ = object.__hash__
 
-@dataclass(frozen=True)
-class Token:
+
+class Token(NamedTuple):
     type: TokenType
     literal: Any
     line: int
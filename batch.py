@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+import io
+import os
+import signal
+import time
+from typing import Any, Iterable, Iterator, List, Optional
+
+from interpreter import MAX_CALL_DEPTH, BanglaRuntimeError, Interpreter
+from output import OutputSink
+from parser import Parser
+
+
+@dataclass(slots=True)
+class ScriptResult:
+    """What running one script produced.
+
+    `errors` holds the lines `main.py` would print for it ("Parser error:
+    ...", "Runtime error: ..."), and `exit_code` is what `main.py` would
+    return. `value` is the value of the last statement when it is a number,
+    string, boolean or null, and its `lekho` text otherwise (a function
+    cannot leave its worker process).
+    """
+
+    output: str = ""
+    value: Any = None
+    errors: List[str] = field(default_factory=list)
+    exit_code: int = 0
+    timed_out: bool = False
+    duration: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.exit_code == 0
+
+
+class _Timeout(BaseException):
+    # Not an `Exception`, so nothing in the engines can catch it.
+    pass
+
+
+@contextmanager
+def _time_limit(seconds: Optional[float]) -> Iterator[None]:
+    # Scripts run in the worker's main thread, so a timer signal interrupts
+    # them wherever they are. Without `setitimer` (Windows) there is no limit.
+    if seconds is None or not hasattr(signal, "setitimer"):
+        yield
+        return
+
+    def expire(signum: int, frame: Any) -> None:
+        raise _Timeout()
+
+    previous = signal.signal(signal.SIGALRM, expire)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def run_script(
+    source: str,
+    engine: str = "tree",
+    max_call_depth: int = MAX_CALL_DEPTH,
+    optimize: bool = False,
+    lexer: str = "auto",
+    timeout: Optional[float] = None,
+) -> ScriptResult:
+    """Run one script like `main.run_source`, capturing instead of printing."""
+    from main import make_lexer
+
+    stream = io.StringIO()
+    result = ScriptResult()
+    interpreter = Interpreter(engine, max_call_depth, OutputSink(stream))
+    started = time.perf_counter()
+    try:
+        with _time_limit(timeout):
+            parser = Parser(make_lexer(lexer, source))
+            program = parser.parse_program()
+            if parser.errors:
+                result.errors = [f"Parser error: {err}" for err in parser.errors]
+            else:
+                if optimize:
+                    from optimizer import optimize as optimize_program
+
+                    program = optimize_program(program)
+                value = interpreter.run(program)
+                if value is None or isinstance(value, (bool, int, str)):
+                    result.value = value
+                else:
+                    result.value = interpreter._stringify(value)
+    except BanglaRuntimeError as exc:
+        result.errors = [f"Runtime error: {exc}"]
+    except _Timeout:
+        result.timed_out = True
+        result.errors = [f"Runtime error: Somoy shesh: {timeout:g} second er beshi legeche."]
+    except Exception as exc:
+        # A Python error the engines let through (a number too long to
+        # print, an array too big for memory) fails only this script, not
+        # the worker and the rest of its batch.
+        detail = f"{type(exc).__name__}: {exc}" if str(exc) else type(exc).__name__
+        result.errors = [f"Runtime error: {detail}"]
+    result.duration = time.perf_counter() - started
+    result.output = stream.getvalue()
+    result.exit_code = 1 if result.errors else 0
+    return result
+
+
+def _run_script(args: tuple) -> ScriptResult:
+    return run_script(*args)
+
+
+def _warm_up() -> None:
+    # Pay for every import once per worker, not once per script.
+    import closure_compiler  # noqa: F401
+    import compiler  # noqa: F401
+    import fast_lexer  # noqa: F401
+    import main  # noqa: F401
+    import optimizer  # noqa: F401
+    import vm  # noqa: F401
+
+
+class BatchRunner:
+    """Runs many independent scripts at once on a pool of worker processes.
+
+    The workers are started once and stay warm (modules imported, regexes
+    compiled) for every later `run`, so keep one `BatchRunner` around rather
+    than making one per batch. Each script gets a fresh interpreter, its own
+    captured output and its own `timeout` in seconds; a script that runs out
+    of time stops with an error and its worker moves on to the next script.
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        engine: str = "tree",
+        max_call_depth: int = MAX_CALL_DEPTH,
+        optimize: bool = False,
+        lexer: str = "auto",
+        timeout: Optional[float] = None,
+    ) -> None:
+        self.max_workers = max_workers if max_workers is not None else os.cpu_count() or 1
+        self.options = (engine, max_call_depth, optimize, lexer, timeout)
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def run(self, sources: Iterable[str]) -> List[ScriptResult]:
+        """One `ScriptResult` per source, in the same order."""
+        tasks = [(source, *self.options) for source in sources]
+        if not tasks:
+            return []
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(self.max_workers, initializer=_warm_up)
+        # Scripts are small and many; sending them in chunks saves a round
+        # trip per script.
+        chunksize = max(1, len(tasks) // (self.max_workers * 4))
+        results: List[ScriptResult] = []
+        try:
+            results.extend(self._pool.map(_run_script, tasks, chunksize=chunksize))
+        except BrokenProcessPool:
+            # A worker died (killed, or out of memory). The pool cannot be
+            # used again, so the next `run` starts a new one.
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+            results.extend(
+                ScriptResult(errors=["Runtime error: Worker process bondho hoye geche."], exit_code=1)
+                for _ in range(len(tasks) - len(results))
+            )
+        return results
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def __enter__(self) -> BatchRunner:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+
+def run_batch(sources: Iterable[str], max_workers: Optional[int] = None, **options: Any) -> List[ScriptResult]:
+    """Run `sources` on a temporary `BatchRunner`; see there for `options`."""
+    with BatchRunner(max_workers, **options) as runner:
+        return runner.run(sources)
@@ -0,0 +1,70 @@
+"""Memory and speed of large arrays, compact (all ints) vs generic storage.
+
+Usage: python benchmarks/bench_arrays.py [--size N]
+"""
+from __future__ import annotations
+
+import argparse
+import io
+import sys
+import time
+import tracemalloc
+
+from common import parse
+from interpreter import ENGINES, Interpreter
+from output import OutputSink
+
+# Every item is set to a different number, so generic storage pays for an
+# int object per item. `{first}` is 0 for an array of ints from the start,
+# or "x" so the array starts out (and stays) generic.
+FILL = """
+dhoro xs = [{first}] * {size};
+dhoro i = 0;
+jokhon i < {size} {{
+    xs[i] = i * 1000;
+    i = i + 1;
+}}
+dhoro mot = 0;
+i = 0;
+jokhon i < {size} {{
+    mot = mot + xs[i];
+    i = i + 1;
+}}
+mot;
+"""
+
+
+def run(source: str, engine: str, traced: bool = False) -> tuple[float, int]:
+    """Wall time of running `source` on `engine`, and with `traced` its peak
+    memory (tracing makes the run itself several times slower)."""
+    program = parse(source)
+    interpreter = Interpreter(engine, output=OutputSink(io.StringIO()))
+    if traced:
+        tracemalloc.start()
+    try:
+        start = time.perf_counter()
+        interpreter.run(program)
+        elapsed = time.perf_counter() - start
+        return elapsed, tracemalloc.get_traced_memory()[1] if traced else 0
+    finally:
+        if traced:
+            tracemalloc.stop()
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=100_000)
+    args = parser.parse_args(argv)
+
+    print(f"{args.size} items, filled then summed")
+    print(f"{'storage':<10}{'peak MB':>10}" + "".join(f"{engine:>12}" for engine in ENGINES))
+    for name, first in {"compact": "0", "generic": '"x"'}.items():
+        source = FILL.format(first=first, size=args.size)
+        peak = run(source, "closure", traced=True)[1]
+        timings = [run(source, engine)[0] for engine in ENGINES]
+        print(f"{name:<10}{peak / 1e6:>10.1f}" + "".join(f"{timing * 1000:>10.1f}ms" for timing in timings))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
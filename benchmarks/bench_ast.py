@@ -0,0 +1,53 @@
+"""Parse time and memory held by the AST of a generated source.
+
+Usage: python benchmarks/bench_ast.py [--size-mb N] [--repeat N]
+"""
+from __future__ import annotations
+
+import argparse
+import gc
+import sys
+import time
+import tracemalloc
+
+from common import generate_source
+from fast_lexer import TokenBuffer, BufferedLexer
+from parser import Parser
+from purity import walk
+
+
+def parse(buffer: TokenBuffer):
+    return Parser(BufferedLexer(buffer)).parse_program()
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size-mb", type=float, default=2.0)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    source = generate_source(int(args.size_mb * 1024 * 1024))
+    # Tokens are built once up front so only the parser and the AST count.
+    buffer = TokenBuffer(source)
+
+    best = float("inf")
+    for _ in range(args.repeat):
+        gc.collect()
+        start = time.perf_counter()
+        parse(buffer)
+        best = min(best, time.perf_counter() - start)
+
+    gc.collect()
+    tracemalloc.start()
+    program = parse(buffer)
+    held, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    nodes = sum(1 for _ in walk(program))
+
+    print(f"{len(source) / 1e6:.1f}M characters, {nodes / 1e6:.2f}M nodes")
+    print(f"parse {best * 1000:.0f}ms, AST {held / 2**20:.1f}MB ({held / nodes:.0f} bytes/node)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
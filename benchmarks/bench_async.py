@@ -0,0 +1,76 @@
+"""Run loop-heavy scripts on one event loop and measure how long it stalls.
+
+Usage: python benchmarks/bench_async.py [--scripts N] [--iterations N] [--slice-steps N]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import io
+import sys
+import time
+
+from common import parse
+from interpreter import DEFAULT_SLICE_STEPS, Interpreter
+from output import OutputSink
+
+SCRIPT = """
+dhoro i = 0;
+dhoro mot = 0;
+jokhon i < {iterations} {{
+    mot = mot + i % 7;
+    i = i + 1;
+}}
+mot;
+"""
+
+
+async def ticker(stalls: list[float], done: asyncio.Event) -> None:
+    # Wakes up as often as the loop lets it; the gaps are how long other
+    # tasks waited for their turn.
+    last = time.perf_counter()
+    while not done.is_set():
+        await asyncio.sleep(0)
+        now = time.perf_counter()
+        stalls.append(now - last)
+        last = now
+
+
+async def run_all(program, scripts: int, slice_steps: int) -> tuple[float, float]:
+    stalls: list[float] = []
+    done = asyncio.Event()
+    watcher = asyncio.create_task(ticker(stalls, done))
+    start = time.perf_counter()
+    await asyncio.gather(
+        *(
+            Interpreter("vm", output=OutputSink(io.StringIO())).run_async(program, slice_steps=slice_steps)
+            for _ in range(scripts)
+        )
+    )
+    total = time.perf_counter() - start
+    done.set()
+    await watcher
+    return total, max(stalls)
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scripts", type=int, default=8)
+    parser.add_argument("--iterations", type=int, default=200_000)
+    parser.add_argument("--slice-steps", type=int, default=DEFAULT_SLICE_STEPS)
+    args = parser.parse_args(argv)
+
+    program = parse(SCRIPT.format(iterations=args.iterations))
+    start = time.perf_counter()
+    for _ in range(args.scripts):
+        Interpreter("vm", output=OutputSink(io.StringIO())).run(program)
+    blocking = time.perf_counter() - start
+    print(f"run, one after another   {blocking * 1000:8.1f}ms  (loop blocked for all of it)")
+
+    total, stall = asyncio.run(run_all(program, args.scripts, args.slice_steps))
+    print(f"run_async, side by side  {total * 1000:8.1f}ms  longest wait for a turn {stall * 1000:.2f}ms")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
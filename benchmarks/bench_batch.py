@@ -0,0 +1,65 @@
+"""Run many small scripts: one process each, one after another, or on a BatchRunner.
+
+Usage: python benchmarks/bench_batch.py [--scripts N] [--workers N] [--processes N]
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from common import ROOT
+from batch import BatchRunner, run_script
+
+SCRIPT = """
+function fib(n) {{
+    jodi n < 2 {{ ferot n; }}
+    ferot fib(n - 1) + fib(n - 2);
+}}
+lekho fib({n});
+"""
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scripts", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--processes", type=int, default=50, help="Scripts to time as separate processes")
+    args = parser.parse_args(argv)
+
+    sources = [SCRIPT.format(n=10 + n % 8) for n in range(args.scripts)]
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "script.bn")
+        start = time.perf_counter()
+        for source in sources[: args.processes]:
+            with open(path, "w", encoding="utf-8") as handle:
+                handle.write(source)
+            subprocess.run([sys.executable, str(ROOT / "main.py"), path], check=True, capture_output=True)
+        per_process = (time.perf_counter() - start) / args.processes
+    print(f"process per script  {per_process * 1000:8.2f}ms/script")
+
+    start = time.perf_counter()
+    for source in sources:
+        run_script(source)
+    serial = (time.perf_counter() - start) / len(sources)
+    print(f"one after another   {serial * 1000:8.2f}ms/script")
+
+    with BatchRunner(args.workers, timeout=10) as runner:
+        runner.run(sources[: args.workers])  # start the workers
+        start = time.perf_counter()
+        results = runner.run(sources)
+        pooled = (time.perf_counter() - start) / len(sources)
+    assert all(result.ok for result in results)
+    print(
+        f"BatchRunner ({args.workers} workers) {pooled * 1000:8.2f}ms/script"
+        f"  ({per_process / pooled:.1f}x vs processes, {serial / pooled:.1f}x vs serial)"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
@@ -0,0 +1,162 @@
+"""Microbenchmark for call-heavy recursive scripts (fib, ackermann).
+
+Usage: python benchmarks/bench_calls.py [--repeat N]
+
+Compares `ferot` as it works now, a `ReturnValue` handed back up through
+the blocks, with `ferot` raising an exception that the call catches, as it
+used to. Both run on engines patched the same way (the tree walker checks
+for `ferot` ahead of the rest of `evaluate`, the closure engine wraps every
+call), so the speedup column only measures how the value gets back. The VM
+never used exceptions for `ferot` and is not compared.
+"""
+from __future__ import annotations
+
+from itertools import product
+import sys
+from typing import Any, Callable, List
+
+from common import print_speedups, repeat_argument, time_run
+import bangla_ast
+from closure_compiler import ClosureCompiler
+from interpreter import Interpreter, ReturnValue
+
+PROGRAMS = {
+    "fib": """
+    function fib(n) {
+        jodi n < 2 {
+            ferot n;
+        }
+        ferot fib(n - 1) + fib(n - 2);
+    }
+    lekho fib(20);
+    """,
+    "ackermann": """
+    function ack(m, n) {
+        jodi m == 0 {
+            ferot n + 1;
+        }
+        jodi n == 0 {
+            ferot ack(m - 1, 1);
+        }
+        ferot ack(m - 1, ack(m, n - 1));
+    }
+    lekho ack(2, 40);
+    """,
+    "count_down": """
+    function nicche(n) {
+        jokhon sotti {
+            jodi n == 0 {
+                ferot 0;
+            }
+            ferot nicche(n - 1);
+        }
+    }
+    dhoro i = 0;
+    jokhon i < 500 {
+        nicche(100);
+        i = i + 1;
+    }
+    """,
+}
+
+
+class ReturnSignal(Exception):
+    def __init__(self, value: Any) -> None:
+        self.value = value
+
+
+class ReturningTreeWalker(Interpreter):
+    """Tree walker that evaluates `ferot` itself and returns a `ReturnValue`."""
+
+    def evaluate(self, node: bangla_ast.Node) -> Any:
+        if type(node) is bangla_ast.ReturnStmt:
+            return self._return(self.evaluate(node.value) if node.value is not None else None)
+        return Interpreter.evaluate(self, node)
+
+    def _return(self, value: Any) -> Any:
+        return ReturnValue(value)
+
+    def _call_function(self, function: Any, args: List[Any]) -> Any:
+        return Interpreter._call_function(self, function, args)
+
+
+class RaisingTreeWalker(ReturningTreeWalker):
+    """The same, but `ferot` raises and the call catches it."""
+
+    def _return(self, value: Any) -> Any:
+        raise ReturnSignal(value)
+
+    def _call_function(self, function: Any, args: List[Any]) -> Any:
+        try:
+            return Interpreter._call_function(self, function, args)
+        except ReturnSignal as signal:
+            return signal.value
+
+
+class ReturningClosureCompiler(ClosureCompiler):
+    """Closure compiler with every call wrapped in one more closure."""
+
+    def _compile_call(self, node: bangla_ast.CallExpr) -> Callable[[Any], Any]:
+        call = ClosureCompiler._compile_call(self, node)
+        return lambda env: call(env)
+
+
+class RaisingClosureCompiler(ClosureCompiler):
+    """The same, but `ferot` raises and the wrapper catches it."""
+
+    def _compile_return(self, node: bangla_ast.ReturnStmt) -> Callable[[Any], Any]:
+        value_fn = self.compile(node.value) if node.value is not None else lambda env: None
+
+        def raise_return(env: Any) -> Any:
+            raise ReturnSignal(value_fn(env))
+
+        return raise_return
+
+    def _compile_call(self, node: bangla_ast.CallExpr) -> Callable[[Any], Any]:
+        call = ClosureCompiler._compile_call(self, node)
+
+        def catching(env: Any) -> Any:
+            try:
+                return call(env)
+            except ReturnSignal as signal:
+                return signal.value
+
+        return catching
+
+
+def closure_engine(compiler: type) -> Callable[..., Interpreter]:
+    """An `Interpreter` whose closure engine compiles with `compiler`."""
+
+    class CompilingWith(Interpreter):
+        def _run(self, program: bangla_ast.Program) -> Any:
+            with self._python_stack_guard():
+                return compiler(self).compile_program(program)(self.global_env)
+
+    return lambda output: CompilingWith("closure", output=output)
+
+
+ENGINES = {
+    "tree": (
+        lambda output: RaisingTreeWalker(output=output),
+        lambda output: ReturningTreeWalker(output=output),
+    ),
+    "closure": (closure_engine(RaisingClosureCompiler), closure_engine(ReturningClosureCompiler)),
+}
+
+
+def main(argv: list[str]) -> int:
+    repeat = repeat_argument(__doc__, argv)
+    # The patched tree walker takes more Python frames per call than
+    # `count_down`'s 100 deep calls fit in under the default limit.
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), 10_000))
+    print_speedups(
+        product(PROGRAMS, ENGINES),
+        lambda name, engine: time_run(PROGRAMS[name], ENGINES[engine][0], repeat),
+        lambda name, engine: time_run(PROGRAMS[name], ENGINES[engine][1], repeat),
+        ("raise", "return"),
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
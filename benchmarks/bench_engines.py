@@ -0,0 +1,80 @@
+"""Compare the execution engines on a few loop- and call-heavy programs.
+
+Usage: python benchmarks/bench_engines.py [--repeat N]
+"""
+from __future__ import annotations
+
+import sys
+
+from common import repeat_argument, time_engine
+from interpreter import ENGINES
+
+PROGRAMS = {
+    "loop_sum": """
+    dhoro i = 0;
+    dhoro s = 0;
+    jokhon i < 100000 {
+        s = s + i * 2;
+        i = i + 1;
+    }
+    lekho s;
+    """,
+    "nested_if": """
+    dhoro i = 0;
+    dhoro hits = 0;
+    jokhon i < 50000 {
+        jodi i % 3 == 0 {
+            jodi i % 5 == 0 {
+                hits = hits + 1;
+            } nahole {
+                hits = hits + 2;
+            }
+        }
+        i = i + 1;
+    }
+    lekho hits;
+    """,
+    "local_scopes": """
+    function kaj(n) {
+        dhoro total = 0;
+        dhoro i = 0;
+        jokhon i < n {
+            dhoro j = 0;
+            jokhon j < 10 {
+                jodi (i + j) % 2 == 0 {
+                    total = total + j;
+                }
+                j = j + 1;
+            }
+            i = i + 1;
+        }
+        ferot total;
+    }
+    lekho kaj(5000);
+    """,
+    "fib": """
+    function fib(n) {
+        jodi n < 2 {
+            ferot n;
+        }
+        ferot fib(n - 1) + fib(n - 2);
+    }
+    lekho fib(18);
+    """,
+}
+
+
+def main(argv: list[str]) -> int:
+    repeat = repeat_argument(__doc__, argv)
+    print(f"{'program':<12}" + "".join(f"{engine:>12}" for engine in ENGINES) + "   speedup vs tree")
+    for name, source in PROGRAMS.items():
+        timings = {engine: time_engine(source, engine, repeat) for engine in ENGINES}
+        speedups = ", ".join(
+            f"{engine} x{timings['tree'] / timings[engine]:.1f}" for engine in ENGINES if engine != "tree"
+        )
+        print(f"{name:<12}" + "".join(f"{timings[engine] * 1000:>10.1f}ms" for engine in ENGINES) + f"   {speedups}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
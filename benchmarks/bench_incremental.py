@@ -0,0 +1,46 @@
+"""Time single edits with IncrementalParser against parsing the whole buffer.
+
+Usage: python benchmarks/bench_incremental.py [--size CHARS]
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+
+from common import generate_source, parse
+from incremental import IncrementalParser
+
+EDITS = {
+    "type a character": lambda mid: (mid + 6, 0, "x"),
+    "delete a character": lambda mid: (mid + 6, 1, ""),
+    "insert a line": lambda mid: (mid, 0, "lekho 1;\n"),
+    "open a block": lambda mid: (mid, 0, "{"),
+}
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=1_000_000)
+    args = parser.parse_args(argv)
+
+    source = generate_source(args.size)
+    start = time.perf_counter()
+    parse(source)
+    print(f"full parse          {(time.perf_counter() - start) * 1000:9.2f}ms")
+
+    document = IncrementalParser(source)
+    for name, edit in EDITS.items():
+        mid = document.source.index("ferot fol;", len(document.source) // 2)
+        start = time.perf_counter()
+        document.edit(*edit(mid))
+        elapsed = time.perf_counter() - start
+        print(
+            f"{name:<19} {elapsed * 1000:9.2f}ms"
+            f"  ({document.reparsed} statements re-parsed, {document.reused_blocks} blocks reused)"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
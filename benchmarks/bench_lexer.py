@@ -0,0 +1,44 @@
+"""Compare `FastLexer` with the reference `Lexer` on a generated source.
+
+Usage: python benchmarks/bench_lexer.py [--size-mb N] [--repeat N]
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+
+from common import generate_source
+from bangla_token import TokenType
+from fast_lexer import LEXERS
+
+def count_tokens(lexer_class: type, source: str) -> int:
+    lexer = lexer_class(source)
+    count = 1
+    while lexer.next_token().type is not TokenType.EOF:
+        count += 1
+    return count
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size-mb", type=float, default=2.0)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    source = generate_source(int(args.size_mb * 1024 * 1024))
+    timings = {}
+    for name, lexer_class in LEXERS.items():
+        best = float("inf")
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            tokens = count_tokens(lexer_class, source)
+            best = min(best, time.perf_counter() - start)
+        timings[name] = best
+        print(f"{name:<10}{best * 1000:>10.1f}ms {tokens / best / 1e6:>8.2f}M tokens/s")
+    print(f"speedup   {timings['reference'] / timings['fast']:>10.1f}x ({len(source) / 1e6:.1f}M characters)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
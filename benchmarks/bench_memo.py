@@ -0,0 +1,68 @@
+"""Time recursive pure functions with and without `--memoize`, per engine.
+
+Usage: python benchmarks/bench_memo.py [--repeat N]
+"""
+from __future__ import annotations
+
+from itertools import product
+import sys
+from typing import Callable
+
+from common import print_speedups, repeat_argument, time_engine, time_run
+from interpreter import ENGINES, Interpreter
+from output import OutputSink
+
+PROGRAMS = {
+    "fib": """
+    function fib(n) {
+        jodi n < 2 {
+            ferot n;
+        }
+        ferot fib(n - 1) + fib(n - 2);
+    }
+    lekho fib(22);
+    """,
+    # Paths through a grid: overlapping subproblems in two arguments.
+    "paths": """
+    function poth(r, c) {
+        jodi r == 0 ba c == 0 {
+            ferot 1;
+        }
+        ferot poth(r - 1, c) + poth(r, c - 1);
+    }
+    lekho poth(9, 9);
+    """,
+    # No repeated calls: what the cache costs when it never hits.
+    "count_down": """
+    function gono(n, mot) {
+        jodi n == 0 {
+            ferot mot;
+        }
+        ferot gono(n - 1, mot + n);
+    }
+    dhoro i = 0;
+    jokhon i < 200 {
+        gono(100, i);
+        i = i + 1;
+    }
+    """,
+}
+
+
+def memoized(engine: str) -> Callable[[OutputSink], Interpreter]:
+    return lambda output: Interpreter(engine, output=output, memoize_pure=True)
+
+
+def main(argv: list[str]) -> int:
+    repeat = repeat_argument(__doc__, argv)
+    print_speedups(
+        product(PROGRAMS, ENGINES),
+        lambda name, engine: time_engine(PROGRAMS[name], engine, repeat),
+        lambda name, engine: time_run(PROGRAMS[name], memoized(engine), repeat),
+        ("plain", "memoized"),
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
@@ -0,0 +1,54 @@
+"""Time a script that prints many lines, per engine and output buffer size.
+
+Usage: python benchmarks/bench_output.py [--lines N] [--repeat N]
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+
+from common import parse
+from interpreter import ENGINES, Interpreter
+from output import DEFAULT_BUFFER_SIZE, OutputSink
+
+SCRIPT = """
+dhoro i = 0;
+jokhon i < {lines} {{
+    lekho i;
+    i = i + 1;
+}}
+"""
+
+
+def time_run(program, engine: str, buffer_size: int, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        # A real file, so every flush is a system call like on a pipe.
+        with open(os.devnull, "w", encoding="utf-8") as stream:
+            start = time.perf_counter()
+            Interpreter(engine, output=OutputSink(stream, buffer_size)).run(program)
+            best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lines", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    program = parse(SCRIPT.format(lines=args.lines))
+    for engine in ENGINES:
+        line_by_line = time_run(program, engine, 0, args.repeat)
+        buffered = time_run(program, engine, DEFAULT_BUFFER_SIZE, args.repeat)
+        print(
+            f"{engine:<8} every line {line_by_line * 1000:8.1f}ms"
+            f"  buffered {buffered * 1000:8.1f}ms  ({line_by_line / buffered:.2f}x)"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
@@ -0,0 +1,70 @@
+"""Time guard-heavy scripts where `ar` / `ba` protect expensive calls.
+
+Usage: python benchmarks/bench_short_circuit.py [--repeat N]
+
+Each guard is also timed eagerly, with both operands evaluated into locals
+before the `jodi`, which is what every guard cost before `ar` and `ba`
+short-circuited; the speedup column is eager over short-circuit time.
+"""
+from __future__ import annotations
+
+from itertools import product
+import sys
+
+from common import print_speedups, repeat_argument, time_engine
+from interpreter import ENGINES
+
+COSTLY = """
+function costly(x) {
+    dhoro k = 0;
+    jokhon k < 30 {
+        k = k + 1;
+    }
+    ferot x % 7 == 0;
+}
+"""
+
+# Left operand, operator and right operand of each program's guard.
+GUARDS = {
+    "and_guard": ("i % 10 == 0", "ar", "costly(i)"),
+    "or_guard": ("i % 10 != 0", "ba", "costly(i)"),
+    "bounds_guard": ("i < n", "ar", "costly(i)"),
+}
+
+
+def program(guard: tuple[str, str, str], eager: bool) -> str:
+    left, operator, right = guard
+    setup = f"dhoro baam = {left}; dhoro dan = {right};" if eager else ""
+    condition = f"baam {operator} dan" if eager else f"{left} {operator} {right}"
+    return COSTLY + f"""
+    dhoro i = 0;
+    dhoro n = 2000;
+    dhoro hits = 0;
+    jokhon i < 20000 {{
+        {setup}
+        jodi {condition} {{
+            hits = hits + 1;
+        }}
+        i = i + 1;
+    }}
+    lekho hits;
+    """
+
+
+PROGRAMS = {name: program(guard, eager=False) for name, guard in GUARDS.items()}
+EAGER = {name: program(guard, eager=True) for name, guard in GUARDS.items()}
+
+
+def main(argv: list[str]) -> int:
+    repeat = repeat_argument(__doc__, argv)
+    print_speedups(
+        product(PROGRAMS, ENGINES),
+        lambda name, engine: time_engine(EAGER[name], engine, repeat),
+        lambda name, engine: time_engine(PROGRAMS[name], engine, repeat),
+        ("eager", "short"),
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
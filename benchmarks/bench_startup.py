@@ -0,0 +1,76 @@
+"""Time from launching `python main.py` to its first `lekho` line.
+
+Usage: python benchmarks/bench_startup.py [--repeat N] [--importtime] [main.py options]
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from common import ROOT
+
+SCRIPT = """
+dhoro naam = "duniya";
+lekho "salam " + naam;
+"""
+
+
+def first_line_time(command: list[str]) -> float:
+    start = time.perf_counter()
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, cwd=ROOT)
+    process.stdout.readline()
+    elapsed = time.perf_counter() - start
+    process.stdout.read()
+    process.wait()
+    return elapsed
+
+
+def import_times(command: list[str], top: int) -> list[tuple[int, str]]:
+    """The `top` slowest imports by cumulative time, from `-X importtime`."""
+    result = subprocess.run(
+        [command[0], "-X", "importtime", *command[1:]],
+        capture_output=True,
+        text=True,
+        cwd=ROOT,
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        rows.append((int(cumulative), name.strip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--importtime", action="store_true", help="Also list the slowest imports")
+    args, options = parser.parse_known_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        script = os.path.join(directory, "salam.bn")
+        with open(script, "w", encoding="utf-8") as handle:
+            handle.write(SCRIPT)
+        command = [sys.executable, str(ROOT / "main.py"), script, *options]
+        bare = [sys.executable, "-c", "print('salam')"]
+
+        for name, cmd in (("python -c", bare), ("main.py", command)):
+            timings = [first_line_time(cmd) for _ in range(args.repeat)]
+            print(
+                f"{name:<10} first line: median {statistics.median(timings) * 1000:6.1f}ms,"
+                f" best {min(timings) * 1000:6.1f}ms"
+            )
+        if args.importtime:
+            for cumulative, module in import_times(command, 15):
+                print(f"{cumulative / 1000:8.1f}ms  {module}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
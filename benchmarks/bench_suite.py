@@ -0,0 +1,241 @@
+"""Time each phase (lex, parse, compile and run per engine) of the benchmark
+corpus and compare the results with a stored baseline.
+
+Usage: python benchmarks/bench_suite.py [--repeat N] [--only NAME] [--save-baseline]
+       [--baseline FILE] [--threshold FRACTION] [--memory-threshold FRACTION]
+       [--generated-size N] [--large-size N]
+
+The corpus is every `.bn` file in benchmarks/corpus, plus a generated source
+of `--generated-size` characters. Times are the best of `--repeat` runs;
+memory is the peak traced by `tracemalloc` in a separate run, since tracing
+slows everything down. With a baseline, any phase that got slower (or
+bigger) by more than the threshold is listed and the exit status is 1.
+Phases under 5 ms are too noisy to fail the check. Baselines only compare
+well on the machine that made them.
+
+A generated source of `--large-size` characters is only compiled, once as
+is and once at a quarter of the size. Compiling it must take at most
+`MAX_COMPILE_GROWTH` times as long as the quarter, baseline or not, so a
+compiler that is quadratic in program size fails the check on any machine.
+"""
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import os
+from pathlib import Path
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable
+
+from common import generate_source
+from bangla_token import TokenType
+from closure_compiler import ClosureCompiler
+from compiler import compile_program
+from interpreter import ENGINES, Interpreter
+from lexer import Lexer
+from output import OutputSink
+from parser import Parser
+
+CORPUS = Path(__file__).resolve().parent / "corpus"
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "baseline.json"
+
+# Phases faster than this vary by more than any threshold from run to run,
+# so they are reported but never fail the check.
+MIN_GATED_SECONDS = 0.005
+
+# Compiling a source four times as large may take at most this many times as
+# long: a linear compiler takes about 4x, a quadratic one 16x.
+MAX_COMPILE_GROWTH = 8
+
+COMPILERS: dict[str, Callable[[Any], Any]] = {
+    "vm": compile_program,
+    "closure": lambda program: ClosureCompiler(Interpreter("closure")).compile_program(program),
+}
+
+
+class ReplayLexer:
+    """Hands out tokens lexed beforehand, so parsing is timed without lexing."""
+
+    def __init__(self, tokens: list) -> None:
+        self._tokens = iter(tokens)
+        self._eof = tokens[-1]
+
+    def next_token(self):
+        return next(self._tokens, self._eof)
+
+
+def lex(source: str) -> list:
+    lexer = Lexer(source)
+    tokens = [lexer.next_token()]
+    while tokens[-1].type is not TokenType.EOF:
+        tokens.append(lexer.next_token())
+    return tokens
+
+
+def parse(tokens: list):
+    parser = Parser(ReplayLexer(tokens))
+    program = parser.parse_program()
+    if parser.errors:
+        raise SystemExit("\n".join(parser.errors))
+    return program
+
+
+def run(program, engine: str) -> None:
+    with open(os.devnull, "w", encoding="utf-8") as stream:
+        Interpreter(engine, output=OutputSink(stream)).run(program)
+
+
+def best_time(phase: Callable[[], Any], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        phase()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def measure(phase: Callable[[], Any], repeat: int) -> tuple[float, int]:
+    best = best_time(phase, repeat)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        phase()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return best, peak
+
+
+def corpus(generated_size: int) -> dict[str, str]:
+    sources = {path.stem: path.read_text(encoding="utf-8") for path in sorted(CORPUS.glob("*.bn"))}
+    if generated_size:
+        sources["generated"] = generate_source(generated_size)
+    return sources
+
+
+def run_suite(sources: dict[str, str], repeat: int) -> dict[str, dict[str, float]]:
+    results = {}
+    for name, source in sources.items():
+        tokens = lex(source)
+        program = parse(tokens)
+        phases = {"lex": lambda: lex(source), "parse": lambda: parse(tokens)}
+        for engine, compile_for in COMPILERS.items():
+            phases[f"compile:{engine}"] = lambda compile_for=compile_for: compile_for(program)
+        for engine in ENGINES:
+            phases[f"run:{engine}"] = lambda engine=engine: run(program, engine)
+        for phase, action in phases.items():
+            seconds, peak = measure(action, repeat)
+            results[f"{name}/{phase}"] = {"seconds": seconds, "peak_bytes": peak}
+            print(f"{name + '/' + phase:<28} {seconds * 1000:10.1f}ms {peak / 1024:10.0f} KB", flush=True)
+    return results
+
+
+def compile_growth(size: int, repeat: int) -> tuple[dict[str, dict[str, float]], list[str]]:
+    """Compile times of a `size`-character source, and one line for every
+    compiler that took over `MAX_COMPILE_GROWTH` times its time at a quarter
+    of the size."""
+    large = parse(lex(generate_source(size)))
+    quarter = parse(lex(generate_source(size // 4)))
+    results = {}
+    found = []
+    for engine, compile_for in COMPILERS.items():
+        seconds, peak = measure(lambda: compile_for(large), repeat)
+        results[f"large/compile:{engine}"] = {"seconds": seconds, "peak_bytes": peak}
+        growth = seconds / best_time(lambda: compile_for(quarter), repeat)
+        print(
+            f"{'large/compile:' + engine:<28} {seconds * 1000:10.1f}ms {peak / 1024:10.0f} KB"
+            f"   {growth:.1f}x a quarter",
+            flush=True,
+        )
+        if growth > MAX_COMPILE_GROWTH:
+            found.append(
+                f"large/compile:{engine}: {growth:.1f}x the time of a quarter of the source"
+                f" (limit {MAX_COMPILE_GROWTH}x)"
+            )
+    return results, found
+
+
+def regressions(
+    results: dict[str, dict[str, float]],
+    baseline: dict[str, dict[str, float]],
+    threshold: float,
+    memory_threshold: float,
+) -> list[str]:
+    """One line for every measurement over its baseline by more than the threshold."""
+    found = []
+    for key, result in results.items():
+        old = baseline.get(key)
+        if old is None:
+            continue
+        for metric, limit, unit, scale in (
+            ("seconds", threshold, "ms", 1000),
+            ("peak_bytes", memory_threshold, "KB", 1 / 1024),
+        ):
+            if metric == "seconds" and max(old[metric], result[metric]) < MIN_GATED_SECONDS:
+                continue
+            if old[metric] and result[metric] > old[metric] * (1 + limit):
+                found.append(
+                    f"{key}: {metric} {old[metric] * scale:.1f}{unit} -> {result[metric] * scale:.1f}{unit}"
+                    f" (+{(result[metric] / old[metric] - 1) * 100:.0f}%, limit +{limit * 100:.0f}%)"
+                )
+    return found
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--only", action="append", help="Run only this corpus program (repeatable)")
+    parser.add_argument("--generated-size", type=int, default=250_000, help="Characters of generated source (0: none)")
+    parser.add_argument(
+        "--large-size", type=int, default=1_000_000, help="Characters of the source only compiled (0: none)"
+    )
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="Store these results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed slowdown per phase (0.25: 25%%)")
+    parser.add_argument("--memory-threshold", type=float, default=0.10, help="Allowed growth of peak memory")
+    args = parser.parse_args(argv)
+
+    sources = corpus(args.generated_size)
+    if args.only:
+        missing = set(args.only) - set(sources)
+        if missing:
+            parser.error(f"no corpus program named {', '.join(sorted(missing))}")
+        sources = {name: sources[name] for name in args.only}
+    results = run_suite(sources, args.repeat)
+    found = []
+    if args.large_size and not args.only:
+        large, found = compile_growth(args.large_size, args.repeat)
+        results.update(large)
+
+    if args.save_baseline:
+        baseline = {}
+        if args.baseline.exists():
+            # Keep the entries of programs left out with --only.
+            baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        baseline.update(results)
+        args.baseline.write_text(json.dumps(baseline, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+        print(f"Baseline saved to {args.baseline}")
+    elif not args.baseline.exists():
+        print(f"No baseline at {args.baseline}; run with --save-baseline first.")
+    else:
+        found += regressions(
+            results,
+            json.loads(args.baseline.read_text(encoding="utf-8")),
+            args.threshold,
+            args.memory_threshold,
+        )
+    if found:
+        print(f"\n{len(found)} regression(s):")
+        for line in found:
+            print(f"  {line}")
+        return 1
+    print("\nNo regressions.")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
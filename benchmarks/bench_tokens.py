@@ -0,0 +1,71 @@
+"""Memory and speed of a `Token` list against the array-backed `TokenBuffer`.
+
+Usage: python benchmarks/bench_tokens.py [--size-mb N] [--repeat N]
+"""
+from __future__ import annotations
+
+import argparse
+import gc
+import sys
+import time
+import tracemalloc
+
+from common import generate_source
+from fast_lexer import BufferedLexer, FastLexer, TokenBuffer, tokenize
+from parser import Parser
+
+BUILDERS = {
+    "Token list": tokenize,
+    "TokenBuffer": TokenBuffer,
+}
+LEXERS = {
+    "Token list": FastLexer,
+    "TokenBuffer": BufferedLexer,
+}
+
+
+def best_time(function, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def memory(function) -> tuple[int, int]:
+    """Bytes still held by the result, and the peak while building it."""
+    gc.collect()
+    tracemalloc.start()
+    result = function()
+    held, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return held, peak
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size-mb", type=float, default=10.0)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    source = generate_source(int(args.size_mb * 1024 * 1024))
+    tokens = len(tokenize(source))
+    print(f"{len(source) / 1e6:.1f}M characters, {tokens / 1e6:.2f}M tokens")
+    print(f"{'':<13}{'held':>10}{'peak':>10}{'tokenize':>12}{'tokens/s':>10}{'parse':>12}")
+    for name, build in BUILDERS.items():
+        held, peak = memory(lambda: build(source))
+        tokenize_time = best_time(lambda: build(source), args.repeat)
+        parse_time = best_time(lambda: Parser(LEXERS[name](source)).parse_program(), args.repeat)
+        print(
+            f"{name:<13}{held / 2**20:>8.1f}MB{peak / 2**20:>8.1f}MB"
+            f"{tokenize_time * 1000:>10.0f}ms{tokens / tokenize_time / 1e6:>9.2f}M"
+            f"{parse_time * 1000:>10.0f}ms"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
@@ -0,0 +1,93 @@
+"""Helpers shared by the benchmark scripts."""
+from __future__ import annotations
+
+import argparse
+import io
+from pathlib import Path
+import sys
+import time
+from typing import Callable, Iterable
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from interpreter import Interpreter  # noqa: E402
+from lexer import Lexer  # noqa: E402
+from output import OutputSink  # noqa: E402
+from parser import Parser  # noqa: E402
+
+
+# One generated top-level chunk: a function, a call and the usual tokens.
+CHUNK = """
+# porer shonkhya gulo jog kori
+function jog_koro_{n}(prothom, ditiyo) {{
+    dhoro fol = prothom + ditiyo * {n};
+    jodi fol >= 1000 ar na (fol == {n}) {{
+        lekho "onek boro: shonkhya {n}";
+    }} nahole {{
+        fol = fol % 97;
+    }}
+    ferot fol;
+}}
+dhoro mot_{n} = jog_koro_{n}({n}, {n} ** 2);
+"""
+
+
+def generate_source(size: int) -> str:
+    """A valid program of at least `size` characters."""
+    parts = []
+    total = 0
+    while total < size:
+        chunk = CHUNK.format(n=len(parts))
+        parts.append(chunk)
+        total += len(chunk)
+    return "".join(parts)
+
+
+def parse(source: str):
+    parser = Parser(Lexer(source))
+    program = parser.parse_program()
+    if parser.errors:
+        raise SystemExit("\n".join(parser.errors))
+    return program
+
+
+def time_run(source: str, make_interpreter: Callable[[OutputSink], Interpreter], repeat: int) -> float:
+    """Best wall time of running `source` on a fresh `make_interpreter(output)`,
+    output discarded."""
+    best = float("inf")
+    for _ in range(repeat):
+        program = parse(source)
+        interpreter = make_interpreter(OutputSink(io.StringIO()))
+        start = time.perf_counter()
+        interpreter.run(program)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def time_engine(source: str, engine: str, repeat: int) -> float:
+    """Best wall time of running `source` on `engine`, output discarded."""
+    return time_run(source, lambda output: Interpreter(engine, output=output), repeat)
+
+
+def repeat_argument(doc: str, argv: list[str]) -> int:
+    """The `--repeat N` option every benchmark script takes."""
+    parser = argparse.ArgumentParser(description=doc.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3)
+    return parser.parse_args(argv).repeat
+
+
+def print_speedups(
+    rows: Iterable[tuple[str, str]],
+    baseline: Callable[[str, str], float],
+    measured: Callable[[str, str], float],
+    labels: tuple[str, str],
+) -> None:
+    """One line per `(program, engine)` row: the seconds `baseline` and
+    `measured` take for it and how many times faster the second is."""
+    print(f"{'program':<14}{'engine':<10}{labels[0]:>12}{labels[1]:>12}{'speedup':>10}")
+    for program, engine in rows:
+        before = baseline(program, engine)
+        after = measured(program, engine)
+        print(f"{program:<14}{engine:<10}{before * 1000:>10.1f}ms{after * 1000:>10.1f}ms{before / after:>9.1f}x")
@@ -0,0 +1,472 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+import operator as op
+from typing import Any, Callable, List, Optional
+
+import bangla_ast
+from bangla_array import BanglaArray
+from interpreter import BanglaRuntimeError, Interpreter, ReturnValue
+from memo import MISSING, MemoCache, memo_key
+from resolver import UNSET, Resolution, SlotEnvironment, resolve
+
+# A compiled node takes the current scope: the interpreter's global
+# `Environment` at top level, a `SlotEnvironment` inside blocks and calls.
+Compiled = Callable[[Any], Any]
+
+BOOLEAN_OPERATORS = {"<", ">", "<=", ">=", "==", "!=", "ar", "ba"}
+
+
+@dataclass
+class ClosureFunction:
+    name: str
+    params: List[str]
+    body: Compiled
+    env: Any
+    scope_size: int = 0
+    param_slots: List[int] = field(default_factory=list)
+    memo: Optional[MemoCache] = field(default=None, repr=False, compare=False)
+
+
+class ClosureCompiler:
+    """Turns every AST node into a Python closure once, before execution.
+
+    Operators are resolved while compiling, so running the program never
+    goes through the `isinstance` ladder or compares operator strings. Names
+    are resolved up front by `resolver.Resolver`, so locals are read from slot
+    arrays and globals straight from the interpreter's global store.
+    """
+
+    def __init__(self, interpreter: Optional[Interpreter] = None) -> None:
+        self.interpreter = interpreter if interpreter is not None else Interpreter()
+        self.globals_store = self.interpreter.global_env.store
+        self.resolution = Resolution()
+        self._dispatch: dict[type, Callable[[Any], Compiled]] = {
+            bangla_ast.Program: self._compile_program,
+            bangla_ast.Block: self._compile_block,
+            bangla_ast.VarDecl: self._compile_var_decl,
+            bangla_ast.AssignStmt: self._compile_assign,
+            bangla_ast.PrintStmt: self._compile_print,
+            bangla_ast.ExprStmt: self._compile_expr_stmt,
+            bangla_ast.IfStmt: self._compile_if,
+            bangla_ast.WhileStmt: self._compile_while,
+            bangla_ast.FunctionDef: self._compile_function_def,
+            bangla_ast.ReturnStmt: self._compile_return,
+            bangla_ast.IndexAssignStmt: self._compile_index_assign,
+            bangla_ast.Identifier: self._compile_identifier,
+            bangla_ast.IntegerLiteral: self._compile_literal,
+            bangla_ast.StringLiteral: self._compile_literal,
+            bangla_ast.BooleanLiteral: self._compile_literal,
+            bangla_ast.PrefixExpr: self._compile_prefix,
+            bangla_ast.InfixExpr: self._compile_infix,
+            bangla_ast.CallExpr: self._compile_call,
+            bangla_ast.CachedExpr: self._compile_cached,
+            bangla_ast.ArrayLiteral: self._compile_array,
+            bangla_ast.IndexExpr: self._compile_index,
+        }
+
+    def compile_program(self, program: bangla_ast.Program) -> Compiled:
+        self.resolution = resolve(program)
+        return self.compile(program)
+
+    def compile_statement(self, stmt: bangla_ast.Node) -> Compiled:
+        """One top-level statement; a `ferot` in it returns a `ReturnValue`."""
+        self.resolution = resolve(bangla_ast.Program([stmt]))
+        return self.compile(stmt)
+
+    def compile(self, node: bangla_ast.Node) -> Compiled:
+        compile_node = self._dispatch.get(type(node))
+        if compile_node is None:
+            raise BanglaRuntimeError("Bujhte parchi na emon ekta expression.")
+        return compile_node(node)
+
+    def _compile_statements(self, statements: List[bangla_ast.Node]) -> Compiled:
+        compiled = [self.compile(stmt) for stmt in statements]
+        if not compiled:
+            return lambda env: None
+        if len(compiled) == 1:
+            return compiled[0]
+
+        def run_statements(env: Any) -> Any:
+            result = None
+            for stmt in compiled:
+                result = stmt(env)
+                if type(result) is ReturnValue:
+                    return result
+            return result
+
+        return run_statements
+
+    def _compile_truth(self, node: bangla_ast.Node) -> Compiled:
+        condition = self.compile(node)
+        if isinstance(node, bangla_ast.BooleanLiteral):
+            return condition
+        if isinstance(node, bangla_ast.InfixExpr) and node.operator in BOOLEAN_OPERATORS:
+            return condition
+        if isinstance(node, bangla_ast.PrefixExpr) and node.operator == "na":
+            return condition
+        is_truthy = self.interpreter._is_truthy
+        return lambda env: is_truthy(condition(env))
+
+    def _compile_program(self, node: bangla_ast.Program) -> Compiled:
+        body = self._compile_statements(node.statements)
+
+        def program(env: Any) -> Any:
+            result = body(env)
+            if type(result) is ReturnValue:
+                return result.value
+            return result
+
+        return program
+
+    def _compile_block(self, node: bangla_ast.Block) -> Compiled:
+        size = self.resolution.scope(node).size
+        body = self._compile_statements(node.statements)
+        if not size:
+            return body
+        return lambda env: body(SlotEnvironment([UNSET] * size, env))
+
+    def _compile_var_decl(self, node: bangla_ast.VarDecl) -> Compiled:
+        value_fn = self.compile(node.value)
+        binding = self.resolution.binding(node.name)
+        if not binding:
+            name = node.name.name
+            globals_store = self.globals_store
+
+            def global_decl(env: Any) -> Any:
+                value = value_fn(env)
+                globals_store[name] = value
+                return value
+
+            return global_decl
+        slot = binding[0][1]
+
+        def var_decl(env: Any) -> Any:
+            value = value_fn(env)
+            env.values[slot] = value
+            return value
+
+        return var_decl
+
+    def _compile_assign(self, node: bangla_ast.AssignStmt) -> Compiled:
+        name = node.name.name
+        line, column = node.name.line, node.name.column
+        candidates = self.resolution.binding(node.name)
+        globals_store = self.globals_store
+        value_fn = self.compile(node.value)
+
+        def assign_fallback(env: Any, value: Any) -> Any:
+            for depth, slot in candidates:
+                scope = env
+                for _ in range(depth):
+                    scope = scope.outer
+                if scope.values[slot] is not UNSET:
+                    scope.values[slot] = value
+                    return value
+            if name not in globals_store:
+                raise BanglaRuntimeError(f"Line {line}, Col {column}: Chena jai na: '{name}' variable nai.")
+            globals_store[name] = value
+            return value
+
+        if len(candidates) != 1 or candidates[0][0] != 0:
+            return lambda env: assign_fallback(env, value_fn(env))
+        local_slot = candidates[0][1]
+
+        def assign_local(env: Any) -> Any:
+            value = value_fn(env)
+            values = env.values
+            if values[local_slot] is not UNSET:
+                values[local_slot] = value
+                return value
+            return assign_fallback(env, value)
+
+        return assign_local
+
+    def _compile_print(self, node: bangla_ast.PrintStmt) -> Compiled:
+        value_fn = self.compile(node.expression)
+        stringify = self.interpreter._stringify
+        write_line = self.interpreter.output.write_line
+
+        def print_stmt(env: Any) -> Any:
+            value = value_fn(env)
+            write_line(stringify(value))
+            return value
+
+        return print_stmt
+
+    def _compile_expr_stmt(self, node: bangla_ast.ExprStmt) -> Compiled:
+        return self.compile(node.expression)
+
+    def _compile_if(self, node: bangla_ast.IfStmt) -> Compiled:
+        condition = self._compile_truth(node.condition)
+        consequence = self._compile_block(node.consequence)
+        if node.alternative is None:
+            return lambda env: consequence(env) if condition(env) else None
+        alternative = self._compile_block(node.alternative)
+        return lambda env: consequence(env) if condition(env) else alternative(env)
+
+    def _compile_while(self, node: bangla_ast.WhileStmt) -> Compiled:
+        condition = self._compile_truth(node.condition)
+        body = self._compile_statements(node.body.statements)
+        size = self.resolution.scope(node).size
+
+        def while_loop(env: Any) -> Any:
+            result = None
+            loop_env = SlotEnvironment([UNSET] * size, env) if size else env
+            while condition(env):
+                result = body(loop_env)
+                if type(result) is ReturnValue:
+                    break
+            return result
+
+        return while_loop
+
+    def _compile_function_def(self, node: bangla_ast.FunctionDef) -> Compiled:
+        name = node.name.name
+        params = [p.name for p in node.params]
+        scope = self.resolution.scope(node)
+        body = self._compile_statements(node.body.statements)
+        binding = self.resolution.binding(node.name)
+        globals_store = self.globals_store
+        slot = binding[0][1] if binding else None
+        memo_for = self.interpreter._memo_for
+
+        def function_def(env: Any) -> Any:
+            function = ClosureFunction(name, params, body, env, scope.size, scope.param_slots, memo_for(name, node))
+            if slot is None:
+                globals_store[name] = function
+            else:
+                env.values[slot] = function
+            return function
+
+        return function_def
+
+    def _compile_return(self, node: bangla_ast.ReturnStmt) -> Compiled:
+        if node.value is None:
+            return lambda env: ReturnValue(None)
+        value_fn = self.compile(node.value)
+        return lambda env: ReturnValue(value_fn(env))
+
+    def _compile_index_assign(self, node: bangla_ast.IndexAssignStmt) -> Compiled:
+        collection_fn = self.compile(node.collection)
+        index_fn = self.compile(node.index)
+        value_fn = self.compile(node.value)
+        set_index = self.interpreter._eval_set_index
+
+        def index_assign(env: Any) -> Any:
+            collection = collection_fn(env)
+            index = index_fn(env)
+            value = value_fn(env)
+            set_index(collection, index, value)
+            return value
+
+        return index_assign
+
+    def _compile_identifier(self, node: bangla_ast.Identifier) -> Compiled:
+        name = node.name
+        candidates = self.resolution.binding(node)
+        globals_store = self.globals_store
+        message = f"Chena jai na: '{name}' variable nai."
+        if node.line and node.column:
+            message = f"Line {node.line}, Col {node.column}: {message}"
+
+        def lookup(env: Any) -> Any:
+            for depth, slot in candidates:
+                scope = env
+                for _ in range(depth):
+                    scope = scope.outer
+                value = scope.values[slot]
+                if value is not UNSET:
+                    return value
+            if name in globals_store:
+                return globals_store[name]
+            raise BanglaRuntimeError(message)
+
+        if not candidates:
+            return lookup
+        if len(candidates) == 1:
+            depth, slot = candidates[0]
+            if depth == 0:
+                def load_local(env: Any) -> Any:
+                    value = env.values[slot]
+                    return lookup(env) if value is UNSET else value
+
+                return load_local
+            if depth == 1:
+                def load_outer(env: Any) -> Any:
+                    value = env.outer.values[slot]
+                    return lookup(env) if value is UNSET else value
+
+                return load_outer
+        return lookup
+
+    def _compile_literal(self, node: bangla_ast.Node) -> Compiled:
+        value = node.value
+        return lambda env: value
+
+    def _compile_prefix(self, node: bangla_ast.PrefixExpr) -> Compiled:
+        right = self.compile(node.right)
+        interp = self.interpreter
+        if node.operator == "-":
+            ensure_number = interp._ensure_number
+            return lambda env: -ensure_number(right(env))
+        if node.operator == "+":
+            ensure_number = interp._ensure_number
+            return lambda env: ensure_number(right(env))
+        if node.operator == "na":
+            is_truthy = interp._is_truthy
+            return lambda env: not is_truthy(right(env))
+        if node.operator == "doirgho":
+            eval_prefix = interp._eval_prefix
+            return lambda env: eval_prefix("doirgho", right(env))
+        raise BanglaRuntimeError(f"Ojoggo prefix operator '{node.operator}'.")
+
+    def _compile_infix(self, node: bangla_ast.InfixExpr) -> Compiled:
+        operator = node.operator
+        left = self.compile(node.left)
+        right = self.compile(node.right)
+        interp = self.interpreter
+        if operator == "ar":
+            is_truthy = interp._is_truthy
+            return lambda env: is_truthy(left(env)) and is_truthy(right(env))
+        if operator == "ba":
+            is_truthy = interp._is_truthy
+            return lambda env: is_truthy(left(env)) or is_truthy(right(env))
+        if operator == "==":
+            return lambda env: left(env) == right(env)
+        if operator == "!=":
+            return lambda env: left(env) != right(env)
+        if operator in INT_OPERATIONS:
+            return self._compile_arithmetic(node, left, right)
+        raise BanglaRuntimeError(f"Ojoggo operator '{operator}'.")
+
+    def _compile_arithmetic(self, node: bangla_ast.InfixExpr, left: Compiled, right: Compiled) -> Compiled:
+        # Plain ints take the specialized fast path; everything else (bools,
+        # strings, division by zero) falls back to the tree walker helpers so
+        # the results and error messages stay identical.
+        operator = node.operator
+        operation = INT_OPERATIONS[operator]
+        if operator in {"<", ">", "<=", ">="}:
+            fallback = self.interpreter._eval_compare
+        else:
+            fallback = self.interpreter._eval_math
+
+        if isinstance(node.right, bangla_ast.IntegerLiteral) and operator not in {"/", "%"}:
+            constant = node.right.value
+
+            def arithmetic_const(env: Any) -> Any:
+                left_value = left(env)
+                if type(left_value) is int:
+                    return operation(left_value, constant)
+                return fallback(operator, left_value, constant)
+
+            return arithmetic_const
+
+        if operator in {"/", "%"}:
+            return lambda env: fallback(operator, left(env), right(env))
+
+        def arithmetic(env: Any) -> Any:
+            left_value = left(env)
+            right_value = right(env)
+            if type(left_value) is int and type(right_value) is int:
+                return operation(left_value, right_value)
+            return fallback(operator, left_value, right_value)
+
+        return arithmetic
+
+    def _compile_cached(self, node: bangla_ast.CachedExpr) -> Compiled:
+        # Hidden slots live in the loop scope and start out UNSET.
+        depth, slot = self.resolution.binding(node.slot)[0]
+        expression = self.compile(node.expression)
+
+        if depth == 0:
+            def cached_local(env: Any) -> Any:
+                values = env.values
+                value = values[slot]
+                if value is UNSET or value is None:
+                    value = values[slot] = expression(env)
+                return value
+
+            return cached_local
+
+        def cached(env: Any) -> Any:
+            scope = env
+            for _ in range(depth):
+                scope = scope.outer
+            value = scope.values[slot]
+            if value is UNSET or value is None:
+                value = expression(env)
+                scope.values[slot] = value
+            return value
+
+        return cached
+
+    def _compile_array(self, node: bangla_ast.ArrayLiteral) -> Compiled:
+        element_fns = [self.compile(element) for element in node.elements]
+        make_array = BanglaArray.of
+        return lambda env: make_array([element_fn(env) for element_fn in element_fns])
+
+    def _compile_index(self, node: bangla_ast.IndexExpr) -> Compiled:
+        collection_fn = self.compile(node.collection)
+        index_fn = self.compile(node.index)
+        eval_index = self.interpreter._eval_index
+
+        def index(env: Any) -> Any:
+            collection = collection_fn(env)
+            position = index_fn(env)
+            if type(collection) is BanglaArray and type(position) is int and 0 <= position < len(collection.items):
+                return collection.items[position]
+            return eval_index(collection, position)
+
+        return index
+
+    def _compile_call(self, node: bangla_ast.CallExpr) -> Compiled:
+        function_fn = self.compile(node.function)
+        arg_fns = [self.compile(arg) for arg in node.args]
+
+        def call(env: Any) -> Any:
+            function = function_fn(env)
+            args = [arg_fn(env) for arg_fn in arg_fns]
+            if not isinstance(function, ClosureFunction):
+                raise BanglaRuntimeError("Function na emon kisu call kora jacche na.")
+            if len(args) != len(function.params):
+                raise BanglaRuntimeError("Argument shonkha milche na.")
+            memo = function.memo
+            if memo is not None:
+                key = memo_key(args)
+                if key is not None:
+                    value = memo.get(key)
+                    if value is MISSING:
+                        value = run(function, args)
+                        memo.put(key, value)
+                    return value
+            return run(function, args)
+
+        def run(function: ClosureFunction, args: List[Any]) -> Any:
+            if function.scope_size:
+                values = [UNSET] * function.scope_size
+                for slot, value in zip(function.param_slots, args):
+                    values[slot] = value
+                call_env = SlotEnvironment(values, function.env)
+            else:
+                call_env = function.env
+            result = function.body(call_env)
+            if type(result) is ReturnValue:
+                return result.value
+            return result
+
+        return call
+
+
+INT_OPERATIONS: dict[str, Callable[[int, int], Any]] = {
+    "+": op.add,
+    "-": op.sub,
+    "*": op.mul,
+    "/": op.floordiv,
+    "%": op.mod,
+    "**": op.pow,
+    "<": op.lt,
+    ">": op.gt,
+    "<=": op.le,
+    ">=": op.ge,
+}
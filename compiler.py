@@ -0,0 +1,369 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Any, List, Optional
+
+import bangla_ast
+from interpreter import BanglaRuntimeError
+from resolver import Resolution, resolve
+
+# Every instruction is two ints wide: opcode, argument.
+LOAD_CONST = 0
+LOAD_GLOBAL = 1
+DEFINE_GLOBAL = 2
+ASSIGN_GLOBAL = 3
+POP = 4
+POP_UNDER = 5
+PRINT = 6
+JUMP = 7
+JUMP_IF_FALSE = 8
+ENTER_SCOPE = 9
+NEW_SCOPE = 10
+USE_SCOPE = 11
+EXIT_SCOPE = 12
+MAKE_FUNCTION = 13
+CALL = 14
+RETURN = 15
+ADD = 16
+SUB = 17
+MUL = 18
+DIV = 19
+MOD = 20
+POW = 21
+LT = 22
+GT = 23
+LE = 24
+GE = 25
+EQ = 26
+NEQ = 27
+JUMP_IF_TRUE = 28
+TO_BOOL = 29
+NEG = 30
+POS = 31
+NOT = 32
+TAIL_CALL = 33
+JUMP_IF_NOT_NONE = 34
+BUILD_ARRAY = 35
+INDEX = 36
+STORE_INDEX = 37
+LENGTH = 38
+LOAD_LOCAL = 39
+DEFINE_LOCAL = 40
+ASSIGN_LOCAL = 41
+LOAD_SCOPED = 42
+ASSIGN_SCOPED = 43
+
+OPCODE_NAMES = {
+    value: name
+    for name, value in list(globals().items())
+    if name.isupper() and isinstance(value, int)
+}
+
+BINARY_OPS = {
+    "+": ADD,
+    "-": SUB,
+    "*": MUL,
+    "/": DIV,
+    "%": MOD,
+    "**": POW,
+    "<": LT,
+    ">": GT,
+    "<=": LE,
+    ">=": GE,
+    "==": EQ,
+    "!=": NEQ,
+}
+
+PREFIX_OPS = {
+    "-": NEG,
+    "+": POS,
+    "na": NOT,
+    "doirgho": LENGTH,
+}
+
+
+@dataclass
+class CodeObject:
+    name: str
+    params: List[str] = field(default_factory=list)
+    code: List[int] = field(default_factory=list)
+    constants: List[Any] = field(default_factory=list)
+    names: List[str] = field(default_factory=list)
+    positions: dict[int, tuple[int, int]] = field(default_factory=dict)
+    # Per LOAD/ASSIGN_LOCAL and _SCOPED offset: the `(depth, slot)` pairs
+    # that may hold the name, innermost first, and the name itself for the
+    # globals.
+    bindings: dict[int, tuple[tuple[tuple[int, int], ...], str]] = field(default_factory=dict)
+    # Slots of a call's scope, and which of them the arguments go to.
+    scope_size: int = 0
+    param_slots: List[int] = field(default_factory=list)
+    # The `FunctionDef` a function's code was compiled from.
+    definition: Any = field(default=None, repr=False, compare=False)
+
+    def disassemble(self) -> str:
+        lines = []
+        for offset in range(0, len(self.code), 2):
+            op, arg = self.code[offset], self.code[offset + 1]
+            lines.append(f"{offset:5d} {OPCODE_NAMES[op]:<14} {arg}")
+        return "\n".join(lines)
+
+
+class Compiler:
+    """Compiles a program to a `CodeObject`, one per function body.
+
+    Names are resolved by `resolver.Resolver` first, as for the closure
+    engine: globals are read by name from the interpreter's globals, and
+    locals from the slots of the `SlotEnvironment` the VM keeps per scope.
+    Scopes that declare nothing get no environment at all.
+    """
+
+    def __init__(
+        self,
+        name: str = "<program>",
+        params: Optional[List[str]] = None,
+        resolution: Optional[Resolution] = None,
+    ) -> None:
+        self.code_object = CodeObject(name, list(params or []))
+        self.resolution = resolution if resolution is not None else Resolution()
+        # Where each constant ((type, value), so `1` and `sotti` stay apart)
+        # and each name already is in the code object's lists.
+        self._constant_index: dict[tuple[type, Any], int] = {}
+        self._name_index: dict[str, int] = {}
+
+    def compile_program(self, program: bangla_ast.Program) -> CodeObject:
+        self.resolution = resolve(program)
+        self._compile_statements(program.statements)
+        self._emit(RETURN)
+        return self.code_object
+
+    def compile_function(self, body: bangla_ast.Block) -> CodeObject:
+        self._compile_statements(body.statements)
+        self._emit(RETURN)
+        return self.code_object
+
+    def _emit(self, op: int, arg: int = 0) -> int:
+        code = self.code_object.code
+        code.append(op)
+        code.append(arg)
+        return len(code) - 2
+
+    def _patch(self, offset: int, target: int) -> None:
+        self.code_object.code[offset + 1] = target
+
+    def _here(self) -> int:
+        return len(self.code_object.code)
+
+    def _constant(self, value: Any) -> int:
+        constants = self.code_object.constants
+        try:
+            key = (type(value), value)
+            index = self._constant_index.get(key)
+        except TypeError:
+            # Unhashable, like a function's `CodeObject`: every one gets its own entry.
+            key = None
+            index = None
+        if index is None:
+            index = len(constants)
+            constants.append(value)
+            if key is not None:
+                self._constant_index[key] = index
+        return index
+
+    def _name(self, name: str) -> int:
+        index = self._name_index.get(name)
+        if index is None:
+            names = self.code_object.names
+            index = self._name_index[name] = len(names)
+            names.append(name)
+        return index
+
+    def _mark(self, offset: int, node: bangla_ast.Identifier) -> None:
+        self.code_object.positions[offset] = (node.line, node.column)
+
+    def _emit_name(self, node: bangla_ast.Identifier, global_op: int, local_op: int, scoped_op: int) -> None:
+        # Globals by name; a name in exactly one slot of the current scope by
+        # its slot; anything else through the bindings, by the VM's slow path.
+        candidates = self.resolution.binding(node)
+        if not candidates:
+            offset = self._emit(global_op, self._name(node.name))
+        elif len(candidates) == 1 and candidates[0][0] == 0:
+            offset = self._emit(local_op, candidates[0][1])
+        else:
+            offset = self._emit(scoped_op)
+        if candidates:
+            self.code_object.bindings[offset] = (candidates, node.name)
+        self._mark(offset, node)
+
+    def _emit_define(self, node: bangla_ast.Identifier) -> None:
+        binding = self.resolution.binding(node)
+        if binding:
+            self._emit(DEFINE_LOCAL, binding[0][1])
+        else:
+            self._emit(DEFINE_GLOBAL, self._name(node.name))
+
+    def _compile_statements(self, statements: List[bangla_ast.Node]) -> None:
+        # Like the tree walker, a statement list evaluates to the value of its
+        # last statement, so exactly one value is left on the stack.
+        if not statements:
+            self._emit(LOAD_CONST, self._constant(None))
+            return
+        for index, stmt in enumerate(statements):
+            if index:
+                self._emit(POP)
+            self._compile(stmt)
+
+    def _compile(self, node: bangla_ast.Node) -> None:
+        if isinstance(node, bangla_ast.Block):
+            size = self.resolution.scope(node).size
+            if size:
+                self._emit(ENTER_SCOPE, size)
+            self._compile_statements(node.statements)
+            if size:
+                self._emit(EXIT_SCOPE)
+        elif isinstance(node, bangla_ast.VarDecl):
+            self._compile(node.value)
+            self._emit_define(node.name)
+        elif isinstance(node, bangla_ast.AssignStmt):
+            self._compile(node.value)
+            self._emit_name(node.name, ASSIGN_GLOBAL, ASSIGN_LOCAL, ASSIGN_SCOPED)
+        elif isinstance(node, bangla_ast.PrintStmt):
+            self._compile(node.expression)
+            self._emit(PRINT)
+        elif isinstance(node, bangla_ast.ExprStmt):
+            self._compile(node.expression)
+        elif isinstance(node, bangla_ast.IfStmt):
+            self._compile_if(node)
+        elif isinstance(node, bangla_ast.WhileStmt):
+            self._compile_while(node)
+        elif isinstance(node, bangla_ast.FunctionDef):
+            params = [p.name for p in node.params]
+            scope = self.resolution.scope(node)
+            function_code = Compiler(node.name.name, params, self.resolution).compile_function(node.body)
+            function_code.scope_size = scope.size
+            function_code.param_slots = scope.param_slots
+            function_code.definition = node
+            self._emit(MAKE_FUNCTION, self._constant(function_code))
+            self._emit_define(node.name)
+        elif isinstance(node, bangla_ast.ReturnStmt):
+            if node.value is None:
+                self._emit(LOAD_CONST, self._constant(None))
+            elif isinstance(node.value, bangla_ast.CallExpr):
+                # `ferot f(...)` replaces the current frame instead of
+                # stacking a new one, so tail recursion runs in constant space.
+                self._compile(node.value.function)
+                for arg in node.value.args:
+                    self._compile(arg)
+                # Unreached unless the call was answered from a memo cache,
+                # which leaves the result on the stack instead of jumping.
+                self._emit(TAIL_CALL, len(node.value.args))
+            else:
+                self._compile(node.value)
+            self._emit(RETURN)
+        elif isinstance(node, bangla_ast.IndexAssignStmt):
+            self._compile(node.collection)
+            self._compile(node.index)
+            self._compile(node.value)
+            self._emit(STORE_INDEX)
+        elif isinstance(node, bangla_ast.Identifier):
+            self._emit_name(node, LOAD_GLOBAL, LOAD_LOCAL, LOAD_SCOPED)
+        elif isinstance(
+            node,
+            (bangla_ast.IntegerLiteral, bangla_ast.StringLiteral, bangla_ast.BooleanLiteral),
+        ):
+            self._emit(LOAD_CONST, self._constant(node.value))
+        elif isinstance(node, bangla_ast.PrefixExpr):
+            if node.operator not in PREFIX_OPS:
+                raise BanglaRuntimeError(f"Ojoggo prefix operator '{node.operator}'.")
+            self._compile(node.right)
+            self._emit(PREFIX_OPS[node.operator])
+        elif isinstance(node, bangla_ast.InfixExpr):
+            if node.operator == "ar" or node.operator == "ba":
+                self._compile_logical(node)
+                return
+            if node.operator not in BINARY_OPS:
+                raise BanglaRuntimeError(f"Ojoggo operator '{node.operator}'.")
+            self._compile(node.left)
+            self._compile(node.right)
+            self._emit(BINARY_OPS[node.operator])
+        elif isinstance(node, bangla_ast.CallExpr):
+            self._compile(node.function)
+            for arg in node.args:
+                self._compile(arg)
+            self._emit(CALL, len(node.args))
+        elif isinstance(node, bangla_ast.ArrayLiteral):
+            for element in node.elements:
+                self._compile(element)
+            self._emit(BUILD_ARRAY, len(node.elements))
+        elif isinstance(node, bangla_ast.IndexExpr):
+            self._compile(node.collection)
+            self._compile(node.index)
+            self._emit(INDEX)
+        elif isinstance(node, bangla_ast.CachedExpr):
+            self._emit_name(node.slot, LOAD_GLOBAL, LOAD_LOCAL, LOAD_SCOPED)
+            jump_cached = self._emit(JUMP_IF_NOT_NONE)
+            self._compile(node.expression)
+            self._emit_name(node.slot, ASSIGN_GLOBAL, ASSIGN_LOCAL, ASSIGN_SCOPED)
+            self._patch(jump_cached, self._here())
+        else:
+            raise BanglaRuntimeError("Bujhte parchi na emon ekta expression.")
+
+    def _compile_if(self, node: bangla_ast.IfStmt) -> None:
+        self._compile(node.condition)
+        jump_else = self._emit(JUMP_IF_FALSE)
+        self._compile(node.consequence)
+        jump_end = self._emit(JUMP)
+        self._patch(jump_else, self._here())
+        if node.alternative is not None:
+            self._compile(node.alternative)
+        else:
+            self._emit(LOAD_CONST, self._constant(None))
+        self._patch(jump_end, self._here())
+
+    def _compile_logical(self, node: bangla_ast.InfixExpr) -> None:
+        # The right operand is skipped when the left one decides the result.
+        self._compile(node.left)
+        if node.operator == "ar":
+            jump_short = self._emit(JUMP_IF_FALSE)
+            short_value = False
+        else:
+            jump_short = self._emit(JUMP_IF_TRUE)
+            short_value = True
+        self._compile(node.right)
+        self._emit(TO_BOOL)
+        jump_end = self._emit(JUMP)
+        self._patch(jump_short, self._here())
+        self._emit(LOAD_CONST, self._constant(short_value))
+        self._patch(jump_end, self._here())
+
+    def _compile_while(self, node: bangla_ast.WhileStmt) -> None:
+        # The loop scope, if it declares anything, is created once and kept
+        # on the stack under the running result; the condition is evaluated
+        # in the enclosing scope.
+        scope = self.resolution.scope(node)
+        if scope.size:
+            self._emit(NEW_SCOPE, scope.size)
+            if node.hoisted:
+                self._emit(USE_SCOPE)
+                for slot in node.hoisted:
+                    self._emit(LOAD_CONST, self._constant(None))
+                    self._emit(DEFINE_LOCAL, scope.names[slot.name])
+                    self._emit(POP)
+                self._emit(EXIT_SCOPE)
+        self._emit(LOAD_CONST, self._constant(None))
+        loop_start = self._here()
+        self._compile(node.condition)
+        jump_end = self._emit(JUMP_IF_FALSE)
+        self._emit(POP)
+        if scope.size:
+            self._emit(USE_SCOPE)
+        self._compile_statements(node.body.statements)
+        if scope.size:
+            self._emit(EXIT_SCOPE)
+        self._emit(JUMP, loop_start)
+        self._patch(jump_end, self._here())
+        if scope.size:
+            self._emit(POP_UNDER)
+
+
+def compile_program(program: bangla_ast.Program) -> CodeObject:
+    return Compiler().compile_program(program)
@@ -0,0 +1,446 @@
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_right
+from contextlib import contextmanager
+from functools import partial
+import gc
+import io
+from itertools import accumulate, chain, compress, repeat
+from operator import add, is_, sub
+import re
+from typing import Callable, Iterator, List, NamedTuple, Optional, TextIO
+
+from bangla_token import Token, TokenType
+from keywords import KEYWORDS
+from lexer import Lexer
+
+# One match per token: the whitespace and (single) comment `Lexer.next_token`
+# skips, then the token. A second comment in the same gap is not skipped by
+# `Lexer`, so its `#` falls through to the single-character branch and comes
+# out ILLEGAL here too. The empty alternative only matches at the end.
+# Splitting on it gives ["", gap, token, "", gap, token, ...].
+TOKEN_PATTERN = re.compile(
+    r"""
+    ([ \t\r\n]*(?:\#[^\n]*[ \t\r\n]*)?)
+    (
+        [A-Za-z_]\w*
+      | [0-9]+
+      | ==|\*\*|<=|>=|!=
+      | "[^"\\]*(?:\\"?[^"\\]*)*"?
+      | .
+      |
+    )
+    """,
+    re.VERBOSE | re.DOTALL,
+)
+
+# Inside a string `\"` does not end it; any other backslash is plain text.
+STRING_PATTERN = re.compile(r'"[^"\\]*(?:\\"?[^"\\]*)*(?P<closed>")?')
+
+# `\w` is exactly `str.isalnum()` plus `_`, the identifier tail of `Lexer`.
+WORD_TAIL = re.compile(r"\w*")
+NEWLINE = re.compile(r"\n")
+
+OPERATORS = {
+    "=": TokenType.ASSIGN,
+    "==": TokenType.EQ,
+    "+": TokenType.PLUS,
+    "-": TokenType.MINUS,
+    "*": TokenType.ASTERISK,
+    "**": TokenType.POW,
+    "/": TokenType.SLASH,
+    "%": TokenType.MODULUS,
+    "<": TokenType.LT,
+    "<=": TokenType.LE,
+    ">": TokenType.GT,
+    ">=": TokenType.GE,
+    "!=": TokenType.NEQ,
+    ",": TokenType.COMMA,
+    ";": TokenType.SEMICOLON,
+    "(": TokenType.LPAREN,
+    ")": TokenType.RPAREN,
+    "{": TokenType.LBRACE,
+    "}": TokenType.RBRACE,
+    "[": TokenType.LBRACKET,
+    "]": TokenType.RBRACKET,
+}
+
+_new_token = partial(tuple.__new__, Token)
+
+# `TokenBuffer` stores a token's type as its index here.
+TOKEN_TYPES = tuple(TokenType)
+TYPE_CODES = {token_type: code for code, token_type in enumerate(TOKEN_TYPES)}
+
+
+class _TokenTypes(dict):
+    """Token text -> `TokenType`, filled in as new texts are seen.
+
+    Maps to None for a non-ASCII letter or digit, where `Lexer` reads a
+    longer name or number than `TOKEN_PATTERN` matched.
+    """
+
+    def __missing__(self, text: str) -> Optional[TokenType]:
+        first = text[:1]
+        if not first:
+            token_type = TokenType.EOF
+        elif first == '"':
+            token_type = TokenType.STRING
+        elif "0" <= first <= "9":
+            token_type = TokenType.INT
+        elif first.isascii() and (first.isalpha() or first == "_"):
+            token_type = TokenType.IDENT
+        elif first.isalpha() or first.isdigit():
+            token_type = None
+        else:
+            token_type = TokenType.ILLEGAL
+        self[text] = token_type
+        return token_type
+
+
+class _WordTypes(_TokenTypes):
+    """`_TokenTypes` for texts `_scan_slowly` already read as whole words."""
+
+    def __missing__(self, text: str) -> Optional[TokenType]:
+        token_type = super().__missing__(text)
+        if token_type is None:
+            token_type = TokenType.IDENT if text[0].isalpha() else TokenType.INT
+            self[text] = token_type
+        return token_type
+
+
+class _AnchorShifts(dict):
+    """Token text -> offset from the token's end to where `Lexer` made it.
+
+    `Lexer` makes a token while looking at the last character of an operator
+    (or of an ILLEGAL character), but at the character after a name, number
+    or string. The token's line and column are those of that character.
+    """
+
+    def __init__(self, types_of: _TokenTypes) -> None:
+        super().__init__(dict.fromkeys(OPERATORS, -1))
+        self.types_of = types_of
+
+    def __missing__(self, text: str) -> int:
+        shift = -1 if self.types_of[text] is TokenType.ILLEGAL else 0
+        self[text] = shift
+        return shift
+
+
+class _TypeCodes(dict):
+    """Token text -> index of its type in `TOKEN_TYPES`."""
+
+    def __init__(self, types_of: _TokenTypes) -> None:
+        super().__init__()
+        self.types_of = types_of
+
+    def __missing__(self, text: str) -> int:
+        code = TYPE_CODES[self.types_of[text]]
+        self[text] = code
+        return code
+
+
+@contextmanager
+def _gc_paused() -> Iterator[None]:
+    # Tokens hold no cycles, and letting the collector rescan the growing
+    # token lists while they are built costs about as much as building them.
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+class _Scan(NamedTuple):
+    texts: List[str]  # token text as written, quotes included
+    ends: List[int]
+    types: List[TokenType]
+    anchors: List[int]  # offset whose line and column the token reports
+    types_of: _TokenTypes
+    unterminated: bool  # the token before EOF is a string without its `"`
+
+
+def _scan(source: str) -> _Scan:
+    types_of = _TokenTypes(OPERATORS)
+    types_of.update(KEYWORDS)
+    parts = TOKEN_PATTERN.split(source)
+    texts = parts[2::3]
+    # Trailing whitespace can produce a second empty match at the end.
+    del texts[texts.index("") + 1:]
+    ends = list(accumulate(map(add, map(len, parts[1::3]), map(len, texts))))
+    del parts
+    types = list(map(types_of.__getitem__, texts))
+    if None in types:
+        texts, ends, types = _scan_slowly(source, types_of)
+        types_of = _WordTypes(OPERATORS)
+        types_of.update(KEYWORDS)
+
+    anchors = list(map(add, ends, map(_AnchorShifts(types_of).__getitem__, texts)))
+    unterminated = False
+    if len(types) > 1 and types[-2] is TokenType.STRING and ends[-2] == len(source):
+        # An unterminated string runs to the end, and `Lexer` reads one step
+        # past it, for the string and the EOF after it.
+        start = len(source) - len(texts[-2])
+        unterminated = STRING_PATTERN.match(source, start).group("closed") is None
+        if unterminated:
+            anchors[-2] = anchors[-1] = len(source) + 1
+    return _Scan(texts, ends, types, anchors, types_of, unterminated)
+
+
+def _scan_slowly(source: str, types_of: _TokenTypes) -> tuple[List[str], List[int], List[TokenType]]:
+    # Token by token, for sources with non-ASCII letters or digits outside
+    # strings and comments.
+    texts: List[str] = []
+    ends: List[int] = []
+    types: List[TokenType] = []
+    pos = 0
+    while True:
+        start, end = TOKEN_PATTERN.match(source, pos).span(2)
+        token_type = types_of[source[start:end]]
+        if token_type is None or token_type is TokenType.INT:
+            if source[start].isalpha():
+                end = WORD_TAIL.match(source, end).end()
+                token_type = TokenType.IDENT
+            else:
+                while end < len(source) and source[end].isdigit():
+                    end += 1
+                token_type = TokenType.INT
+        texts.append(source[start:end])
+        ends.append(end)
+        types.append(token_type)
+        if token_type is TokenType.EOF:
+            return texts, ends, types
+        pos = end
+
+
+def _string_indexes(types: List[TokenType]) -> Iterator[int]:
+    return compress(range(len(types)), map(is_, types, repeat(TokenType.STRING)))
+
+
+def _lines_and_columns(
+    source: str,
+    anchors: List[int],
+    line: int = 1,
+    line_start: int = -1,
+) -> tuple[List[int], List[int]]:
+    # newlines[k] is the k-th newline, with `line_start` (-1 when `source`
+    # starts a line) standing in for the start of its first line, so the line
+    # of an offset is the number of entries at or before it, and its column
+    # the distance from the newline that opens the line. `line` is the number
+    # of that first line.
+    newlines = [line_start]
+    newlines.extend(map(re.Match.start, NEWLINE.finditer(source)))
+    lines = list(map(partial(bisect_right, newlines), anchors))
+    line_starts = [0] + newlines
+    columns = list(map(sub, anchors, map(line_starts.__getitem__, lines)))
+    if line != 1:
+        lines = list(map(add, lines, repeat(line - 1)))
+    return lines, columns
+
+
+def _tokens(source: str, scan: _Scan, line: int = 1, line_start: int = -1) -> List[Token]:
+    literals = scan.texts
+    if scan.unterminated:
+        open_string = literals[-2][1:]
+    for index in _string_indexes(scan.types):
+        literals[index] = literals[index][1:-1]
+    if scan.unterminated:
+        literals[-2] = open_string
+    lines, columns = _lines_and_columns(source, scan.anchors, line, line_start)
+    return list(map(_new_token, zip(scan.types, literals, lines, columns)))
+
+
+def tokenize(source: str) -> List[Token]:
+    """Tokens of `source` up to and including EOF, equal to `Lexer`'s.
+
+    Everything per token runs in C: the regex finds the tokens, dict lookups
+    type them and a bisect over the newline offsets gives line and column.
+    """
+    with _gc_paused():
+        return _tokens(source, _scan(source))
+
+
+class FastLexer:
+    """Drop-in replacement for `Lexer` that tokenizes the source in bulk.
+
+    The whole source is tokenized on construction, and `next_token` hands
+    the tokens out in order, repeating EOF at the end like `Lexer`. The
+    stream is the same as `Lexer`'s, positions included; `Lexer` stays the
+    reference for differential tests (see `LEXERS`).
+    """
+
+    def __init__(self, source: str) -> None:
+        self.source = source
+        self.tokens = tokenize(source)
+        # A C method rather than a Python one: a Python call per token costs
+        # about as much as tokenizing it.
+        self.next_token: Callable[[], Token] = chain(self.tokens, repeat(self.tokens[-1])).__next__
+
+
+class TokenBuffer:
+    """The tokens of a source as parallel arrays, one entry per token.
+
+    Types are stored as indexes into `TOKEN_TYPES`, and literals as the
+    start/end offsets of their text in `source`, sliced only when asked for.
+    That is a couple of dozen bytes per token instead of a `Token` tuple and
+    its literal string. The tokens and positions are the ones `tokenize`
+    returns.
+    """
+
+    def __init__(self, source: str) -> None:
+        self.source = source
+        # Offsets, lines and columns all fit in the width the offsets need.
+        position_code = "I" if len(source) < 2**32 - 1 else "Q"
+        with _gc_paused():
+            scan = _scan(source)
+            self.types = array("B", map(_TypeCodes(scan.types_of).__getitem__, scan.texts))
+            self.starts = array(position_code, map(sub, scan.ends, map(len, scan.texts)))
+            self.ends = array(position_code, scan.ends)
+            starts = self.starts
+            ends = self.ends
+            for index in _string_indexes(scan.types):
+                starts[index] += 1
+                ends[index] -= 1
+            if scan.unterminated:
+                ends[-2] = len(source)
+            lines, columns = _lines_and_columns(source, scan.anchors)
+            del scan
+            self.lines = array(position_code, lines)
+            del lines
+            self.columns = array(position_code, columns)
+
+    def __len__(self) -> int:
+        return len(self.types)
+
+    @property
+    def nbytes(self) -> int:
+        arrays = (self.types, self.starts, self.ends, self.lines, self.columns)
+        return sum(len(values) * values.itemsize for values in arrays)
+
+    def literal(self, index: int) -> str:
+        return self.source[self.starts[index]:self.ends[index]]
+
+    def token(self, index: int) -> Token:
+        return Token(TOKEN_TYPES[self.types[index]], self.literal(index), self.lines[index], self.columns[index])
+
+
+class BufferedToken:
+    """One position in a `TokenBuffer`, read like a `Token`."""
+
+    __slots__ = ("type", "line", "column", "buffer", "index")
+
+    def __init__(self, buffer: TokenBuffer) -> None:
+        self.buffer = buffer
+        self.index = -1
+
+    @property
+    def literal(self) -> str:
+        return self.buffer.literal(self.index)
+
+
+class BufferedLexer:
+    """`next_token` over a `TokenBuffer`, without a `Token` per token.
+
+    It alternates between two `BufferedToken`s, so a returned token stays
+    valid until `next_token` has been called twice more. That is exactly
+    what `Parser` needs, since it only keeps the current and peek tokens.
+    """
+
+    def __init__(self, source: str | TokenBuffer) -> None:
+        self.buffer = source if isinstance(source, TokenBuffer) else TokenBuffer(source)
+        self._views = [BufferedToken(self.buffer), BufferedToken(self.buffer)]
+        self._index = 0
+        self._last = len(self.buffer) - 1
+
+    def next_token(self) -> BufferedToken:
+        views = self._views
+        view = views[0]
+        views.reverse()
+        index = self._index
+        if index < self._last:
+            self._index = index + 1
+        buffer = self.buffer
+        view.type = TOKEN_TYPES[buffer.types[index]]
+        view.line = buffer.lines[index]
+        view.column = buffer.columns[index]
+        view.index = index
+        return view
+
+
+# Characters `StreamingLexer` reads from its stream at a time.
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+
+class StreamingLexer:
+    """`next_token` over a text stream, read `chunk_size` characters at a time.
+
+    Each chunk is tokenized like `tokenize` does, except for its last token,
+    which may continue in the next chunk and is tokenized again with it. A
+    `#` token is never where a chunk is cut either, because whether `#`
+    starts a comment depends on the gap before it. Only the current chunk's
+    tokens are held, so memory does not grow with the source, and the tokens
+    and positions are the same as `Lexer`'s for the whole text.
+    """
+
+    def __init__(self, stream: TextIO | str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> None:
+        self.stream = io.StringIO(stream) if isinstance(stream, str) else stream
+        self.chunk_size = chunk_size
+        self._pending = ""
+        # Line number and start (see `_lines_and_columns`) of `_pending`.
+        self._line = 1
+        self._line_start = -1
+        self._tokens: List[Token] = []
+        self._index = 0
+        self._done = False
+
+    def next_token(self) -> Token:
+        index = self._index
+        if index == len(self._tokens):
+            if self._done:
+                return self._tokens[-1]
+            self._refill()
+            index = 0
+        self._index = index + 1
+        return self._tokens[index]
+
+    def _refill(self) -> None:
+        while True:
+            chunk = self.stream.read(self.chunk_size)
+            source = self._pending + chunk
+            with _gc_paused():
+                scan = _scan(source)
+                if not chunk:
+                    self._tokens = _tokens(source, scan, self._line, self._line_start)
+                    self._pending = ""
+                    self._index = 0
+                    self._done = True
+                    return
+                # Keep the last token (and any `#` tokens before it) for the
+                # next chunk; the EOF token is at index -1.
+                keep = len(scan.texts) - 2
+                while keep > 0 and scan.texts[keep] == "#":
+                    keep -= 1
+                if keep <= 0:
+                    self._pending = source
+                    continue
+                cut = scan.ends[keep] - len(scan.texts[keep])
+                self._tokens = _tokens(source, scan, self._line, self._line_start)[:keep]
+            newlines = source.count("\n", 0, cut)
+            if newlines:
+                self._line += newlines
+                self._line_start = source.rfind("\n", 0, cut) - cut
+            else:
+                self._line_start -= cut
+            self._pending = source[cut:]
+            self._index = 0
+            return
+
+
+LEXERS = {
+    "fast": FastLexer,
+    "compact": BufferedLexer,
+    "stream": StreamingLexer,
+    "reference": Lexer,
+}
@@ -0,0 +1,353 @@
+from __future__ import annotations
+
+from bisect import bisect_left
+from dataclasses import dataclass
+from itertools import islice
+import re
+from typing import List, NamedTuple, Optional
+
+import bangla_ast
+from bangla_token import Token, TokenType
+from lexer import Lexer
+from parser import Parser
+from purity import walk
+
+# Nodes that carry a line and column.
+POSITIONED = (
+    bangla_ast.VarDecl,
+    bangla_ast.AssignStmt,
+    bangla_ast.PrintStmt,
+    bangla_ast.ExprStmt,
+    bangla_ast.IfStmt,
+    bangla_ast.WhileStmt,
+    bangla_ast.FunctionDef,
+    bangla_ast.ReturnStmt,
+    bangla_ast.IndexAssignStmt,
+    bangla_ast.Identifier,
+    bangla_ast.IntegerLiteral,
+    bangla_ast.StringLiteral,
+    bangla_ast.BooleanLiteral,
+    bangla_ast.ArrayLiteral,
+)
+
+# Every parser error starts with the position it is about.
+ERROR_POSITION = re.compile(r"^Line (\d+), Col (\d+): ")
+
+
+class _TokenState(NamedTuple):
+    start: int  # offset of the token's first character
+    line: int  # `Lexer.line` and `Lexer.column` there
+    column: int
+    end: int  # `Lexer.position` after the token
+
+
+class _SeekableLexer(Lexer):
+    """`Lexer` that records where its tokens are and can restart at one.
+
+    Restarting at a token start gives the same tokens as lexing from the
+    beginning, as long as that token is not `#`: whether `#` opens a comment
+    depends on the gap before it.
+    """
+
+    def __init__(self, source: str) -> None:
+        self._start = (0, 1, 0)
+        super().__init__(source)
+        self.previous: Optional[_TokenState] = None
+        self.latest: Optional[_TokenState] = None
+
+    def _skip_whitespace(self) -> None:
+        super()._skip_whitespace()
+        # The last skip before a token ends where the token starts.
+        self._start = (self.position, self.line, self.column)
+
+    def next_token(self) -> Token:
+        token = super().next_token()
+        self.previous = self.latest
+        self.latest = _TokenState(*self._start, self.position)
+        return token
+
+    def seek(self, start: int, line: int, column: int) -> None:
+        self.position = start
+        self.read_position = start + 1
+        self.current_char = self.source[start] if start < len(self.source) else None
+        self.line = line
+        self.column = column
+        self.previous = self.latest = None
+
+
+@dataclass(slots=True)
+class _BlockSpan:
+    block: bangla_ast.Block
+    start: int  # offset of `{`
+    end: int  # offset after `}`
+    close: _TokenState  # the `}` token
+
+
+@dataclass(slots=True)
+class _Unit:
+    """What one top-level `Parser._parse_statement` call read and made.
+
+    Only `start` moves when an edit before the unit shifts it. `blocks` stay
+    where they were when the unit was parsed, at `origin`; `block_at` moves
+    them along with `start`.
+    """
+
+    start: _TokenState  # its first token
+    lookahead: int  # from `start` to the end of the last token the parser peeked at
+    statement: Optional[bangla_ast.Node]
+    errors: List[str]
+    nodes: List[bangla_ast.Node]  # the `POSITIONED` nodes in `statement`
+    origin: _TokenState
+    blocks: List[_BlockSpan]  # every block in `statement`, by start
+
+    @property
+    def lookahead_end(self) -> int:
+        return self.start.start + self.lookahead
+
+    def block_at(self, start: int) -> Optional[tuple[_BlockSpan, List[_BlockSpan]]]:
+        """The block opening at offset `start`, and the blocks nested in it."""
+        moved = _Shift(
+            self.start.start - self.origin.start,
+            self.origin.line,
+            self.start.line - self.origin.line,
+            self.start.column - self.origin.column,
+        )
+        blocks = self.blocks
+        position = bisect_left(blocks, start - moved.delta, key=lambda span: span.start)
+        if position == len(blocks) or blocks[position].start != start - moved.delta:
+            return None
+        span = blocks[position]
+        nested = [span]
+        for inner in islice(blocks, position + 1, None):
+            if inner.start >= span.end:
+                break
+            nested.append(inner)
+        if moved.delta or moved.line_delta or moved.column_delta:
+            nested = [moved.block(inner) for inner in nested]
+        return nested[0], nested
+
+
+@dataclass(slots=True)
+class _Shift:
+    """Moves positions from after an edit in the old text to the new text.
+
+    Text after the edit is unchanged, so an offset moves by `delta` and a
+    line by `line_delta`. Only positions on `line`, the line the edit ends
+    on, have text before them on their line that changed, and their column
+    moves by `column_delta`.
+    """
+
+    delta: int
+    line: int
+    line_delta: int
+    column_delta: int
+
+    def state(self, state: _TokenState) -> _TokenState:
+        line, column = state.line, state.column
+        if line == self.line:
+            column += self.column_delta
+        return _TokenState(state.start + self.delta, line + self.line_delta, column, state.end + self.delta)
+
+    def nodes(self, nodes: List[bangla_ast.Node]) -> None:
+        line = self.line
+        line_delta = self.line_delta
+        column_delta = self.column_delta
+        for node in nodes:
+            if node.line == line:
+                node.column += column_delta
+            node.line += line_delta
+
+    def error(self, message: str) -> str:
+        def moved(match: re.Match) -> str:
+            line, column = int(match.group(1)), int(match.group(2))
+            if line == self.line:
+                column += self.column_delta
+            return f"Line {line + self.line_delta}, Col {column}: "
+
+        return ERROR_POSITION.sub(moved, message)
+
+    def block(self, span: _BlockSpan) -> _BlockSpan:
+        return _BlockSpan(span.block, span.start + self.delta, span.end + self.delta, self.state(span.close))
+
+    def unit(self, unit: _Unit) -> None:
+        if unit.start.line == self.line or self.line_delta:
+            self.nodes(unit.nodes)
+            unit.errors = [self.error(message) for message in unit.errors]
+        unit.start = self.state(unit.start)
+
+
+class _ReusingParser(Parser):
+    """`Parser` that records its units and blocks, and skips reusable blocks."""
+
+    def __init__(self, lexer: _SeekableLexer, owner: IncrementalParser) -> None:
+        self.owner = owner
+        self.blocks: List[_BlockSpan] = []
+        super().__init__(lexer)
+
+    def parse_unit(self) -> _Unit:
+        start = self.lexer.previous
+        errors_before = len(self.errors)
+        self.blocks = []
+        stmt = self._parse_statement()
+        nodes = [node for node in walk(stmt) if isinstance(node, POSITIONED)]
+        self.blocks.sort(key=lambda span: span.start)
+        return _Unit(
+            start,
+            self.lexer.latest.end - start.start,
+            stmt,
+            self.errors[errors_before:],
+            nodes,
+            start,
+            self.blocks,
+        )
+
+    def _parse_block_statement(self) -> bangla_ast.Block:
+        lexer = self.lexer
+        start = lexer.previous.start
+        reused = self.owner._reusable_block(start)
+        if reused is not None:
+            span, nested = reused
+            self.blocks.extend(nested)
+            lexer.seek(span.close.start, span.close.line, span.close.column)
+            self.cur_token = lexer.next_token()
+            self.peek_token = lexer.next_token()
+            return span.block
+        errors_before = len(self.errors)
+        block = super()._parse_block_statement()
+        if self.cur_token.type is TokenType.RBRACE and len(self.errors) == errors_before:
+            close = lexer.previous
+            self.blocks.append(_BlockSpan(block, start, close.end, close))
+        return block
+
+
+class IncrementalParser:
+    """Parses a buffer once, then re-parses only what each edit touches.
+
+    `edit(offset, deleted, inserted)` changes the text and returns the new
+    `Program`, equal to parsing the new text from scratch, positions and
+    `errors` included. Parsing restarts at the first top-level statement the
+    edit can affect and stops as soon as it reaches the start of a statement
+    after the edit, from where the old statements are reused. Blocks inside
+    the re-parsed statements that the edit does not touch are reused too.
+
+    Reused nodes are moved to their new lines and columns in place, so a
+    `Program` returned earlier shares them and should not be used after an
+    edit.
+    """
+
+    def __init__(self, source: str) -> None:
+        self.source = source
+        self._units: List[_Unit] = []
+        self._old_units: List[_Unit] = []
+        self._old_starts: List[int] = []
+        self._edit: Optional[tuple[int, int, int, _Shift]] = None
+        self.reparsed = 0
+        self.reused_blocks = 0
+        self._units = self._parse(0, [])
+        self.program = self._program()
+
+    @property
+    def errors(self) -> List[str]:
+        return [message for unit in self._units for message in unit.errors]
+
+    def edit(self, offset: int, deleted: int, inserted: str) -> bangla_ast.Program:
+        old = self.source
+        if not 0 <= offset <= offset + deleted <= len(old):
+            raise ValueError(f"Edit {offset}+{deleted} is outside the {len(old)} character source.")
+        old_end = offset + deleted
+        new_end = offset + len(inserted)
+        self.source = old[:offset] + inserted + old[old_end:]
+        old_line_start = old.rfind("\n", 0, old_end)
+        new_line_start = self.source.rfind("\n", 0, new_end)
+        shift = _Shift(
+            delta=new_end - old_end,
+            line=old.count("\n", 0, old_end) + 1,
+            line_delta=inserted.count("\n") - old.count("\n", offset, old_end),
+            column_delta=(new_end - new_line_start) - (old_end - old_line_start),
+        )
+        self._edit = (offset, old_end, new_end, shift)
+
+        units = self._units
+        # A unit is unaffected when everything the lexer read for it, up to
+        # the end of the token after it, lies before the edit.
+        first = bisect_left(units, offset, key=lambda unit: unit.lookahead_end)
+        while first and old[units[first].start.start] == "#":
+            first -= 1
+        self._old_units = units
+        self._old_starts = [unit.start.start for unit in units]
+        self.reused_blocks = 0
+        try:
+            self._units = units[:first] + self._parse(first, units)
+        finally:
+            self._old_units = []
+            self._old_starts = []
+            self._edit = None
+        self.program = self._program()
+        return self.program
+
+    def _program(self) -> bangla_ast.Program:
+        return bangla_ast.Program([unit.statement for unit in self._units if unit.statement is not None])
+
+    def _parse(self, first: int, old_units: List[_Unit]) -> List[_Unit]:
+        lexer = _SeekableLexer(self.source)
+        if first:
+            start = old_units[first].start
+            lexer.seek(start.start, start.line, start.column)
+        parser = _ReusingParser(lexer, self)
+        units: List[_Unit] = []
+        while parser.cur_token.type is not TokenType.EOF:
+            rest = self._resync(lexer.previous.start)
+            if rest is not None:
+                self.reparsed = len(units)
+                return units + rest
+            units.append(parser.parse_unit())
+            parser._next_token()
+        self.reparsed = len(units)
+        return units
+
+    def _resync(self, start: int) -> Optional[List[_Unit]]:
+        # The old units from one starting at `start` on, if that one is after
+        # the edit, where the text has not changed.
+        if self._edit is None:
+            return None
+        offset, old_end, new_end, shift = self._edit
+        if start < new_end:
+            return None
+        old_start = start - shift.delta
+        index = bisect_left(self._old_starts, old_start)
+        if index == len(self._old_starts) or self._old_starts[index] != old_start:
+            return None
+        if self.source[start] == "#":
+            return None
+        rest = self._old_units[index:]
+        for unit in rest:
+            shift.unit(unit)
+        return rest
+
+    def _reusable_block(self, start: int) -> Optional[tuple[_BlockSpan, List[_BlockSpan]]]:
+        # The old block that opens at `start`, with the blocks nested in it,
+        # if the edit does not touch it; moved to the new text.
+        if self._edit is None:
+            return None
+        offset, old_end, new_end, shift = self._edit
+        after = start >= new_end
+        if after:
+            old_start = start - shift.delta
+        elif start < offset:
+            old_start = start
+        else:
+            return None
+        index = bisect_left(self._old_starts, old_start + 1) - 1
+        if index < 0:
+            return None
+        found = self._old_units[index].block_at(old_start)
+        if found is None:
+            return None
+        span, nested = found
+        if old_start < offset and span.end > offset:
+            return None
+        if after:
+            shift.nodes([node for node in walk(span.block) if isinstance(node, POSITIONED)])
+            nested = [shift.block(inner) for inner in nested]
+        self.reused_blocks += 1
+        return nested[0], nested
@@ -1,16 +1,35 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Any, List, Optional
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Collection, Iterable, Iterator, List, Optional
 
 import bangla_ast
+from bangla_array import BanglaArray
+from memo import DEFAULT_MEMO_SIZE, MISSING, MemoCache, MemoStats, memo_key
+from output import OutputSink
+from purity import defines_functions, pure_functions
+from resolver import UNSET, Resolution, SlotEnvironment, resolve
+
+ENGINES = ("tree", "vm", "closure")
+
+# Default number of nested `.bn` calls the VM allows on its heap call stack.
+MAX_CALL_DEPTH = 100_000
+
+# Steps (jumps and calls) `run_async` takes before it lets other tasks run.
+DEFAULT_SLICE_STEPS = 1000
 
 
 class BanglaRuntimeError(Exception):
     pass
 
 
-class ReturnSignal(Exception):
+class ReturnValue:
+    """Result of a `ferot` statement, passed back up through the enclosing
+    blocks until the function call (or the program) unwraps it."""
+
+    __slots__ = ("value",)
+
     def __init__(self, value: Any) -> None:
         self.value = value
 
@@ -20,7 +39,23 @@ class Function:
     name: str
     params: List[str]
     body: bangla_ast.Block
-    env: "Environment"
+    # The scope the function was defined in (the global `Environment` or a
+    # `SlotEnvironment`), and the resolution of the program it is part of.
+    env: Any
+    resolution: Resolution
+    scope_size: int = 0
+    param_slots: List[int] = field(default_factory=list)
+    # Call scopes kept for the next calls. Only a body that defines no
+    # functions gets them: nothing can keep such a scope alive after the
+    # call returns, so it can be emptied and used again.
+    poolable: bool = False
+    frames: List[SlotEnvironment] = field(default_factory=list, repr=False, compare=False)
+    memo: Optional[MemoCache] = field(default=None, repr=False, compare=False)
+    # What a kept call scope's slots are reset to, in place.
+    blank: List[Any] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        self.blank = [UNSET] * self.scope_size
 
 
 class Environment:
@@ -53,25 +88,225 @@ class Environment:
 
 
 class Interpreter:
-    def __init__(self) -> None:
+    """Runs programs on one of the `ENGINES`, against one set of globals.
+
+    With `memoize_pure`, functions that `purity.pure_functions` proves pure
+    in the program being run keep their results in an LRU cache of
+    `memo_size` entries per function, so repeated calls with the same
+    arguments (the subproblems of a recursive fib) are computed once. The
+    analysis needs the whole program, so `run_statements` only memoizes
+    the functions named in `memoize`. Those are memoized whether or not
+    they are provably pure: the caller vouches for them. `memo_stats`
+    reports the hits and misses.
+    """
+
+    def __init__(
+        self,
+        engine: str = "tree",
+        max_call_depth: int = MAX_CALL_DEPTH,
+        output: Optional[OutputSink] = None,
+        memoize_pure: bool = False,
+        memoize: Collection[str] = (),
+        memo_size: int = DEFAULT_MEMO_SIZE,
+    ) -> None:
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown engine '{engine}', expected one of {', '.join(ENGINES)}.")
+        self.engine = engine
+        self.max_call_depth = max_call_depth
         self.global_env = Environment()
+        # Only `run` and friends flush, not `evaluate` or an engine called
+        # on its own, so without a sink from the caller every line is
+        # written as it is printed.
+        self.output = output if output is not None else OutputSink(buffer_size=0)
+        # The tree walker's current scope, and the `resolver.Resolution` of
+        # the program it is walking: locals live in slots of
+        # `SlotEnvironment`s, globals in `global_env`.
+        self._env: Any = self.global_env
+        self._resolution = Resolution()
+        # Per function body (by id, holding the body so the id stays its
+        # own): whether its call scopes can be pooled.
+        self._poolable: dict[int, tuple[bangla_ast.Block, bool]] = {}
+        self.memoize_pure = memoize_pure
+        self.memoize = frozenset(memoize)
+        self.memo_size = memo_size
+        self._memoized = self.memoize
+        # Per memoized `FunctionDef` (by id, holding the node): the cache
+        # every function value made from it shares.
+        self._memos: dict[int, tuple[bangla_ast.FunctionDef, MemoCache]] = {}
+
+    def run(self, program: bangla_ast.Program) -> Any:
+        self._memoize_for(program)
+        try:
+            return self._run(program)
+        finally:
+            self._memoized = self.memoize
+            self.output.flush()
+
+    def run_statements(self, statements: Iterable[bangla_ast.Node]) -> Any:
+        """Run top-level statements as they arrive, e.g. from `Parser.parse_statements`.
+
+        Each statement runs before the next one is taken, against the same
+        globals, so a program can start before it has been parsed to the end.
+        The result is the same as `run` on a `Program` of those statements.
+        """
+        try:
+            result = None
+            for stmt in statements:
+                result = self._run_statement(stmt)
+                if type(result) is ReturnValue:
+                    return result.value
+            return result
+        finally:
+            self.output.flush()
+
+    async def run_async(
+        self,
+        program: bangla_ast.Program,
+        max_steps: Optional[int] = None,
+        time_limit: Optional[float] = None,
+        slice_steps: int = DEFAULT_SLICE_STEPS,
+    ) -> Any:
+        """Like `run`, but hands the event loop back every `slice_steps` steps.
+
+        A step is a loop iteration or a call (see `VM.run_steps`), so even an
+        endless `jokhon` loop only holds the loop for one slice at a time and
+        many scripts can run side by side. More than `max_steps` steps, or more
+        than `time_limit` seconds spent running (time spent waiting for other
+        tasks does not count), ends the script with a `BanglaRuntimeError`.
+        The time limit is checked between slices.
+
+        Scripts run on the VM whatever `engine` is, since only the VM keeps
+        its state off the Python stack and can stop part way through.
+        """
+        if slice_steps < 1:
+            raise ValueError(f"slice_steps must be at least 1, got {slice_steps}.")
+        if max_steps is not None and max_steps < 0:
+            raise ValueError(f"max_steps must be at least 0, got {max_steps}.")
+        import asyncio
+        import time
+
+        from compiler import compile_program
+        from vm import VM
+
+        def next_slice(used: int) -> int:
+            # One step past `max_steps` pauses, to report the overrun.
+            return slice_steps if max_steps is None else min(slice_steps, max_steps + 1 - used)
+
+        used = 0
+        elapsed = 0.0
+        ticks = next_slice(used)
+        steps = VM(self).run_steps(compile_program(program), ticks)
+        self._memoize_for(program)
+        resume: Optional[int] = None
+        try:
+            while True:
+                started = time.perf_counter()
+                try:
+                    steps.send(resume)
+                except StopIteration as stop:
+                    return stop.value
+                finally:
+                    elapsed += time.perf_counter() - started
+                used += ticks
+                if max_steps is not None and used > max_steps:
+                    raise BanglaRuntimeError(f"Onek beshi step: {max_steps} tar beshi step chola jabe na.")
+                if time_limit is not None and elapsed > time_limit:
+                    raise BanglaRuntimeError(f"Somoy shesh: {time_limit:g} second er beshi legeche.")
+                await asyncio.sleep(0)
+                resume = ticks = next_slice(used)
+        finally:
+            steps.close()
+            self._memoized = self.memoize
+            self.output.flush()
+
+    def memo_stats(self) -> dict[str, MemoStats]:
+        """Hits, misses and cached results of each memoized function."""
+        stats: dict[str, MemoStats] = {}
+        for _, cache in self._memos.values():
+            old = stats.get(cache.name, MemoStats(0, 0, 0))
+            stats[cache.name] = MemoStats(old.hits + cache.hits, old.misses + cache.misses, old.size + len(cache))
+        return stats
+
+    def _memoize_for(self, program: bangla_ast.Program) -> None:
+        if self.memoize_pure:
+            self._memoized = self.memoize | pure_functions(program)
+
+    def _memo_for(self, name: str, definition: bangla_ast.FunctionDef) -> Optional[MemoCache]:
+        # Called by every engine when it makes a function value, which a
+        # loop or an enclosing function can do any number of times for one
+        # definition.
+        if name not in self._memoized:
+            return None
+        entry = self._memos.get(id(definition))
+        if entry is None:
+            entry = self._memos[id(definition)] = (definition, MemoCache(name, self.memo_size))
+        return entry[1]
+
+    def _run(self, program: bangla_ast.Program) -> Any:
+        if self.engine == "vm":
+            from compiler import compile_program
+            from vm import VM
+
+            return VM(self).run(compile_program(program))
+        with self._python_stack_guard():
+            if self.engine == "closure":
+                from closure_compiler import ClosureCompiler
+
+                return ClosureCompiler(self).compile_program(program)(self.global_env)
+            return self.evaluate(program)
+
+    def _run_statement(self, stmt: bangla_ast.Node) -> Any:
+        # A top-level `ferot` comes back as a `ReturnValue`, which ends the run.
+        if self.engine == "vm":
+            from compiler import compile_program
+            from vm import VM
+
+            vm = VM(self)
+            value = vm.run(compile_program(bangla_ast.Program([stmt])))
+            return ReturnValue(value) if vm.returned else value
+        with self._python_stack_guard():
+            if self.engine == "closure":
+                from closure_compiler import ClosureCompiler
+
+                return ClosureCompiler(self).compile_statement(stmt)(self.global_env)
+            self._start(bangla_ast.Program([stmt]))
+            return self.evaluate(stmt)
+
+    @contextmanager
+    def _python_stack_guard(self) -> Iterator[None]:
+        try:
+            yield
+        except RecursionError:
+            # These engines recurse on the Python stack; only the VM honours
+            # max_call_depth.
+            raise BanglaRuntimeError(
+                "Recursion onek gobhir: Python stack sesh hoye geche (--engine=vm chalan)."
+            ) from None
 
     def evaluate(self, node: bangla_ast.Node) -> Any:
+        # Names are the nodes evaluated most often, so they are checked first.
+        if isinstance(node, bangla_ast.Identifier):
+            candidates = self._resolution.bindings[id(node)]
+            if not candidates:
+                store = self.global_env.store
+                if node.name in store:
+                    return store[node.name]
+            return self._lookup(node, candidates)
         if isinstance(node, bangla_ast.Program):
             return self._eval_program(node)
         if isinstance(node, bangla_ast.Block):
-            return self._eval_block(node, Environment(self.global_env))
+            return self._eval_scope(node)
         if isinstance(node, bangla_ast.VarDecl):
             value = self.evaluate(node.value)
-            self.global_env.set(node.name.name, value)
+            self._declare(node.name, value)
             return value
         if isinstance(node, bangla_ast.AssignStmt):
             value = self.evaluate(node.value)
-            self.global_env.assign(node.name.name, value, node.name.line, node.name.column)
+            self._assign(node.name, value)
             return value
         if isinstance(node, bangla_ast.PrintStmt):
             value = self.evaluate(node.expression)
-            print(self._stringify(value))
+            self.output.write_line(self._stringify(value))
             return value
         if isinstance(node, bangla_ast.ExprStmt):
             return self.evaluate(node.expression)
@@ -80,21 +315,29 @@ class Interpreter:
         if isinstance(node, bangla_ast.WhileStmt):
             return self._eval_while(node)
         if isinstance(node, bangla_ast.FunctionDef):
-            function = Function(node.name.name, [p.name for p in node.params], node.body, self.global_env)
-            self.global_env.set(node.name.name, function)
+            scope = self._resolution.scope(node)
+            function = Function(
+                node.name.name,
+                [p.name for p in node.params],
+                node.body,
+                self._env,
+                self._resolution,
+                scope.size,
+                scope.param_slots,
+                self._is_poolable(node.body),
+                memo=self._memo_for(node.name.name, node),
+            )
+            self._declare(node.name, function)
             return function
         if isinstance(node, bangla_ast.ReturnStmt):
             value = self.evaluate(node.value) if node.value is not None else None
-            raise ReturnSignal(value)
-        if isinstance(node, bangla_ast.Identifier):
-            try:
-                return self.global_env.get(node.name)
-            except BanglaRuntimeError as exc:
-                if node.line and node.column:
-                    raise BanglaRuntimeError(
-                        f"Line {node.line}, Col {node.column}: {exc}"
-                    ) from exc
-                raise
+            return ReturnValue(value)
+        if isinstance(node, bangla_ast.IndexAssignStmt):
+            collection = self.evaluate(node.collection)
+            index = self.evaluate(node.index)
+            value = self.evaluate(node.value)
+            self._eval_set_index(collection, index, value)
+            return value
         if isinstance(node, bangla_ast.IntegerLiteral):
             return node.value
         if isinstance(node, bangla_ast.StringLiteral):
@@ -105,6 +348,8 @@ class Interpreter:
             right = self.evaluate(node.right)
             return self._eval_prefix(node.operator, right)
         if isinstance(node, bangla_ast.InfixExpr):
+            if node.operator == "ar" or node.operator == "ba":
+                return self._eval_logical(node)
             left = self.evaluate(node.left)
             right = self.evaluate(node.right)
             return self._eval_infix(node.operator, left, right)
@@ -112,52 +357,181 @@ class Interpreter:
             function = self.evaluate(node.function)
             args = [self.evaluate(arg) for arg in node.args]
             return self._apply_function(function, args)
+        if isinstance(node, bangla_ast.ArrayLiteral):
+            return BanglaArray.of([self.evaluate(element) for element in node.elements])
+        if isinstance(node, bangla_ast.IndexExpr):
+            collection = self.evaluate(node.collection)
+            return self._eval_index(collection, self.evaluate(node.index))
+        if isinstance(node, bangla_ast.CachedExpr):
+            return self._eval_cached(node)
         raise BanglaRuntimeError("Bujhte parchi na emon ekta expression.")
 
     def _eval_program(self, program: bangla_ast.Program) -> Any:
+        self._start(program)
         result = None
         for stmt in program.statements:
             result = self.evaluate(stmt)
+            if type(result) is ReturnValue:
+                return result.value
         return result
 
-    def _eval_block(self, block: bangla_ast.Block, env: Environment) -> Any:
+    def _start(self, program: bangla_ast.Program) -> None:
+        # Top-level code runs in the globals, whatever a failed run left.
+        self._resolution = resolve(program)
+        self._env = self.global_env
+
+    def _eval_block(self, block: bangla_ast.Block, env: Any) -> Any:
+        # A `ReturnValue` stops the block and is handed to the caller as is;
+        # `_eval_if` passes it on unchanged and `_eval_while` stops looping.
         result = None
-        previous_env = self.global_env
-        self.global_env = env
+        previous_env = self._env
+        self._env = env
         try:
             for stmt in block.statements:
                 result = self.evaluate(stmt)
+                if type(result) is ReturnValue:
+                    break
         finally:
-            self.global_env = previous_env
+            self._env = previous_env
         return result
 
+    def _eval_scope(self, block: bangla_ast.Block) -> Any:
+        # A block that declares nothing has no slots and runs in the
+        # enclosing scope: its lookups and assignments would reach that
+        # scope anyway.
+        size = self._resolution.scope(block).size
+        if size:
+            return self._eval_block(block, SlotEnvironment([UNSET] * size, self._env))
+        result = None
+        for stmt in block.statements:
+            result = self.evaluate(stmt)
+            if type(result) is ReturnValue:
+                break
+        return result
+
+    def _lookup(self, node: bangla_ast.Identifier, candidates: tuple[tuple[int, int], ...]) -> Any:
+        # The slots that may hold the name, innermost first; a slot whose
+        # `dhoro` has not run yet is UNSET and passed over.
+        scope = self._env
+        depth = 0
+        for target, slot in candidates:
+            while depth < target:
+                scope = scope.outer
+                depth += 1
+            value = scope.values[slot]
+            if value is not UNSET:
+                return value
+        store = self.global_env.store
+        if node.name in store:
+            return store[node.name]
+        message = f"Chena jai na: '{node.name}' variable nai."
+        if node.line and node.column:
+            message = f"Line {node.line}, Col {node.column}: {message}"
+        raise BanglaRuntimeError(message)
+
+    def _assign(self, name: bangla_ast.Identifier, value: Any) -> None:
+        scope = self._env
+        depth = 0
+        for target, slot in self._resolution.bindings[id(name)]:
+            while depth < target:
+                scope = scope.outer
+                depth += 1
+            if scope.values[slot] is not UNSET:
+                scope.values[slot] = value
+                return
+        self.global_env.assign(name.name, value, name.line, name.column)
+
+    def _declare(self, name: bangla_ast.Identifier, value: Any) -> None:
+        binding = self._resolution.binding(name)
+        if binding:
+            self._env.values[binding[0][1]] = value
+        else:
+            self.global_env.store[name.name] = value
+
+    def _is_poolable(self, body: bangla_ast.Block) -> bool:
+        entry = self._poolable.get(id(body))
+        if entry is None:
+            entry = self._poolable[id(body)] = (body, not defines_functions(body))
+        return entry[1]
+
     def _eval_if(self, stmt: bangla_ast.IfStmt) -> Any:
         condition = self.evaluate(stmt.condition)
         if self._is_truthy(condition):
-            return self._eval_block(stmt.consequence, Environment(self.global_env))
+            return self._eval_scope(stmt.consequence)
         if stmt.alternative is not None:
-            return self._eval_block(stmt.alternative, Environment(self.global_env))
+            return self._eval_scope(stmt.alternative)
         return None
 
     def _eval_while(self, stmt: bangla_ast.WhileStmt) -> Any:
         result = None
-        loop_env = Environment(self.global_env)
+        size = self._resolution.scope(stmt).size
+        if not size:
+            statements = stmt.body.statements
+            while self._is_truthy(self.evaluate(stmt.condition)):
+                for body_stmt in statements:
+                    result = self.evaluate(body_stmt)
+                    if type(result) is ReturnValue:
+                        return result
+            return result
+        # Hidden slots start out UNSET, which `_eval_cached` reads as null.
+        loop_env = SlotEnvironment([UNSET] * size, self._env)
         while self._is_truthy(self.evaluate(stmt.condition)):
             result = self._eval_block(stmt.body, loop_env)
+            if type(result) is ReturnValue:
+                break
         return result
 
+    def _eval_cached(self, node: bangla_ast.CachedExpr) -> Any:
+        # null means "not computed yet"; an expression that really is null is
+        # simply recomputed, which is safe because it is loop-invariant.
+        depth, slot = self._resolution.binding(node.slot)[0]
+        scope = self._env
+        for _ in range(depth):
+            scope = scope.outer
+        value = scope.values[slot]
+        if value is UNSET or value is None:
+            value = scope.values[slot] = self.evaluate(node.expression)
+        return value
+
     def _apply_function(self, function: Any, args: List[Any]) -> Any:
         if not isinstance(function, Function):
             raise BanglaRuntimeError("Function na emon kisu call kora jacche na.")
         if len(args) != len(function.params):
             raise BanglaRuntimeError("Argument shonkha milche na.")
-        env = Environment(function.env)
-        for name, value in zip(function.params, args):
-            env.set(name, value)
+        memo = function.memo
+        if memo is not None:
+            key = memo_key(args)
+            if key is not None:
+                value = memo.get(key)
+                if value is not MISSING:
+                    return value
+                value = self._call_function(function, args)
+                memo.put(key, value)
+                return value
+        return self._call_function(function, args)
+
+    def _call_function(self, function: Function, args: List[Any]) -> Any:
+        size = function.scope_size
+        if size:
+            frames = function.frames
+            env = frames.pop() if frames else SlotEnvironment(function.blank[:], function.env)
+            values = env.values
+            for slot, value in zip(function.param_slots, args):
+                values[slot] = value
+        else:
+            env = function.env
+        previous_resolution = self._resolution
+        self._resolution = function.resolution
         try:
-            return self._eval_block(function.body, env)
-        except ReturnSignal as signal:
-            return signal.value
+            result = self._eval_block(function.body, env)
+        finally:
+            self._resolution = previous_resolution
+        if size and function.poolable:
+            env.values[:] = function.blank
+            frames.append(env)
+        if type(result) is ReturnValue:
+            return result.value
+        return result
 
     def _eval_prefix(self, operator: str, right: Any) -> Any:
         if operator == "-":
@@ -166,8 +540,37 @@ class Interpreter:
             return self._ensure_number(right)
         if operator == "na":
             return not self._is_truthy(right)
+        if operator == "doirgho":
+            if isinstance(right, (BanglaArray, str)):
+                return len(right)
+            raise BanglaRuntimeError("Doirgho shudhu array ba string er hoy.")
         raise BanglaRuntimeError(f"Ojoggo prefix operator '{operator}'.")
 
+    def _eval_index(self, collection: Any, index: Any) -> Any:
+        if not isinstance(collection, (BanglaArray, str)):
+            raise BanglaRuntimeError("Index shudhu array ba string e kora jay.")
+        return collection[self._check_index(collection, index)]
+
+    def _eval_set_index(self, collection: Any, index: Any, value: Any) -> None:
+        if not isinstance(collection, BanglaArray):
+            raise BanglaRuntimeError("Shudhu array er index e rakha jay.")
+        collection[self._check_index(collection, index)] = value
+
+    def _check_index(self, collection: Any, index: Any) -> int:
+        # No negative indexes: `a[-1]` is an error, not the last item.
+        if type(index) is not int:
+            raise BanglaRuntimeError("Index number hote hobe.")
+        if not 0 <= index < len(collection):
+            raise BanglaRuntimeError(f"Index {index} seemar baire: doirgho {len(collection)}.")
+        return index
+
+    def _eval_logical(self, node: bangla_ast.InfixExpr) -> bool:
+        # `ar` / `ba` only evaluate the right operand when it can change the result.
+        left = self._is_truthy(self.evaluate(node.left))
+        if node.operator == "ar":
+            return left and self._is_truthy(self.evaluate(node.right))
+        return left or self._is_truthy(self.evaluate(node.right))
+
     def _eval_infix(self, operator: str, left: Any, right: Any) -> Any:
         if operator in {"+", "-", "*", "/", "%", "**"}:
             return self._eval_math(operator, left, right)
@@ -180,6 +583,11 @@ class Interpreter:
         raise BanglaRuntimeError(f"Ojoggo operator '{operator}'.")
 
     def _eval_math(self, operator: str, left: Any, right: Any) -> Any:
+        if operator == "*" and isinstance(left, BanglaArray) is not isinstance(right, BanglaArray):
+            # `[0] * n`: n copies of the items, the way to make a large array.
+            if isinstance(left, BanglaArray):
+                return left.repeat(self._ensure_number(right))
+            return right.repeat(self._ensure_number(left))
         left_num = self._ensure_number(left)
         right_num = self._ensure_number(right)
         if operator == "+":
@@ -229,7 +637,7 @@ class Interpreter:
             return value
         if isinstance(value, int):
             return value != 0
-        if isinstance(value, str):
+        if isinstance(value, (str, BanglaArray)):
             return len(value) > 0
         return True
 
@@ -238,4 +646,24 @@ class Interpreter:
             return "null"
         if isinstance(value, bool):
             return "sotti" if value else "mittha"
+        if isinstance(value, BanglaArray):
+            return self._stringify_array(value, set())
         return str(value)
+
+    def _stringify_array(self, value: BanglaArray, open_arrays: set[int]) -> str:
+        if value.compact:
+            return f"[{', '.join(map(str, value.items))}]"
+        if id(value) in open_arrays:
+            # An array that holds itself.
+            return "[...]"
+        open_arrays.add(id(value))
+        parts = []
+        for item in value.items:
+            if isinstance(item, BanglaArray):
+                parts.append(self._stringify_array(item, open_arrays))
+            elif isinstance(item, str):
+                parts.append(f'"{item}"')
+            else:
+                parts.append(self._stringify(item))
+        open_arrays.discard(id(value))
+        return f"[{', '.join(parts)}]"
@@ -10,6 +10,7 @@ KEYWORDS = {
     "jokhon": TokenType.JOKHON,
     "function": TokenType.FUNCTION,
     "ferot": TokenType.FEROT,
+    "doirgho": TokenType.DOIRGHO,
     "sotti": TokenType.TRUE,
     "mittha": TokenType.FALSE,
     "ar": TokenType.AND,
@@ -127,6 +127,10 @@ class Lexer:
                 tok = self._make_token(TokenType.LBRACE, "{")
             case "}":
                 tok = self._make_token(TokenType.RBRACE, "}")
+            case "[":
+                tok = self._make_token(TokenType.LBRACKET, "[")
+            case "]":
+                tok = self._make_token(TokenType.RBRACKET, "]")
             case '"':
                 literal = self._read_string()
                 return self._make_token(TokenType.STRING, literal)
@@ -1,45 +1,362 @@
 from __future__ import annotations
 
-import argparse
-from pathlib import Path
+import os
 import sys
+from types import SimpleNamespace
+from typing import TYPE_CHECKING, Collection, Optional, TextIO
 
-from interpreter import BanglaRuntimeError, Interpreter
+from interpreter import ENGINES, MAX_CALL_DEPTH, BanglaRuntimeError, Interpreter
 from lexer import Lexer
+from memo import DEFAULT_MEMO_SIZE
+from output import DEFAULT_BUFFER_SIZE, OutputSink
 from parser import Parser
+from source_file import MappedSource, read_source
 
+if TYPE_CHECKING:
+    from program_cache import ProgramCache
 
-def run_source(source: str) -> int:
-    lexer = Lexer(source)
-    parser = Parser(lexer)
-    program = parser.parse_program()
-    if parser.errors:
-        for err in parser.errors:
-            print(f"Parser error: {err}")
+# Everything else (argparse, the fast lexer, the optimizer, the on-disk
+# cache) is imported only when it is used, because for the short scripts
+# run most often startup is most of the run time.
+
+LEXER_NAMES = ("auto", "fast", "compact", "reference")
+
+# Below these sizes the fixed cost of the fast lexer (compiling its regex)
+# and of the cache (hashing, pickle) is more than the lexing it saves.
+FAST_LEXER_MIN_SIZE = 16 * 1024
+CACHE_MIN_SIZE = 16 * 1024
+
+DEFAULTS = {
+    "engine": "tree",
+    "max_call_depth": MAX_CALL_DEPTH,
+    "optimize": False,
+    "lexer": "auto",
+    "no_cache": False,
+    "cache_dir": None,
+    "output_buffer": None,
+    "stream": False,
+    "profile": False,
+    "flamegraph": None,
+    "memoize": False,
+    "memoize_function": None,
+    "memo_size": DEFAULT_MEMO_SIZE,
+}
+
+
+def make_lexer(name: str, source: str):
+    if name == "auto":
+        name = "fast" if len(source) >= FAST_LEXER_MIN_SIZE else "reference"
+    if name == "reference":
+        return Lexer(source)
+    from fast_lexer import LEXERS
+
+    return LEXERS[name](source)
+
+
+def make_interpreter(
+    engine: str,
+    max_call_depth: int,
+    output_buffer: Optional[int],
+    profile: bool = False,
+    memoize_pure: bool = False,
+    memoize: Collection[str] = (),
+    memo_size: int = DEFAULT_MEMO_SIZE,
+) -> Interpreter:
+    if output_buffer is None:
+        # Like Python's own stdout: line by line on a terminal, in large
+        # chunks into files and pipes.
+        output_buffer = 0 if sys.stdout.isatty() else DEFAULT_BUFFER_SIZE
+    output = OutputSink(buffer_size=output_buffer)
+    if profile:
+        from profiler import ProfilingInterpreter
+
+        return ProfilingInterpreter(max_call_depth, output, memoize_pure, memoize, memo_size)
+    return Interpreter(engine, max_call_depth, output, memoize_pure, memoize, memo_size)
+
+
+def report_profile(
+    interpreter: Interpreter,
+    source: Optional[str],
+    profile: bool,
+    flamegraph: Optional[str],
+) -> None:
+    # The report goes to stderr, so it never mixes with the script's output.
+    if profile:
+        sys.stderr.write(interpreter.profile.report(source))
+    if flamegraph is not None:
+        with open(flamegraph, "w", encoding="utf-8") as stream:
+            interpreter.profile.write_collapsed(stream)
+
+
+def run_source(
+    source: str,
+    engine: str = "tree",
+    max_call_depth: int = MAX_CALL_DEPTH,
+    optimize: bool = False,
+    lexer: str = "auto",
+    path: Optional[str] = None,
+    cache: Optional[ProgramCache] = None,
+    output_buffer: Optional[int] = None,
+    profile: bool = False,
+    flamegraph: Optional[str] = None,
+    memoize_pure: bool = False,
+    memoize: Collection[str] = (),
+    memo_size: int = DEFAULT_MEMO_SIZE,
+) -> int:
+    program = cache.load(path, source, optimize) if cache is not None and path is not None else None
+    if program is None:
+        parser = Parser(make_lexer(lexer, source))
+        program = parser.parse_program()
+        if parser.errors:
+            for err in parser.errors:
+                print(f"Parser error: {err}")
+            return 1
+        if optimize:
+            from optimizer import optimize as optimize_program
+
+            program = optimize_program(program)
+        if cache is not None and path is not None:
+            cache.store(path, source, program, optimize)
+    interpreter = make_interpreter(
+        engine,
+        max_call_depth,
+        output_buffer,
+        profile or flamegraph is not None,
+        memoize_pure,
+        memoize,
+        memo_size,
+    )
+    try:
+        interpreter.run(program)
+    except BanglaRuntimeError as exc:
+        print(f"Runtime error: {exc}")
         return 1
-    interpreter = Interpreter()
+    finally:
+        if profile or flamegraph is not None:
+            report_profile(interpreter, source, profile, flamegraph)
+    return 0
+
+
+def run_stream(
+    stream: TextIO,
+    engine: str = "tree",
+    max_call_depth: int = MAX_CALL_DEPTH,
+    optimize: bool = False,
+    output_buffer: Optional[int] = None,
+    profile: bool = False,
+    flamegraph: Optional[str] = None,
+    memoize_pure: bool = False,
+    memoize: Collection[str] = (),
+    memo_size: int = DEFAULT_MEMO_SIZE,
+) -> int:
+    """Like `run_source`, but runs each top-level statement once it is parsed.
+
+    The source is read from `stream` in chunks, so output starts right away
+    and memory does not grow with the file. Unlike `run_source`, statements
+    before a parser error have already run when it is reported.
+    """
+    from itertools import takewhile
+
+    from fast_lexer import StreamingLexer
+
+    parser = Parser(StreamingLexer(stream))
+    statements = takewhile(lambda stmt: not parser.errors, parser.parse_statements())
+    if optimize:
+        import bangla_ast
+        from optimizer import optimize as optimize_program
+
+        statements = (
+            optimized
+            for stmt in statements
+            for optimized in optimize_program(bangla_ast.Program([stmt])).statements
+        )
+    interpreter = make_interpreter(
+        engine,
+        max_call_depth,
+        output_buffer,
+        profile or flamegraph is not None,
+        memoize_pure,
+        memoize,
+        memo_size,
+    )
     try:
-        interpreter.evaluate(program)
+        interpreter.run_statements(statements)
     except BanglaRuntimeError as exc:
         print(f"Runtime error: {exc}")
         return 1
+    finally:
+        if profile or flamegraph is not None:
+            # The source was never held whole, so the report has no text.
+            report_profile(interpreter, None, profile, flamegraph)
+    if parser.errors:
+        for err in parser.errors:
+            print(f"Parser error: {err}")
+        return 1
     return 0
 
 
-def main(argv: list[str]) -> int:
+def repl(
+    engine: str = "tree",
+    max_call_depth: int = MAX_CALL_DEPTH,
+    optimize: bool = False,
+    stdin: Optional[TextIO] = None,
+) -> int:
+    """Read statements from `stdin` and run them in one warm `Session`.
+
+    Lines are collected until they form complete statements, then run; the
+    value of a closing expression is printed. Definitions stay for later
+    inputs, and an error only drops the input it came from.
+    """
+    import bangla_ast
+    from session import BanglaSyntaxError, Session, is_complete
+
+    stdin = stdin if stdin is not None else sys.stdin
+    interactive = stdin.isatty()
+    session = Session(engine, max_call_depth, optimize, OutputSink(buffer_size=0))
+    interpreter = session.interpreter
+    lines: list[str] = []
+    while True:
+        if interactive:
+            sys.stdout.write("... " if lines else ">>> ")
+            sys.stdout.flush()
+        try:
+            line = stdin.readline()
+        except KeyboardInterrupt:
+            sys.stdout.write("\n")
+            lines = []
+            continue
+        if not line:
+            if interactive:
+                sys.stdout.write("\n")
+            # Whatever is left at the end runs, so its errors are reported.
+            if not "".join(lines).strip():
+                return 0
+        else:
+            lines.append(line)
+            if not is_complete("".join(lines)):
+                continue
+        source = "".join(lines)
+        lines = []
+        try:
+            program = session.parse(source)
+            value = interpreter.run(program)
+        except BanglaSyntaxError as exc:
+            for err in exc.errors:
+                print(f"Parser error: {err}")
+        except BanglaRuntimeError as exc:
+            print(f"Runtime error: {exc}")
+        except KeyboardInterrupt:
+            print("KeyboardInterrupt")
+        else:
+            if value is not None and program.statements and isinstance(program.statements[-1], bangla_ast.ExprStmt):
+                print(interpreter._stringify(value))
+        if not line:
+            return 0
+
+
+def parse_args(argv: list[str]) -> SimpleNamespace:
+    if len(argv) == 1 and not argv[0].startswith("-"):
+        # Plain `python main.py file.bn` needs no argparse.
+        return SimpleNamespace(file=argv[0], **DEFAULTS)
+
+    import argparse
+
     parser = argparse.ArgumentParser(description="Bangla based interpreter (.bn)")
-    parser.add_argument("file", help="Path to .bn file")
-    args = parser.parse_args(argv)
+    parser.set_defaults(**DEFAULTS)
+    parser.add_argument("file", nargs="?", help="Path to .bn file (without one, start a REPL)")
+    parser.add_argument("--engine", choices=ENGINES, help="Execution engine")
+    parser.add_argument("--max-call-depth", type=int, help="Maximum nested function calls for --engine=vm")
+    parser.add_argument("-O", "--optimize", action="store_true", help="Fold constants and drop dead code first")
+    parser.add_argument(
+        "--lexer",
+        choices=LEXER_NAMES,
+        help="Tokenizer (auto: fast for large files; reference: the character-by-character Lexer)",
+    )
+    parser.add_argument("--no-cache", action="store_true", help="Do not read or write __bncache__")
+    parser.add_argument("--cache-dir", help="Keep cached programs here instead of __bncache__")
+    parser.add_argument(
+        "--output-buffer",
+        type=int,
+        metavar="CHARS",
+        help="Hold this much lekho output before writing it (0: every line; default: 0 on a terminal, 64 KB otherwise)",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Read the file in chunks and run each top-level statement as soon as it is parsed",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Time every line and function (on the tree walker) and print a report to stderr",
+    )
+    parser.add_argument(
+        "--flamegraph",
+        metavar="FILE",
+        help="Profile like --profile and write collapsed stacks for flamegraph.pl or speedscope to FILE",
+    )
+    parser.add_argument(
+        "--memoize",
+        action="store_true",
+        help="Cache the results of functions that are provably pure (not with --stream)",
+    )
+    parser.add_argument(
+        "--memoize-function",
+        action="append",
+        metavar="NAME",
+        help="Cache the results of the functions called NAME, pure or not (repeatable)",
+    )
+    parser.add_argument("--memo-size", type=int, metavar="N", help="Results cached per memoized function")
+    return SimpleNamespace(**vars(parser.parse_args(argv)))
+
 
-    path = Path(args.file)
-    if path.suffix != ".bn":
+def main(argv: list[str]) -> int:
+    args = parse_args(argv)
+    if args.file is None:
+        return repl(args.engine, args.max_call_depth, args.optimize)
+    if os.path.splitext(args.file)[1] != ".bn":
         print("Shudhu .bn file chola jabe.")
         return 1
-    if not path.exists():
+    if not os.path.exists(args.file):
         print("File paoa jay nai.")
         return 1
-    return run_source(path.read_text(encoding="utf-8"))
+    if args.stream:
+        with MappedSource(args.file) as stream:
+            return run_stream(
+                stream,
+                args.engine,
+                args.max_call_depth,
+                args.optimize,
+                args.output_buffer,
+                args.profile,
+                args.flamegraph,
+                args.memoize,
+                args.memoize_function or (),
+                args.memo_size,
+            )
+    source = read_source(args.file)
+
+    cache = None
+    if not args.no_cache and len(source) >= CACHE_MIN_SIZE:
+        from program_cache import ProgramCache
+
+        cache = ProgramCache(args.cache_dir)
+    return run_source(
+        source,
+        args.engine,
+        args.max_call_depth,
+        args.optimize,
+        args.lexer,
+        args.file,
+        cache,
+        args.output_buffer,
+        args.profile,
+        args.flamegraph,
+        args.memoize,
+        args.memoize_function or (),
+        args.memo_size,
+    )
 
 
 if __name__ == "__main__":
-    raise SystemExit(main(sys.argv[1:]))
\ No newline at end of file
+    raise SystemExit(main(sys.argv[1:]))
@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from typing import Any, List, NamedTuple, Optional
+
+# Results kept per memoized function before the least recently used go.
+DEFAULT_MEMO_SIZE = 1024
+
+# Argument types a result can be keyed by. Functions are not: they are
+# compared by identity and may hold environments that change.
+KEY_TYPES = (int, str, bool, type(None))
+
+# What `MemoCache.get` returns for arguments it has no result for.
+MISSING = object()
+
+
+def memo_key(args: List[Any]) -> Optional[tuple]:
+    """The cache key for `args`, or None if they cannot be keyed.
+
+    `sotti == 1` in Python, so the key carries the argument types too.
+    """
+    for arg in args:
+        if type(arg) not in KEY_TYPES:
+            return None
+    return (*args, *[type(arg) for arg in args])
+
+
+class MemoStats(NamedTuple):
+    hits: int
+    misses: int
+    size: int
+
+
+class MemoCache:
+    """Results of one function by arguments, dropping the least recently used."""
+
+    __slots__ = ("name", "maxsize", "hits", "misses", "_results")
+
+    def __init__(self, name: str, maxsize: int = DEFAULT_MEMO_SIZE) -> None:
+        self.name = name
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._results: OrderedDict[tuple, Any] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._results)
+
+    def get(self, key: tuple) -> Any:
+        results = self._results
+        if key in results:
+            self.hits += 1
+            results.move_to_end(key)
+            return results[key]
+        self.misses += 1
+        return MISSING
+
+    def put(self, key: tuple, value: Any) -> None:
+        results = self._results
+        results[key] = value
+        if len(results) > self.maxsize:
+            results.popitem(last=False)
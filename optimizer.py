@@ -0,0 +1,315 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Any, List, Optional, Set
+
+import bangla_ast
+from interpreter import Interpreter
+from purity import assigned_names, declares_names, pure_functions, walk
+
+LITERALS = (bangla_ast.IntegerLiteral, bangla_ast.StringLiteral, bangla_ast.BooleanLiteral)
+
+# `2 ** 10000000` is legal but should not be computed while optimizing.
+MAX_FOLDED_EXPONENT = 256
+
+# Hidden loop variables start with a character the lexer never puts in an
+# identifier, so they cannot clash with names in the program.
+HIDDEN_PREFIX = "$inv"
+
+COMPOSITE = (bangla_ast.InfixExpr, bangla_ast.PrefixExpr, bangla_ast.CallExpr)
+
+
+def is_literal(node: Optional[bangla_ast.Node]) -> bool:
+    return isinstance(node, LITERALS)
+
+
+class Optimizer:
+    """AST to AST pass run between `Parser.parse_program` and evaluation.
+
+    Folds operators over literals, drops branches and loops whose condition
+    is a constant, and removes statements that can never run. Anything that
+    would fail at runtime (division by zero, type errors) is left in place so
+    the error is still raised, with the same message, when it executes.
+    """
+
+    def __init__(self) -> None:
+        self._helpers = Interpreter()
+
+    def optimize(self, program: bangla_ast.Program) -> bangla_ast.Program:
+        return bangla_ast.Program(self._statements(program.statements))
+
+    def _statements(self, statements: List[bangla_ast.Node]) -> List[bangla_ast.Node]:
+        result: List[bangla_ast.Node] = []
+        for index, stmt in enumerate(statements):
+            is_last = index == len(statements) - 1
+            replacement = self._statement(stmt, is_last)
+            if not replacement and is_last and result:
+                # A statement list evaluates to its last statement; keep that
+                # value None when the last statement is dropped.
+                replacement = [bangla_ast.Block([])]
+            result.extend(replacement)
+            if result and isinstance(result[-1], bangla_ast.ReturnStmt):
+                break
+        return result
+
+    def _statement(self, node: bangla_ast.Node, is_last: bool) -> List[bangla_ast.Node]:
+        if isinstance(node, bangla_ast.VarDecl):
+            return [bangla_ast.VarDecl(node.name, self._expr(node.value), node.line, node.column)]
+        if isinstance(node, bangla_ast.AssignStmt):
+            return [bangla_ast.AssignStmt(node.name, self._expr(node.value), node.line, node.column)]
+        if isinstance(node, bangla_ast.PrintStmt):
+            return [bangla_ast.PrintStmt(self._expr(node.expression), node.line, node.column)]
+        if isinstance(node, bangla_ast.ExprStmt):
+            expression = self._expr(node.expression)
+            if is_literal(expression) and not is_last:
+                return []
+            return [bangla_ast.ExprStmt(expression, node.line, node.column)]
+        if isinstance(node, bangla_ast.ReturnStmt):
+            return [
+                bangla_ast.ReturnStmt(
+                    self._expr(node.value) if node.value is not None else None,
+                    node.line,
+                    node.column,
+                )
+            ]
+        if isinstance(node, bangla_ast.IndexAssignStmt):
+            return [
+                bangla_ast.IndexAssignStmt(
+                    self._expr(node.collection),
+                    self._expr(node.index),
+                    self._expr(node.value),
+                    node.line,
+                    node.column,
+                )
+            ]
+        if isinstance(node, bangla_ast.Block):
+            return self._block_statement(self._block(node))
+        if isinstance(node, bangla_ast.IfStmt):
+            return self._if(node)
+        if isinstance(node, bangla_ast.WhileStmt):
+            condition = self._expr(node.condition)
+            if is_literal(condition) and not self._helpers._is_truthy(condition.value):
+                return []
+            return [bangla_ast.WhileStmt(condition, self._block(node.body), node.hoisted, node.line, node.column)]
+        if isinstance(node, bangla_ast.FunctionDef):
+            return [bangla_ast.FunctionDef(node.name, node.params, self._block(node.body), node.line, node.column)]
+        return [self._expr(node)]
+
+    def _block(self, block: bangla_ast.Block) -> bangla_ast.Block:
+        return bangla_ast.Block(self._statements(block.statements))
+
+    def _block_statement(self, block: bangla_ast.Block) -> List[bangla_ast.Node]:
+        # A scope nobody declares into is unobservable, so its statements can
+        # run in the enclosing one.
+        if block.statements and not declares_names(block):
+            return list(block.statements)
+        return [block]
+
+    def _if(self, node: bangla_ast.IfStmt) -> List[bangla_ast.Node]:
+        condition = self._expr(node.condition)
+        if not is_literal(condition):
+            alternative = self._block(node.alternative) if node.alternative is not None else None
+            return [
+                bangla_ast.IfStmt(
+                    condition,
+                    self._block(node.consequence),
+                    alternative,
+                    node.line,
+                    node.column,
+                )
+            ]
+        if self._helpers._is_truthy(condition.value):
+            return self._block_statement(self._block(node.consequence))
+        if node.alternative is not None:
+            return self._block_statement(self._block(node.alternative))
+        return []
+
+    def _expr(self, node: Optional[bangla_ast.Node]) -> Any:
+        if isinstance(node, bangla_ast.PrefixExpr):
+            right = self._expr(node.right)
+            if is_literal(right):
+                folded = self._fold(lambda: self._helpers._eval_prefix(node.operator, right.value), right)
+                if folded is not None:
+                    return folded
+            return bangla_ast.PrefixExpr(node.operator, right)
+        if isinstance(node, bangla_ast.InfixExpr):
+            if node.operator == "ar" or node.operator == "ba":
+                return self._logical(node)
+            left = self._expr(node.left)
+            right = self._expr(node.right)
+            if is_literal(left) and is_literal(right) and self._foldable(node.operator, right):
+                folded = self._fold(
+                    lambda: self._helpers._eval_infix(node.operator, left.value, right.value),
+                    left,
+                )
+                if folded is not None:
+                    return folded
+            return bangla_ast.InfixExpr(left, node.operator, right)
+        if isinstance(node, bangla_ast.CallExpr):
+            return bangla_ast.CallExpr(self._expr(node.function), [self._expr(arg) for arg in node.args])
+        if isinstance(node, bangla_ast.ArrayLiteral):
+            return bangla_ast.ArrayLiteral([self._expr(element) for element in node.elements], node.line, node.column)
+        if isinstance(node, bangla_ast.IndexExpr):
+            return bangla_ast.IndexExpr(self._expr(node.collection), self._expr(node.index))
+        return node
+
+    def _logical(self, node: bangla_ast.InfixExpr) -> bangla_ast.Node:
+        is_truthy = self._helpers._is_truthy
+        left = self._expr(node.left)
+        right = self._expr(node.right)
+        if is_literal(left):
+            decided = not is_truthy(left.value) if node.operator == "ar" else is_truthy(left.value)
+            if decided:
+                # The right operand never runs.
+                return bangla_ast.BooleanLiteral(node.operator == "ba", left.line, left.column)
+            if is_literal(right):
+                return bangla_ast.BooleanLiteral(is_truthy(right.value), left.line, left.column)
+        return bangla_ast.InfixExpr(left, node.operator, right)
+
+    def _foldable(self, operator: str, right: bangla_ast.Node) -> bool:
+        if operator != "**":
+            return True
+        return isinstance(right.value, int) and 0 <= right.value <= MAX_FOLDED_EXPONENT
+
+    def _fold(self, compute: Any, origin: bangla_ast.Node) -> Optional[bangla_ast.Node]:
+        try:
+            value = compute()
+        except Exception:
+            # Leave it for the runtime to report.
+            return None
+        if isinstance(value, bool):
+            return bangla_ast.BooleanLiteral(value, origin.line, origin.column)
+        if isinstance(value, int):
+            return bangla_ast.IntegerLiteral(value, origin.line, origin.column)
+        if isinstance(value, str):
+            return bangla_ast.StringLiteral(value, origin.line, origin.column)
+        return None
+
+
+@dataclass
+class _LoopContext:
+    written: Set[str]
+    slots: List[bangla_ast.Identifier] = field(default_factory=list)
+
+
+class LoopInvariantHoister:
+    """Caches loop-invariant subexpressions of `jokhon` bodies.
+
+    An expression is invariant when no name it reads is assigned or declared
+    anywhere in the loop body. Loops that call a function the purity analysis
+    cannot prove pure are left alone, since such a call may assign anything,
+    and so are loops that store into an array, which any name may alias. An
+    array literal is never cached: each evaluation makes a new array.
+    Invariant expressions become `CachedExpr` nodes that compute their value
+    on first use and keep it in a hidden variable of the loop scope, so
+    errors and evaluation order stay as they were when the loop runs zero
+    or more times.
+    """
+
+    def __init__(self, program: bangla_ast.Program) -> None:
+        self.pure = pure_functions(program)
+        self._counter = 0
+
+    def hoist(self, program: bangla_ast.Program) -> bangla_ast.Program:
+        return bangla_ast.Program(self._statements(program.statements, []))
+
+    def _statements(self, statements: List[bangla_ast.Node], loops: List[_LoopContext]) -> List[bangla_ast.Node]:
+        return [self._statement(stmt, loops) for stmt in statements]
+
+    def _block(self, block: bangla_ast.Block, loops: List[_LoopContext]) -> bangla_ast.Block:
+        return bangla_ast.Block(self._statements(block.statements, loops))
+
+    def _statement(self, node: bangla_ast.Node, loops: List[_LoopContext]) -> bangla_ast.Node:
+        if isinstance(node, bangla_ast.VarDecl):
+            return bangla_ast.VarDecl(node.name, self._expr(node.value, loops), node.line, node.column)
+        if isinstance(node, bangla_ast.AssignStmt):
+            return bangla_ast.AssignStmt(node.name, self._expr(node.value, loops), node.line, node.column)
+        if isinstance(node, bangla_ast.PrintStmt):
+            return bangla_ast.PrintStmt(self._expr(node.expression, loops), node.line, node.column)
+        if isinstance(node, bangla_ast.ExprStmt):
+            return bangla_ast.ExprStmt(self._expr(node.expression, loops), node.line, node.column)
+        if isinstance(node, bangla_ast.ReturnStmt):
+            return bangla_ast.ReturnStmt(
+                self._expr(node.value, loops) if node.value is not None else None,
+                node.line,
+                node.column,
+            )
+        if isinstance(node, bangla_ast.IndexAssignStmt):
+            return bangla_ast.IndexAssignStmt(
+                self._expr(node.collection, loops),
+                self._expr(node.index, loops),
+                self._expr(node.value, loops),
+                node.line,
+                node.column,
+            )
+        if isinstance(node, bangla_ast.Block):
+            return self._block(node, loops)
+        if isinstance(node, bangla_ast.IfStmt):
+            alternative = self._block(node.alternative, loops) if node.alternative is not None else None
+            return bangla_ast.IfStmt(
+                self._expr(node.condition, loops),
+                self._block(node.consequence, loops),
+                alternative,
+                node.line,
+                node.column,
+            )
+        if isinstance(node, bangla_ast.WhileStmt):
+            return self._while(node, loops)
+        if isinstance(node, bangla_ast.FunctionDef):
+            # A function body runs in its own scope, not the loop's.
+            return bangla_ast.FunctionDef(node.name, node.params, self._block(node.body, []), node.line, node.column)
+        return self._expr(node, loops)
+
+    def _while(self, node: bangla_ast.WhileStmt, loops: List[_LoopContext]) -> bangla_ast.WhileStmt:
+        # The condition runs in the enclosing scope, so only enclosing loops
+        # may cache parts of it.
+        condition = self._expr(node.condition, loops)
+        if not self._only_pure_calls(node):
+            return bangla_ast.WhileStmt(condition, self._block(node.body, loops), node.hoisted, node.line, node.column)
+        context = _LoopContext(assigned_names(node.body))
+        body = self._block(node.body, loops + [context])
+        return bangla_ast.WhileStmt(condition, body, list(node.hoisted) + context.slots, node.line, node.column)
+
+    def _only_pure_calls(self, node: bangla_ast.WhileStmt) -> bool:
+        written = assigned_names(node.body)
+        for child in walk([node.condition, node.body]):
+            if isinstance(child, bangla_ast.IndexAssignStmt):
+                return False
+            if isinstance(child, bangla_ast.CallExpr):
+                callee = child.function
+                if not isinstance(callee, bangla_ast.Identifier):
+                    return False
+                if callee.name not in self.pure or callee.name in written:
+                    return False
+        return True
+
+    def _expr(self, node: Optional[bangla_ast.Node], loops: List[_LoopContext]) -> Any:
+        if not loops or not isinstance(node, COMPOSITE):
+            return node
+        # Outer loops first: an expression invariant there is invariant in
+        # every loop nested inside, and is recomputed less often.
+        children = list(walk(node))
+        reads = {child.name for child in children if isinstance(child, bangla_ast.Identifier)}
+        makes_array = any(isinstance(child, bangla_ast.ArrayLiteral) for child in children)
+        for context in loops:
+            if not makes_array and not reads & context.written:
+                return self._cache(node, context)
+        if isinstance(node, bangla_ast.InfixExpr):
+            return bangla_ast.InfixExpr(self._expr(node.left, loops), node.operator, self._expr(node.right, loops))
+        if isinstance(node, bangla_ast.PrefixExpr):
+            return bangla_ast.PrefixExpr(node.operator, self._expr(node.right, loops))
+        return bangla_ast.CallExpr(
+            self._expr(node.function, loops),
+            [self._expr(arg, loops) for arg in node.args],
+        )
+
+    def _cache(self, node: bangla_ast.Node, context: _LoopContext) -> bangla_ast.CachedExpr:
+        slot = bangla_ast.Identifier(f"{HIDDEN_PREFIX}{self._counter}")
+        self._counter += 1
+        context.slots.append(slot)
+        return bangla_ast.CachedExpr(slot, node)
+
+
+def optimize(program: bangla_ast.Program) -> bangla_ast.Program:
+    program = Optimizer().optimize(program)
+    return LoopInvariantHoister(program).hoist(program)
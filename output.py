@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+import sys
+from typing import List, Optional, TextIO
+
+# Characters of `lekho` output held before they are written out.
+DEFAULT_BUFFER_SIZE = 64 * 1024
+
+
+class OutputSink:
+    """Where `lekho` lines go, written in large chunks.
+
+    Lines are collected until `buffer_size` characters are pending and then
+    written to `stream` in one call; `flush` writes the rest. `Interpreter.run`
+    flushes when the program ends, including when it ends with an error, so
+    everything printed before the error is out before the error is reported.
+    A `buffer_size` of 0 writes and flushes every line, for interactive use.
+
+    `stream` is any text stream: a file, a pipe or an `io.StringIO`. Without
+    one, lines go to whatever `sys.stdout` is when they are written.
+    """
+
+    def __init__(self, stream: Optional[TextIO] = None, buffer_size: int = DEFAULT_BUFFER_SIZE) -> None:
+        self.stream = stream
+        self.buffer_size = buffer_size
+        self._pending: List[str] = []
+        self._size = 0
+
+    def write_line(self, text: str) -> None:
+        self._pending.append(text)
+        self._size += len(text) + 1
+        if self._size > self.buffer_size:
+            self.flush()
+
+    def flush(self) -> None:
+        stream = self.stream if self.stream is not None else sys.stdout
+        if self._pending:
+            pending = self._pending
+            self._pending = []
+            self._size = 0
+            pending.append("")
+            stream.write("\n".join(pending))
+        stream.flush()
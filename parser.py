@@ -1,7 +1,8 @@
 from __future__ import annotations
 
 from enum import IntEnum
-from typing import Callable, List, Optional
+import sys
+from typing import Callable, Iterator, List, Optional
 
 import bangla_ast
 from lexer import Lexer
@@ -19,6 +20,7 @@ class Precedence(IntEnum):
     POWER = 7
     PREFIX = 8
     CALL = 9
+    INDEX = 10
 
 
 PRECEDENCES = {
@@ -37,46 +39,21 @@ PRECEDENCES = {
     TokenType.MODULUS: Precedence.PRODUCT,
     TokenType.POW: Precedence.POWER,
     TokenType.LPAREN: Precedence.CALL,
+    TokenType.LBRACKET: Precedence.INDEX,
 }
 
 
 class Parser:
+    # Dispatch tables shared by all parsers, filled in below the class.
+    prefix_parse_fns: dict[TokenType, Callable[[Parser], bangla_ast.Node]]
+    infix_parse_fns: dict[TokenType, Callable[[Parser, bangla_ast.Node], bangla_ast.Node]]
+
     def __init__(self, lexer: Lexer) -> None:
         self.lexer = lexer
         self.errors: List[str] = []
         self.cur_token: Token = self.lexer.next_token()
         self.peek_token: Token = self.lexer.next_token()
 
-        self.prefix_parse_fns: dict[TokenType, Callable[[], bangla_ast.Node]] = {
-            TokenType.IDENT: self._parse_identifier,
-            TokenType.INT: self._parse_integer_literal,
-            TokenType.STRING: self._parse_string_literal,
-            TokenType.TRUE: self._parse_boolean_literal,
-            TokenType.FALSE: self._parse_boolean_literal,
-            TokenType.MINUS: self._parse_prefix_expression,
-            TokenType.PLUS: self._parse_prefix_expression,
-            TokenType.NOT: self._parse_prefix_expression,
-            TokenType.LPAREN: self._parse_grouped_expression,
-        }
-
-        self.infix_parse_fns: dict[TokenType, Callable[[bangla_ast.Node], bangla_ast.Node]] = {
-            TokenType.PLUS: self._parse_infix_expression,
-            TokenType.MINUS: self._parse_infix_expression,
-            TokenType.ASTERISK: self._parse_infix_expression,
-            TokenType.SLASH: self._parse_infix_expression,
-            TokenType.MODULUS: self._parse_infix_expression,
-            TokenType.POW: self._parse_infix_expression,
-            TokenType.EQ: self._parse_infix_expression,
-            TokenType.NEQ: self._parse_infix_expression,
-            TokenType.LT: self._parse_infix_expression,
-            TokenType.GT: self._parse_infix_expression,
-            TokenType.LE: self._parse_infix_expression,
-            TokenType.GE: self._parse_infix_expression,
-            TokenType.AND: self._parse_infix_expression,
-            TokenType.OR: self._parse_infix_expression,
-            TokenType.LPAREN: self._parse_call_expression,
-        }
-
     def _next_token(self) -> None:
         self.cur_token = self.peek_token
         self.peek_token = self.lexer.next_token()
@@ -102,13 +79,21 @@ class Parser:
         self.errors.append(message)
 
     def parse_program(self) -> bangla_ast.Program:
-        statements: List[bangla_ast.Node] = []
+        return bangla_ast.Program(list(self.parse_statements()))
+
+    def parse_statements(self) -> Iterator[bangla_ast.Node]:
+        """Top-level statements one at a time, as soon as each is parsed.
+
+        With a `StreamingLexer` only the statement being parsed is held, so a
+        caller that runs each statement as it comes can start before the rest
+        of the source has been read. Errors are appended to `errors` as they
+        are found.
+        """
         while self.cur_token.type != TokenType.EOF:
             stmt = self._parse_statement()
             if stmt is not None:
-                statements.append(stmt)
+                yield stmt
             self._next_token()
-        return bangla_ast.Program(statements)
 
     def _parse_statement(self) -> Optional[bangla_ast.Node]:
         if self._cur_token_is(TokenType.IDENT) and self._peek_token_is(TokenType.ASSIGN):
@@ -132,46 +117,51 @@ class Parser:
                 return self._parse_expression_statement()
 
     def _parse_assign_stmt(self) -> Optional[bangla_ast.AssignStmt]:
-        name = bangla_ast.Identifier(self.cur_token.literal, self.cur_token.line, self.cur_token.column)
+        line, column = self.cur_token.line, self.cur_token.column
+        name = self._parse_identifier()
         if not self._expect_peek(TokenType.ASSIGN):
             return None
         self._next_token()
         value = self._parse_expression(Precedence.LOWEST)
         if self._peek_token_is(TokenType.SEMICOLON):
             self._next_token()
-        return bangla_ast.AssignStmt(name, value)
+        return bangla_ast.AssignStmt(name, value, line, column)
 
     def _parse_var_decl(self) -> Optional[bangla_ast.VarDecl]:
+        line, column = self.cur_token.line, self.cur_token.column
         if not self._expect_peek(TokenType.IDENT):
             return None
-        name = bangla_ast.Identifier(self.cur_token.literal, self.cur_token.line, self.cur_token.column)
+        name = self._parse_identifier()
         if not self._expect_peek(TokenType.ASSIGN):
             return None
         self._next_token()
         value = self._parse_expression(Precedence.LOWEST)
         if self._peek_token_is(TokenType.SEMICOLON):
             self._next_token()
-        return bangla_ast.VarDecl(name, value)
+        return bangla_ast.VarDecl(name, value, line, column)
 
     def _parse_print_stmt(self) -> Optional[bangla_ast.PrintStmt]:
+        line, column = self.cur_token.line, self.cur_token.column
         self._next_token()
         expression = self._parse_expression(Precedence.LOWEST)
         if self._peek_token_is(TokenType.SEMICOLON):
             self._next_token()
-        return bangla_ast.PrintStmt(expression)
+        return bangla_ast.PrintStmt(expression, line, column)
 
     def _parse_return_stmt(self) -> Optional[bangla_ast.ReturnStmt]:
+        line, column = self.cur_token.line, self.cur_token.column
         if self._peek_token_is(TokenType.SEMICOLON) or self._peek_token_is(TokenType.RBRACE):
             if self._peek_token_is(TokenType.SEMICOLON):
                 self._next_token()
-            return bangla_ast.ReturnStmt(None)
+            return bangla_ast.ReturnStmt(None, line, column)
         self._next_token()
         value = self._parse_expression(Precedence.LOWEST)
         if self._peek_token_is(TokenType.SEMICOLON):
             self._next_token()
-        return bangla_ast.ReturnStmt(value)
+        return bangla_ast.ReturnStmt(value, line, column)
 
     def _parse_if_stmt(self) -> Optional[bangla_ast.IfStmt]:
+        line, column = self.cur_token.line, self.cur_token.column
         self._next_token()
         condition = self._parse_expression(Precedence.LOWEST)
         if not self._expect_peek(TokenType.LBRACE):
@@ -183,27 +173,29 @@ class Parser:
             if not self._expect_peek(TokenType.LBRACE):
                 return None
             alternative = self._parse_block_statement()
-        return bangla_ast.IfStmt(condition, consequence, alternative)
+        return bangla_ast.IfStmt(condition, consequence, alternative, line, column)
 
     def _parse_while_stmt(self) -> Optional[bangla_ast.WhileStmt]:
+        line, column = self.cur_token.line, self.cur_token.column
         self._next_token()
         condition = self._parse_expression(Precedence.LOWEST)
         if not self._expect_peek(TokenType.LBRACE):
             return None
         body = self._parse_block_statement()
-        return bangla_ast.WhileStmt(condition, body)
+        return bangla_ast.WhileStmt(condition, body, [], line, column)
 
     def _parse_function_def(self) -> Optional[bangla_ast.FunctionDef]:
+        line, column = self.cur_token.line, self.cur_token.column
         if not self._expect_peek(TokenType.IDENT):
             return None
-        name = bangla_ast.Identifier(self.cur_token.literal, self.cur_token.line, self.cur_token.column)
+        name = self._parse_identifier()
         if not self._expect_peek(TokenType.LPAREN):
             return None
         params = self._parse_function_params()
         if not self._expect_peek(TokenType.LBRACE):
             return None
         body = self._parse_block_statement()
-        return bangla_ast.FunctionDef(name, params, body)
+        return bangla_ast.FunctionDef(name, params, body, line, column)
 
     def _parse_function_params(self) -> List[bangla_ast.Identifier]:
         params: List[bangla_ast.Identifier] = []
@@ -211,11 +203,11 @@ class Parser:
             self._next_token()
             return params
         self._next_token()
-        params.append(bangla_ast.Identifier(self.cur_token.literal, self.cur_token.line, self.cur_token.column))
+        params.append(self._parse_identifier())
         while self._peek_token_is(TokenType.COMMA):
             self._next_token()
             self._next_token()
-            params.append(bangla_ast.Identifier(self.cur_token.literal, self.cur_token.line, self.cur_token.column))
+            params.append(self._parse_identifier())
         if not self._expect_peek(TokenType.RPAREN):
             return []
         return params
@@ -230,13 +222,31 @@ class Parser:
             self._next_token()
         return bangla_ast.Block(statements)
 
-    def _parse_expression_statement(self) -> Optional[bangla_ast.ExprStmt]:
+    def _parse_expression_statement(self) -> Optional[bangla_ast.Node]:
+        line, column = self.cur_token.line, self.cur_token.column
         expression = self._parse_expression(Precedence.LOWEST)
+        if isinstance(expression, bangla_ast.IndexExpr) and self._peek_token_is(TokenType.ASSIGN):
+            return self._parse_index_assign(expression, line, column)
         if self._peek_token_is(TokenType.SEMICOLON):
             self._next_token()
         if expression is None:
             return None
-        return bangla_ast.ExprStmt(expression)
+        return bangla_ast.ExprStmt(expression, line, column)
+
+    def _parse_index_assign(
+        self,
+        target: bangla_ast.IndexExpr,
+        line: int,
+        column: int,
+    ) -> Optional[bangla_ast.IndexAssignStmt]:
+        self._next_token()
+        self._next_token()
+        value = self._parse_expression(Precedence.LOWEST)
+        if self._peek_token_is(TokenType.SEMICOLON):
+            self._next_token()
+        if value is None:
+            return None
+        return bangla_ast.IndexAssignStmt(target.collection, target.index, value, line, column)
 
     def _parse_expression(self, precedence: Precedence) -> Optional[bangla_ast.Node]:
         prefix = self.prefix_parse_fns.get(self.cur_token.type)
@@ -246,18 +256,20 @@ class Parser:
                 f"expression start korar jonno thik token pai nai ({self.cur_token.type.value})."
             )
             return None
-        left_expr = prefix()
+        left_expr = prefix(self)
 
         while not self._peek_token_is(TokenType.SEMICOLON) and precedence < self._peek_precedence():
             infix = self.infix_parse_fns.get(self.peek_token.type)
             if infix is None:
                 return left_expr
             self._next_token()
-            left_expr = infix(left_expr)
+            left_expr = infix(self, left_expr)
         return left_expr
 
     def _parse_identifier(self) -> bangla_ast.Identifier:
-        return bangla_ast.Identifier(self.cur_token.literal, self.cur_token.line, self.cur_token.column)
+        # Interned, so every use of a name shares one string.
+        token = self.cur_token
+        return bangla_ast.Identifier(sys.intern(token.literal), token.line, token.column)
 
     def _parse_integer_literal(self) -> bangla_ast.IntegerLiteral:
         return bangla_ast.IntegerLiteral(int(self.cur_token.literal), self.cur_token.line, self.cur_token.column)
@@ -294,6 +306,18 @@ class Parser:
         right = self._parse_expression(precedence)
         return bangla_ast.InfixExpr(left, operator, right)
 
+    def _parse_array_literal(self) -> bangla_ast.ArrayLiteral:
+        line, column = self.cur_token.line, self.cur_token.column
+        elements = self._parse_expression_list(TokenType.RBRACKET)
+        return bangla_ast.ArrayLiteral(elements, line, column)
+
+    def _parse_index_expression(self, collection: bangla_ast.Node) -> Optional[bangla_ast.IndexExpr]:
+        self._next_token()
+        index = self._parse_expression(Precedence.LOWEST)
+        if not self._expect_peek(TokenType.RBRACKET):
+            return None
+        return bangla_ast.IndexExpr(collection, index)
+
     def _parse_call_expression(self, function: bangla_ast.Node) -> bangla_ast.CallExpr:
         args = self._parse_expression_list(TokenType.RPAREN)
         return bangla_ast.CallExpr(function, args)
@@ -318,3 +342,38 @@ class Parser:
 
     def _cur_precedence(self) -> Precedence:
         return PRECEDENCES.get(self.cur_token.type, Precedence.LOWEST)
+
+
+# Shared by every `Parser`; the functions take the parser as first argument.
+Parser.prefix_parse_fns = {
+    TokenType.IDENT: Parser._parse_identifier,
+    TokenType.INT: Parser._parse_integer_literal,
+    TokenType.STRING: Parser._parse_string_literal,
+    TokenType.TRUE: Parser._parse_boolean_literal,
+    TokenType.FALSE: Parser._parse_boolean_literal,
+    TokenType.MINUS: Parser._parse_prefix_expression,
+    TokenType.PLUS: Parser._parse_prefix_expression,
+    TokenType.NOT: Parser._parse_prefix_expression,
+    TokenType.DOIRGHO: Parser._parse_prefix_expression,
+    TokenType.LPAREN: Parser._parse_grouped_expression,
+    TokenType.LBRACKET: Parser._parse_array_literal,
+}
+
+Parser.infix_parse_fns = {
+    TokenType.PLUS: Parser._parse_infix_expression,
+    TokenType.MINUS: Parser._parse_infix_expression,
+    TokenType.ASTERISK: Parser._parse_infix_expression,
+    TokenType.SLASH: Parser._parse_infix_expression,
+    TokenType.MODULUS: Parser._parse_infix_expression,
+    TokenType.POW: Parser._parse_infix_expression,
+    TokenType.EQ: Parser._parse_infix_expression,
+    TokenType.NEQ: Parser._parse_infix_expression,
+    TokenType.LT: Parser._parse_infix_expression,
+    TokenType.GT: Parser._parse_infix_expression,
+    TokenType.LE: Parser._parse_infix_expression,
+    TokenType.GE: Parser._parse_infix_expression,
+    TokenType.AND: Parser._parse_infix_expression,
+    TokenType.OR: Parser._parse_infix_expression,
+    TokenType.LPAREN: Parser._parse_call_expression,
+    TokenType.LBRACKET: Parser._parse_index_expression,
+}
@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+from collections import Counter
+from dataclasses import dataclass, field
+from time import perf_counter
+from typing import Any, Collection, List, Optional, TextIO
+
+import bangla_ast
+from interpreter import MAX_CALL_DEPTH, Function, Interpreter
+from memo import DEFAULT_MEMO_SIZE
+from output import OutputSink
+
+STATEMENTS = (
+    bangla_ast.VarDecl,
+    bangla_ast.AssignStmt,
+    bangla_ast.PrintStmt,
+    bangla_ast.ExprStmt,
+    bangla_ast.IfStmt,
+    bangla_ast.WhileStmt,
+    bangla_ast.FunctionDef,
+    bangla_ast.ReturnStmt,
+    bangla_ast.IndexAssignStmt,
+)
+
+# The frame at the bottom of every stack: code outside any function.
+PROGRAM_FRAME = "<program>"
+
+
+@dataclass(slots=True)
+class Timing:
+    """How often something ran and how long it took, in seconds.
+
+    `total` includes everything it called and counts a recursive call only
+    once, at its outermost level; `own` leaves out nested statements and
+    calls, so the `own` times of all lines add up to the whole run.
+    """
+
+    count: int = 0
+    total: float = 0.0
+    own: float = 0.0
+
+
+@dataclass
+class Profile:
+    """Per-line and per-function timings of a run, and its call stacks."""
+
+    lines: dict[int, Timing] = field(default_factory=dict)
+    functions: dict[str, Timing] = field(default_factory=dict)
+    # ";"-joined stacks of function frames ending in a "line N" frame, and
+    # the own time spent there.
+    stacks: Counter[str] = field(default_factory=Counter)
+
+    def report(self, source: Optional[str] = None, limit: int = 20) -> str:
+        """The `limit` slowest lines and functions by own time, as text."""
+        source_lines = source.splitlines() if source is not None else []
+        rows = [
+            f"{'line':>6} {'hits':>10} {'total ms':>11} {'own ms':>11}  source",
+        ]
+        for line, timing in self._slowest(self.lines, limit):
+            text = source_lines[line - 1].strip() if 0 < line <= len(source_lines) else ""
+            rows.append(f"{line:>6} {timing.count:>10} {timing.total * 1000:>11.2f} {timing.own * 1000:>11.2f}  {text}")
+        rows.append("")
+        rows.append(f"{'function':<20} {'calls':>10} {'total ms':>11} {'own ms':>11}")
+        for name, timing in self._slowest(self.functions, limit):
+            rows.append(f"{name:<20} {timing.count:>10} {timing.total * 1000:>11.2f} {timing.own * 1000:>11.2f}")
+        return "\n".join(rows) + "\n"
+
+    def write_collapsed(self, stream: TextIO) -> None:
+        """Write the stacks in the collapsed format `flamegraph.pl` and
+        speedscope read: one "frame;frame;frame microseconds" per line."""
+        for stack, seconds in sorted(self.stacks.items()):
+            microseconds = round(seconds * 1_000_000)
+            if microseconds:
+                stream.write(f"{stack} {microseconds}\n")
+
+    def _slowest(self, timings: dict, limit: int) -> List[tuple[Any, Timing]]:
+        return sorted(timings.items(), key=lambda item: item[1].own, reverse=True)[:limit]
+
+
+class ProfilingInterpreter(Interpreter):
+    """`Interpreter` that times every statement and function call.
+
+    After `run`, `profile` holds the timings of everything run so far. It
+    always walks the tree, whatever engine would otherwise run the program:
+    the other engines compile statements away, and the tree walker's own
+    times are the closest to what each line costs. `Interpreter` itself has
+    no profiling hooks, so runs that are not profiled pay nothing for this.
+    """
+
+    def __init__(
+        self,
+        max_call_depth: int = MAX_CALL_DEPTH,
+        output: Optional[OutputSink] = None,
+        memoize_pure: bool = False,
+        memoize: Collection[str] = (),
+        memo_size: int = DEFAULT_MEMO_SIZE,
+    ) -> None:
+        super().__init__("tree", max_call_depth, output, memoize_pure, memoize, memo_size)
+        self.profile = Profile()
+        # Time spent in nested statements (and calls) of each running
+        # statement (and call), innermost last.
+        self._nested: List[float] = [0.0]
+        self._calls: List[float] = [0.0]
+        # The ";"-joined stack of function frames, for each running call.
+        self._stacks: List[str] = [PROGRAM_FRAME]
+        self._running_lines: Counter[int] = Counter()
+        self._running_functions: Counter[str] = Counter()
+
+    def evaluate(self, node: bangla_ast.Node) -> Any:
+        if not isinstance(node, STATEMENTS):
+            return super().evaluate(node)
+        line = node.line
+        nested = self._nested
+        running = self._running_lines
+        running[line] += 1
+        nested.append(0.0)
+        start = perf_counter()
+        try:
+            return super().evaluate(node)
+        finally:
+            elapsed = perf_counter() - start
+            own = elapsed - nested.pop()
+            nested[-1] += elapsed
+            running[line] -= 1
+            timing = self.profile.lines.get(line)
+            if timing is None:
+                timing = self.profile.lines[line] = Timing()
+            timing.count += 1
+            timing.own += own
+            if not running[line]:
+                timing.total += elapsed
+            self.profile.stacks[f"{self._stacks[-1]};line {line}"] += own
+
+    def _apply_function(self, function: Any, args: List[Any]) -> Any:
+        if not isinstance(function, Function):
+            return super()._apply_function(function, args)
+        name = function.name
+        calls = self._calls
+        running = self._running_functions
+        running[name] += 1
+        calls.append(0.0)
+        self._stacks.append(f"{self._stacks[-1]};{name}")
+        start = perf_counter()
+        try:
+            return super()._apply_function(function, args)
+        finally:
+            elapsed = perf_counter() - start
+            own = elapsed - calls.pop()
+            calls[-1] += elapsed
+            self._stacks.pop()
+            running[name] -= 1
+            timing = self.profile.functions.get(name)
+            if timing is None:
+                timing = self.profile.functions[name] = Timing()
+            timing.count += 1
+            timing.own += own
+            if not running[name]:
+                timing.total += elapsed
+
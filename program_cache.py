@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+from functools import lru_cache
+import glob
+import hashlib
+import os
+from pathlib import Path
+import pickle
+import sys
+import tempfile
+from typing import Optional
+
+import bangla_ast
+
+CACHE_DIRNAME = "__bncache__"
+SUFFIX = ".bnc"
+KEY_LENGTH = 20
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+
+# A cached program is only valid for the code that produced it, so the
+# version is a digest of the modules that define tokens, parsing, the AST
+# and the optimizer, plus the Python version whose pickle format is used.
+VERSIONED_MODULES = (
+    "bangla_ast.py",
+    "bangla_token.py",
+    "fast_lexer.py",
+    "keywords.py",
+    "lexer.py",
+    "optimizer.py",
+    "parser.py",
+    "program_cache.py",
+    "purity.py",
+)
+
+
+@lru_cache(maxsize=None)
+def interpreter_version() -> str:
+    digest = hashlib.sha256(f"{sys.version_info[0]}.{sys.version_info[1]}".encode())
+    root = Path(__file__).resolve().parent
+    for name in VERSIONED_MODULES:
+        digest.update(name.encode())
+        digest.update((root / name).read_bytes())
+    return digest.hexdigest()
+
+
+class ProgramCache:
+    """Parsed programs kept on disk, like `__pycache__` for `.bn` files.
+
+    An entry is keyed by a hash of the source, the options it was built
+    with and `interpreter_version()`. It lives in `__bncache__` next to the
+    script unless a `directory` is given. Storing a new entry for a script
+    removes its stale ones, and the least recently used entries are evicted
+    once the directory holds more than `max_bytes`. The cache is best
+    effort: unreadable or unwritable entries count as misses.
+
+    Entries are pickles and are trusted like `__pycache__` files; do not
+    point `directory` somewhere others can write.
+    """
+
+    def __init__(self, directory: Optional[Path] = None, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        self.directory = Path(directory) if directory is not None else None
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def load(self, path: Path, source: str, optimize: bool = False) -> Optional[bangla_ast.Program]:
+        key = self._key(source, optimize)
+        entry = self._entry(path, key, optimize)
+        try:
+            with entry.open("rb") as handle:
+                stored_key, program = pickle.load(handle)
+        except FileNotFoundError:
+            program = None
+        except Exception:
+            self._remove(entry)
+            program = None
+        else:
+            if stored_key != key or not isinstance(program, bangla_ast.Program):
+                self._remove(entry)
+                program = None
+        if program is None:
+            self.misses += 1
+            return None
+        try:
+            # Eviction drops the least recently used entries first.
+            os.utime(entry)
+        except OSError:
+            pass
+        self.hits += 1
+        return program
+
+    def store(self, path: Path, source: str, program: bangla_ast.Program, optimize: bool = False) -> None:
+        key = self._key(source, optimize)
+        entry = self._entry(path, key, optimize)
+        try:
+            data = pickle.dumps((key, program), pickle.HIGHEST_PROTOCOL)
+        except Exception:
+            # Very deep programs exceed the pickler's recursion limit.
+            return
+        try:
+            entry.parent.mkdir(parents=True, exist_ok=True)
+            # Write then rename, so a concurrent reader never sees half a file.
+            handle, temporary = tempfile.mkstemp(dir=entry.parent, suffix=".tmp")
+        except OSError:
+            return
+        try:
+            with os.fdopen(handle, "wb") as output:
+                output.write(data)
+            os.replace(temporary, entry)
+        except OSError:
+            self._remove(Path(temporary))
+            return
+        pattern = f"{glob.escape(self._stem(path, optimize))}.{'[0-9a-f]' * KEY_LENGTH}{SUFFIX}"
+        for stale in entry.parent.glob(pattern):
+            if stale != entry:
+                self._remove(stale)
+        self._evict(entry.parent)
+
+    def _key(self, source: str, optimize: bool) -> str:
+        digest = hashlib.sha256(interpreter_version().encode())
+        digest.update(b"O" if optimize else b"-")
+        digest.update(source.encode("utf-8", "surrogatepass"))
+        return digest.hexdigest()
+
+    def _stem(self, path: Path, optimize: bool) -> str:
+        # A shared cache directory holds scripts from many places, so the
+        # entry name carries a hash of the script's full path.
+        path = Path(path).resolve()
+        stem = path.stem
+        if self.directory is not None:
+            stem = f"{stem}-{hashlib.sha256(str(path).encode()).hexdigest()[:12]}"
+        return f"{stem}.opt" if optimize else stem
+
+    def _entry(self, path: Path, key: str, optimize: bool) -> Path:
+        directory = self.directory if self.directory is not None else Path(path).resolve().parent / CACHE_DIRNAME
+        return directory / f"{self._stem(path, optimize)}.{key[:KEY_LENGTH]}{SUFFIX}"
+
+    def _evict(self, directory: Path) -> None:
+        entries = []
+        for entry in directory.glob(f"*{SUFFIX}"):
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry))
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            self._remove(entry)
+            total -= size
+
+    def _remove(self, entry: Path) -> None:
+        try:
+            entry.unlink()
+        except OSError:
+            pass
@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+from dataclasses import fields
+from typing import Iterator, List, Set
+
+import bangla_ast
+
+
+def walk(node: object) -> Iterator[bangla_ast.Node]:
+    """Yield `node` and every AST node below it, depth first."""
+    if isinstance(node, list):
+        for item in node:
+            yield from walk(item)
+        return
+    if not isinstance(node, bangla_ast.Node):
+        return
+    yield node
+    for node_field in fields(node):
+        value = getattr(node, node_field.name)
+        if isinstance(value, (bangla_ast.Node, list)):
+            yield from walk(value)
+
+
+def assigned_names(node: object) -> Set[str]:
+    """Names a piece of code may write: `x = ...`, `dhoro x`, `function x`."""
+    names: Set[str] = set()
+    for child in walk(node):
+        if isinstance(child, (bangla_ast.AssignStmt, bangla_ast.VarDecl, bangla_ast.FunctionDef)):
+            names.add(child.name.name)
+    return names
+
+
+def declares_names(block: bangla_ast.Block) -> bool:
+    """Whether `block` itself declares a name (`dhoro x`, `function x`).
+
+    Declarations in blocks nested inside it go to their own scopes.
+    """
+    return any(isinstance(stmt, (bangla_ast.VarDecl, bangla_ast.FunctionDef)) for stmt in block.statements)
+
+
+def defines_functions(node: object) -> bool:
+    """Whether a `function` is defined anywhere in `node`."""
+    return any(isinstance(child, bangla_ast.FunctionDef) for child in walk(node))
+
+
+class PurityAnalyzer:
+    """Finds top-level functions that are pure functions of their arguments.
+
+    A function is pure when its body has no `lekho`, defines no nested
+    functions, makes or stores into no arrays, only reads and writes its own
+    parameters and locals, and only calls pure functions (itself included).
+    Its name must also be bound exactly once in the whole program, so a call
+    by that name always reaches the analysed body. Anything the analysis
+    cannot prove is treated as impure.
+    """
+
+    def __init__(self, program: bangla_ast.Program) -> None:
+        self.program = program
+
+    def pure_functions(self) -> Set[str]:
+        top_level = [stmt for stmt in self.program.statements if isinstance(stmt, bangla_ast.FunctionDef)]
+        bindings: dict[str, int] = {}
+        for node in walk(self.program.statements):
+            if isinstance(node, (bangla_ast.AssignStmt, bangla_ast.VarDecl, bangla_ast.FunctionDef)):
+                bindings[node.name.name] = bindings.get(node.name.name, 0) + 1
+        global_names = {
+            stmt.name.name
+            for stmt in self.program.statements
+            if isinstance(stmt, (bangla_ast.VarDecl, bangla_ast.FunctionDef))
+        }
+
+        candidates = {fn.name.name: fn for fn in top_level if bindings.get(fn.name.name) == 1}
+        pure = set(candidates)
+        changed = True
+        while changed:
+            changed = False
+            for name in sorted(pure):
+                if not self._is_pure(candidates[name], pure, global_names):
+                    pure.discard(name)
+                    changed = True
+        return pure
+
+    def _is_pure(self, function: bangla_ast.FunctionDef, pure: Set[str], global_names: Set[str]) -> bool:
+        params = {param.name for param in function.params}
+        body: List[bangla_ast.Node] = function.body.statements
+        # A local that shares a global's name may still reach the global
+        # before its `dhoro` runs, so only unshadowed locals count as private.
+        locals_ = {
+            node.name.name for node in walk(body) if isinstance(node, bangla_ast.VarDecl)
+        } - global_names
+        private = params | locals_
+        for node in walk(body):
+            if isinstance(node, (bangla_ast.PrintStmt, bangla_ast.FunctionDef)):
+                return False
+            # A new array is a new value each call, and a store into one may
+            # reach the caller's array through a parameter.
+            if isinstance(node, (bangla_ast.ArrayLiteral, bangla_ast.IndexAssignStmt)):
+                return False
+            if isinstance(node, (bangla_ast.AssignStmt, bangla_ast.VarDecl)):
+                if node.name.name not in private:
+                    return False
+            elif isinstance(node, bangla_ast.CallExpr):
+                callee = node.function
+                if not isinstance(callee, bangla_ast.Identifier) or callee.name in params:
+                    return False
+                if callee.name not in pure:
+                    return False
+            elif isinstance(node, bangla_ast.Identifier):
+                if node.name not in private and node.name not in pure:
+                    return False
+        return True
+
+
+def pure_functions(program: bangla_ast.Program) -> Set[str]:
+    return PurityAnalyzer(program).pure_functions()
@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Any, List, Optional
+
+import bangla_ast
+
+
+class _Unset:
+    def __repr__(self) -> str:
+        return "UNSET"
+
+
+# Marks a slot whose `dhoro` has not run yet, so lookups fall through to the
+# next enclosing declaration exactly like a missing dict key would.
+UNSET: Any = _Unset()
+
+
+class SlotEnvironment:
+    __slots__ = ("values", "outer")
+
+    def __init__(self, values: List[Any], outer: Any) -> None:
+        self.values = values
+        self.outer = outer
+
+
+@dataclass
+class ScopeInfo:
+    names: dict[str, int] = field(default_factory=dict)
+    param_slots: List[int] = field(default_factory=list)
+
+    @property
+    def size(self) -> int:
+        return len(self.names)
+
+    def declare(self, name: str) -> int:
+        if name not in self.names:
+            self.names[name] = len(self.names)
+        return self.names[name]
+
+
+@dataclass
+class Resolution:
+    """Result of `Resolver.resolve`.
+
+    `scopes` maps the node that opens a runtime scope (a `Block`, a
+    `WhileStmt` for its loop scope, a `FunctionDef` for its call scope) to the
+    slots it needs. `bindings` maps each `Identifier` to the `(depth, slot)`
+    pairs that may hold it, innermost first; an empty tuple means the name is
+    global. Depth only counts scopes that declare something, since empty
+    scopes are never allocated. Keys are node ids, so the resolution is only
+    meaningful while the resolved program is alive.
+    """
+
+    scopes: dict[int, ScopeInfo] = field(default_factory=dict)
+    bindings: dict[int, tuple[tuple[int, int], ...]] = field(default_factory=dict)
+
+    def scope(self, node: bangla_ast.Node) -> ScopeInfo:
+        return self.scopes[id(node)]
+
+    def binding(self, identifier: bangla_ast.Identifier) -> tuple[tuple[int, int], ...]:
+        return self.bindings[id(identifier)]
+
+
+class Resolver:
+    def __init__(self) -> None:
+        self.resolution = Resolution()
+        self.scopes: List[ScopeInfo] = []
+
+    def resolve(self, program: bangla_ast.Program) -> Resolution:
+        self._statements(program.statements)
+        return self.resolution
+
+    def _open_scope(
+        self,
+        owner: bangla_ast.Node,
+        statements: List[bangla_ast.Node],
+        params: Optional[List[str]] = None,
+        hidden: Optional[List[bangla_ast.Identifier]] = None,
+    ) -> None:
+        scope = ScopeInfo()
+        for param in params or []:
+            scope.param_slots.append(scope.declare(param))
+        for slot in hidden or []:
+            scope.declare(slot.name)
+        for stmt in statements:
+            if isinstance(stmt, (bangla_ast.VarDecl, bangla_ast.FunctionDef)):
+                scope.declare(stmt.name.name)
+        self.resolution.scopes[id(owner)] = scope
+        self.scopes.append(scope)
+
+    def _close_scope(self) -> None:
+        self.scopes.pop()
+
+    def _bind_lookup(self, identifier: bangla_ast.Identifier) -> None:
+        candidates = []
+        depth = 0
+        for scope in reversed(self.scopes):
+            if not scope.size:
+                continue
+            if identifier.name in scope.names:
+                candidates.append((depth, scope.names[identifier.name]))
+            depth += 1
+        self.resolution.bindings[id(identifier)] = tuple(candidates)
+
+    def _bind_declaration(self, identifier: bangla_ast.Identifier) -> None:
+        if not self.scopes:
+            self.resolution.bindings[id(identifier)] = ()
+            return
+        self.resolution.bindings[id(identifier)] = ((0, self.scopes[-1].names[identifier.name]),)
+
+    def _statements(self, statements: List[bangla_ast.Node]) -> None:
+        for stmt in statements:
+            self._visit(stmt)
+
+    def _visit(self, node: Optional[bangla_ast.Node]) -> None:
+        if node is None:
+            return
+        if isinstance(node, bangla_ast.Block):
+            self._open_scope(node, node.statements)
+            self._statements(node.statements)
+            self._close_scope()
+        elif isinstance(node, bangla_ast.VarDecl):
+            self._visit(node.value)
+            self._bind_declaration(node.name)
+        elif isinstance(node, bangla_ast.AssignStmt):
+            self._visit(node.value)
+            self._bind_lookup(node.name)
+        elif isinstance(node, (bangla_ast.PrintStmt, bangla_ast.ExprStmt)):
+            self._visit(node.expression)
+        elif isinstance(node, bangla_ast.IfStmt):
+            self._visit(node.condition)
+            self._visit(node.consequence)
+            self._visit(node.alternative)
+        elif isinstance(node, bangla_ast.WhileStmt):
+            self._visit(node.condition)
+            self._open_scope(node, node.body.statements, hidden=node.hoisted)
+            self._statements(node.body.statements)
+            self._close_scope()
+        elif isinstance(node, bangla_ast.FunctionDef):
+            self._bind_declaration(node.name)
+            self._open_scope(node, node.body.statements, [p.name for p in node.params])
+            self._statements(node.body.statements)
+            self._close_scope()
+        elif isinstance(node, bangla_ast.ReturnStmt):
+            self._visit(node.value)
+        elif isinstance(node, bangla_ast.IndexAssignStmt):
+            self._visit(node.collection)
+            self._visit(node.index)
+            self._visit(node.value)
+        elif isinstance(node, bangla_ast.Identifier):
+            self._bind_lookup(node)
+        elif isinstance(node, bangla_ast.PrefixExpr):
+            self._visit(node.right)
+        elif isinstance(node, bangla_ast.InfixExpr):
+            self._visit(node.left)
+            self._visit(node.right)
+        elif isinstance(node, bangla_ast.CallExpr):
+            self._visit(node.function)
+            for arg in node.args:
+                self._visit(arg)
+        elif isinstance(node, bangla_ast.ArrayLiteral):
+            for element in node.elements:
+                self._visit(element)
+        elif isinstance(node, bangla_ast.IndexExpr):
+            self._visit(node.collection)
+            self._visit(node.index)
+        elif isinstance(node, bangla_ast.CachedExpr):
+            self._bind_lookup(node.slot)
+            self._visit(node.expression)
+
+
+def resolve(program: bangla_ast.Program) -> Resolution:
+    return Resolver().resolve(program)
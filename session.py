@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+from typing import Any, List, Optional
+
+import bangla_ast
+from bangla_token import TokenType
+from interpreter import MAX_CALL_DEPTH, Interpreter
+from lexer import Lexer
+from output import OutputSink
+from parser import Parser
+
+OPENERS = (TokenType.LBRACE, TokenType.LPAREN, TokenType.LBRACKET)
+CLOSERS = (TokenType.RBRACE, TokenType.RPAREN, TokenType.RBRACKET)
+
+
+class BanglaSyntaxError(Exception):
+    def __init__(self, errors: List[str]) -> None:
+        super().__init__("\n".join(errors))
+        self.errors = errors
+
+
+def is_complete(source: str) -> bool:
+    """Whether `source` can run as it is, or needs more lines first.
+
+    It needs more while a `{`, `(` or `[` is open, a string has no closing `"`,
+    or the parser ran out of tokens in the middle of a statement.
+    """
+    lexer = Lexer(source)
+    depth = 0
+    token = lexer.next_token()
+    while token.type is not TokenType.EOF:
+        if token.type in OPENERS:
+            depth += 1
+        elif token.type in CLOSERS:
+            depth -= 1
+        token = lexer.next_token()
+    # An unclosed string makes `Lexer` read one step past the end.
+    if depth > 0 or lexer.position > len(source):
+        return False
+    parser = Parser(Lexer(source))
+    parser.parse_program()
+    return not any(TokenType.EOF.value in error for error in parser.errors)
+
+
+class Session:
+    """One `Interpreter` kept alive across many pieces of source.
+
+    Each `run` parses and runs a piece against the same globals, so
+    `function` definitions and `dhoro` variables carry over from one piece
+    to the next. A function keeps whatever its engine built for it when it
+    was defined (its tree, closures or bytecode), so later pieces that call
+    it only compile their own statements.
+    """
+
+    def __init__(
+        self,
+        engine: str = "tree",
+        max_call_depth: int = MAX_CALL_DEPTH,
+        optimize: bool = False,
+        output: Optional[OutputSink] = None,
+    ) -> None:
+        self.interpreter = Interpreter(engine, max_call_depth, output)
+        self.optimize = optimize
+
+    @property
+    def globals(self) -> dict[str, Any]:
+        return self.interpreter.global_env.store
+
+    def parse(self, source: str) -> bangla_ast.Program:
+        parser = Parser(Lexer(source))
+        program = parser.parse_program()
+        if parser.errors:
+            raise BanglaSyntaxError(parser.errors)
+        if self.optimize:
+            from optimizer import optimize
+
+            program = optimize(program)
+        return program
+
+    def run(self, source: str) -> Any:
+        """The value of the last statement of `source`, like `Interpreter.run`."""
+        return self.interpreter.run(self.parse(source))
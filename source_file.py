@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import codecs
+import io
+import mmap
+import os
+from typing import Optional
+
+
+class MappedSource:
+    """A `.bn` file read through `mmap`, decoded a chunk at a time.
+
+    `read(size)` decodes about the next `size` bytes and returns "" only at
+    the end of the file. The bytes are decoded straight from the mapping,
+    without a `bytes` copy, and with universal newlines like
+    `open(path, encoding="utf-8")`, so positions do not depend on how the
+    source was loaded. Use it as the stream of a `StreamingLexer`.
+    """
+
+    def __init__(self, path: str | os.PathLike[str]) -> None:
+        with open(path, "rb") as handle:
+            try:
+                self._map: Optional[mmap.mmap] = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # An empty file cannot be mapped.
+                self._map = None
+        self._size = len(self._map) if self._map is not None else 0
+        self._position = 0
+        self._released = 0
+        self._newlines = io.IncrementalNewlineDecoder(None, translate=True)
+
+    def read(self, size: int = -1) -> str:
+        while True:
+            # Four bytes always hold at least one whole character.
+            end = self._size if size < 0 else min(self._position + max(size, 4), self._size)
+            final = end == self._size
+            with memoryview(self._map if self._map is not None else b"")[self._position:end] as data:
+                # A chunk can end inside a character; those bytes are not
+                # consumed and are read again with the next chunk.
+                text, consumed = codecs.utf_8_decode(data, "strict", final)
+            self._position += consumed
+            self._release_read_pages()
+            # Likewise a "\r" at the end is held until it is known whether
+            # a "\n" follows.
+            text = self._newlines.decode(text, final)
+            if text or final:
+                return text
+
+    def _release_read_pages(self) -> None:
+        # Decoded pages are not read again; dropping them keeps the file
+        # from showing up in the process's resident memory.
+        if self._map is None or not hasattr(mmap, "MADV_DONTNEED"):
+            return
+        done = self._position - self._position % mmap.PAGESIZE
+        if done > self._released:
+            self._map.madvise(mmap.MADV_DONTNEED, self._released, done - self._released)
+            self._released = done
+
+    def close(self) -> None:
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+
+    def __enter__(self) -> MappedSource:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+
+def read_source(path: str | os.PathLike[str]) -> str:
+    """The whole file as one `str`, decoded straight from an `mmap`.
+
+    Unlike `open(...).read()`, no `bytes` copy of the file is made before
+    decoding, so peak memory is about the size of the string alone.
+    """
+    with MappedSource(path) as source:
+        return source.read()
@@ -0,0 +1,33 @@
+"""Helpers shared by the test modules."""
+from __future__ import annotations
+
+import io
+from typing import Any
+
+import bangla_ast
+from interpreter import Interpreter
+from lexer import Lexer
+from optimizer import optimize
+from output import OutputSink
+from parser import Parser
+
+
+def parse(source: str) -> bangla_ast.Program:
+    """Parse `source`, which must have no syntax errors."""
+    parser = Parser(Lexer(source))
+    program = parser.parse_program()
+    assert parser.errors == []
+    return program
+
+
+def run(source: str, engine: str = "tree", optimized: bool = False, **options: Any) -> tuple[Any, str, Interpreter]:
+    """Run `source` on a new `Interpreter(engine, **options)`, optionally
+    after `optimize`, and return its value, its `lekho` output and the
+    interpreter."""
+    out = io.StringIO()
+    program = parse(source)
+    if optimized:
+        program = optimize(program)
+    interpreter = Interpreter(engine, output=OutputSink(out), **options)
+    value = interpreter.run(program)
+    return value, out.getvalue(), interpreter
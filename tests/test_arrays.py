@@ -0,0 +1,129 @@
+import io
+
+import pytest
+
+from bangla_array import BanglaArray
+from helpers import parse, run
+from interpreter import ENGINES, BanglaRuntimeError, Interpreter
+from optimizer import optimize
+from output import OutputSink
+from purity import pure_functions
+from session import is_complete
+
+SQUARES = """
+function jogfol(xs) {
+    dhoro i = 0;
+    dhoro mot = 0;
+    jokhon i < doirgho xs {
+        mot = mot + xs[i];
+        i = i + 1;
+    }
+    ferot mot;
+}
+dhoro b = [0] * 10;
+dhoro i = 0;
+jokhon i < doirgho b {
+    b[i] = i * i;
+    i = i + 1;
+}
+lekho b;
+lekho jogfol(b);
+b[3] = "tin";
+lekho b;
+"""
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("optimized", [False, True])
+def test_arrays_on_every_engine(engine, optimized):
+    _, out, _ = run(SQUARES, engine, optimized)
+    assert out == (
+        "[0, 1, 4, 9, 16, 25, 36, 49, 64, 81]\n"
+        "285\n"
+        '[0, 1, 4, "tin", 16, 25, 36, 49, 64, 81]\n'
+    )
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize(
+    ("source", "expected"),
+    [
+        ('[1, [2, 3], sotti, "x"][1][0];', 2),
+        ("dhoro a = [1, 2]; a[1] = [a[0]]; a[1][0] = 7; a[0] + a[1][0];", 8),
+        ('doirgho [] + doirgho "abc" + doirgho [[1, 2]];', 4),
+        ('"abc"[1];', "b"),
+        ("[1, 2] == [1, 2] ar [1] != [2] ar [1] != 1;", True),
+        ("dhoro a = [1]; dhoro b = a; b[0] = 5; a[0];", 5),
+        ("jodi [] { 1; } nahole { 2; }", 2),
+        ("doirgho (3 * [1, 2]);", 6),
+        ("dhoro a = [0]; a[0] = 2 ** 70; a[0];", 2**70),
+    ],
+)
+def test_array_expressions(engine, source, expected):
+    assert run(source, engine)[0] == expected
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize(
+    ("source", "message"),
+    [
+        ("dhoro a = [1, 2]; a[2];", "Index 2 seemar baire: doirgho 2."),
+        ("dhoro a = [1, 2]; a[0 - 1] = 3;", "Index -1 seemar baire: doirgho 2."),
+        ('[1]["0"];', "Index number hote hobe."),
+        ("[1][sotti];", "Index number hote hobe."),
+        ("dhoro a = 5; a[0];", "Index shudhu array ba string e kora jay."),
+        ('dhoro s = "ab"; s[0] = "c";', "Shudhu array er index e rakha jay."),
+        ("doirgho 5;", "Doirgho shudhu array ba string er hoy."),
+        ("[1] + [2];", "Number dorkar chilo."),
+    ],
+)
+def test_array_errors(engine, source, message):
+    with pytest.raises(BanglaRuntimeError) as excinfo:
+        run(source, engine)
+    assert str(excinfo.value) == message
+
+
+def test_integers_stay_compact_until_something_else_is_stored():
+    interpreter = Interpreter(output=OutputSink(io.StringIO()))
+    interpreter.run(parse("dhoro a = [0] * 1000; a[999] = 2 ** 62; dhoro b = a; dhoro c = [1, sotti];"))
+    a = interpreter.global_env.get("a")
+    assert a.compact and len(a) == 1000 and a.items.itemsize == 8
+    assert not interpreter.global_env.get("c").compact
+
+    interpreter.run(parse("b[0] = sotti;"))
+    assert not a.compact
+    assert interpreter._stringify(a[0]) == "sotti"
+    assert a == BanglaArray.of([True] + [0] * 998 + [2**62])
+
+
+def test_printing_an_array_that_holds_itself():
+    assert run("dhoro a = [1, 2]; a[1] = a; lekho a;")[1] == "[1, [...]]\n"
+
+
+def test_functions_that_make_or_change_arrays_are_not_pure():
+    program = parse(
+        "function notun(n) { ferot [n]; }"
+        "function bodlao(xs) { xs[0] = 1; ferot 0; }"
+        "function pore(xs, i) { ferot xs[i] + doirgho xs; }"
+    )
+    assert pure_functions(program) == {"pore"}
+
+
+def test_loops_that_store_into_arrays_cache_nothing():
+    program = optimize(parse("dhoro a = [0, 0]; dhoro i = 0; jokhon i < 2 { a[1] = a[0] + 1; i = i + 1; }"))
+    assert program.statements[2].hoisted == []
+
+
+def test_array_literals_are_not_cached_in_loops():
+    source = (
+        "dhoro i = 0; dhoro a = 0; dhoro b = 0;"
+        "jokhon i < 2 { jodi i == 0 { a = [0] * 2; } nahole { b = a; a = [0] * 2; } i = i + 1; }"
+        "a[0] = 1; b[0];"
+    )
+    for engine in ENGINES:
+        assert run(source, engine, optimized=True)[0] == 0
+
+
+def test_open_bracket_needs_more_input():
+    assert not is_complete("dhoro a = [1,")
+    assert is_complete("dhoro a = [1, 2];")
@@ -0,0 +1,70 @@
+import asyncio
+import io
+
+import pytest
+
+from helpers import parse
+from interpreter import ENGINES, BanglaRuntimeError, Interpreter
+from output import OutputSink
+
+COUNT = "dhoro i = 0; jokhon i < {n} {{ lekho i; i = i + 1; }} i;"
+FOREVER = "dhoro i = 0; jokhon sotti { i = i + 1; }"
+
+
+def run_async(source: str, engine: str = "tree", **budgets):
+    out = io.StringIO()
+    interpreter = Interpreter(engine, output=OutputSink(out))
+    value = asyncio.run(interpreter.run_async(parse(source), **budgets))
+    return value, out.getvalue()
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize(
+    "source",
+    [
+        COUNT.format(n=25),
+        "function fib(n) { jodi n < 2 { ferot n; } ferot fib(n - 1) + fib(n - 2); } fib(15);",
+        "function f(n) { jodi n == 0 { ferot 7; } ferot f(n - 1); } ferot f(50); lekho 1;",
+    ],
+)
+def test_run_async_matches_run(engine, source):
+    out = io.StringIO()
+    expected = Interpreter(engine, output=OutputSink(out)).run(parse(source))
+    assert run_async(source, engine, slice_steps=3) == (expected, out.getvalue())
+
+
+def test_step_budget():
+    assert run_async(COUNT.format(n=5), max_steps=5) == (5, "0\n1\n2\n3\n4\n")
+    with pytest.raises(BanglaRuntimeError, match="4 tar beshi step"):
+        run_async(COUNT.format(n=5), max_steps=4)
+
+
+@pytest.mark.parametrize("budgets", [{"max_steps": -1, "time_limit": 0.3}, {"slice_steps": 0}])
+def test_bad_budgets_are_refused(budgets):
+    # A negative `max_steps` would make the VM never pause, so neither
+    # budget would ever be checked.
+    with pytest.raises(ValueError, match="must be at least"):
+        run_async(FOREVER, **budgets)
+
+
+def test_time_budget():
+    with pytest.raises(BanglaRuntimeError, match="Somoy shesh: 0.1 second"):
+        run_async(FOREVER, time_limit=0.1)
+
+
+def test_scripts_share_the_event_loop():
+    finished = []
+
+    async def run(name: str, source: str, **budgets):
+        interpreter = Interpreter(output=OutputSink(io.StringIO()))
+        try:
+            await interpreter.run_async(parse(source), **budgets)
+        except BanglaRuntimeError:
+            pass
+        finished.append(name)
+
+    async def main():
+        await asyncio.gather(run("forever", FOREVER, max_steps=200_000), run("short", COUNT.format(n=10)))
+
+    asyncio.run(main())
+    assert finished == ["short", "forever"]
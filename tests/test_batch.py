@@ -0,0 +1,58 @@
+import pytest
+
+from batch import BatchRunner, run_batch, run_script
+from interpreter import ENGINES
+from main import run_source
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_run_script_captures_output_value_and_errors(engine):
+    result = run_script('lekho "ok"; dhoro x = 4; x * 10;', engine)
+    assert (result.output, result.value, result.errors, result.ok) == ("ok\n", 40, [], True)
+
+    result = run_script("lekho 1; lekho 1 / 0;", engine)
+    assert result.output == "1\n"
+    assert result.errors == ["Runtime error: Bhag kora jabe na: 0 diye vag."]
+    assert result.exit_code == 1
+
+
+def test_run_script_reports_what_run_source_prints(capsys):
+    source = "dhoro = ;"
+    run_source(source)
+    assert run_script(source).errors == capsys.readouterr().out.splitlines()
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_run_script_timeout(engine):
+    result = run_script("dhoro i = 0; jokhon sotti { i = i + 1; }", engine, timeout=0.2)
+    assert result.timed_out
+    assert result.errors == ["Runtime error: Somoy shesh: 0.2 second er beshi legeche."]
+    # The timer is gone once the script is done.
+    assert run_script("1;", engine).ok
+
+
+def test_batch_runner_keeps_order_and_workers():
+    sources = [f"lekho {n}; {n} * {n};" for n in range(50)] + ["lekho x;"]
+    with BatchRunner(max_workers=2, engine="vm", timeout=5) as runner:
+        results = runner.run(sources)
+        pool = runner._pool
+        assert runner.run(["sotti;"])[0].value is True
+        assert runner._pool is pool
+    assert [result.value for result in results[:50]] == [n * n for n in range(50)]
+    assert [result.output for result in results[:50]] == [f"{n}\n" for n in range(50)]
+    assert not results[50].ok
+
+
+def test_python_errors_fail_only_their_script():
+    sources = ["lekho 1;", "lekho 10 ** 5000;", "lekho 2;", "[0] * 10 ** 12;", "dhoro x = 5; x % 0;", "3;"]
+    results = run_batch(sources, max_workers=2)
+    assert [result.output for result in results] == ["1\n", "", "2\n", "", "", ""]
+    assert [result.ok for result in results] == [True, False, True, False, False, True]
+    assert results[1].errors[0].startswith("Runtime error: ValueError: ")
+    assert results[3].errors == ["Runtime error: MemoryError"]
+    assert results[4].errors == ["Runtime error: ZeroDivisionError: integer modulo by zero"]
+    assert results[5].value == 3
+
+
+def test_run_batch_empty():
+    assert run_batch([]) == []
@@ -0,0 +1,311 @@
+from pathlib import Path
+
+import pytest
+
+from helpers import parse
+from interpreter import ENGINES, BanglaRuntimeError, Interpreter
+import resolver
+
+EXAMPLES = Path(__file__).resolve().parent.parent / "examples"
+
+
+def run_source(source: str, engine: str, **options):
+    return Interpreter(engine, **options).run(parse(source))
+
+
+@pytest.fixture(params=ENGINES)
+def engine(request):
+    return request.param
+
+
+def test_hello_example(engine, capsys):
+    run_source((EXAMPLES / "hello.bn").read_text(encoding="utf-8"), engine)
+    assert capsys.readouterr().out == "12\na boro\n0\n1\n2\n12\n"
+
+
+def test_arithmetic_and_printing(engine, capsys):
+    result = run_source("""
+    lekho 7 / 2;
+    lekho 7 % 3;
+    lekho 2 ** 3 ** 2;
+    lekho -(3 - 5) * +2;
+    lekho sotti + 1;
+    lekho "salam";
+    lekho 1 == sotti;
+    lekho "a" != "b";
+    lekho 3 >= 3 ar 2 < 1;
+    """, engine)
+    assert capsys.readouterr().out == "3\n1\n512\n4\n2\nsalam\nsotti\nsotti\nmittha\n"
+    assert result is False
+
+
+def test_block_scopes(engine):
+    result = run_source("""
+    dhoro x = 1;
+    jodi sotti {
+        dhoro x = 2;
+        x = x + 10;
+    }
+    {
+        x = x + 100;
+    }
+    x;
+    """, engine)
+    assert result == 101
+
+
+def test_while_condition_uses_enclosing_scope(engine):
+    result = run_source("""
+    dhoro n = 0;
+    dhoro steps = 0;
+    jokhon n < 3 {
+        dhoro local = n;
+        n = local + 1;
+        steps = steps + 1;
+    }
+    steps;
+    """, engine)
+    assert result == 3
+
+
+def test_shadowing_follows_runtime_declarations(engine, capsys):
+    result = run_source("""
+    dhoro x = "global";
+    function dekho() {
+        lekho x;
+    }
+    function f(n) {
+        dhoro i = 0;
+        jokhon i < 2 {
+            lekho x;
+            dhoro x = i;
+            jodi sotti {
+                lekho x;
+                dhoro x = "bhitor";
+                x = x;
+            }
+            i = i + 1;
+        }
+        dekho();
+        ferot n;
+    }
+    f(9);
+    """, engine)
+    assert capsys.readouterr().out == "global\n0\n0\n1\nglobal\n"
+    assert result == 9
+
+
+def test_functions_see_later_globals(engine):
+    assert run_source("function f() { ferot y * 2; } dhoro y = 21; f();", engine) == 42
+
+
+def test_logical_operators_short_circuit(engine, capsys):
+    result = run_source("""
+    function dekho(x) {
+        lekho x;
+        ferot x;
+    }
+    dhoro a = dekho(0) ar dekho(1);
+    dhoro b = dekho(2) ba dekho(3);
+    dhoro c = dekho(4) ar dekho("");
+    dhoro d = dekho(0) ba dekho(5);
+    dhoro n = 0;
+    jodi n != 0 ar 10 / n > 1 {
+        lekho "bhag";
+    }
+    a == mittha ar b == sotti ar c == mittha ar d == sotti;
+    """, engine)
+    assert capsys.readouterr().out == "0\n2\n4\n\n0\n5\n"
+    assert result is True
+
+
+def test_statement_values(engine):
+    assert run_source("jodi mittha { 1; }", engine) is None
+    assert run_source("dhoro i = 0; jokhon i < 2 { i = i + 1; }", engine) == 2
+    assert run_source("dhoro i = 5; jokhon i < 2 { i = i + 1; }", engine) is None
+    assert run_source("function f() { 5; } f();", engine) == 5
+    assert run_source("function f() { } f();", engine) is None
+    assert run_source("ferot 4; 5;", engine) == 4
+
+
+def test_recursion_and_closures(engine, capsys):
+    result = run_source("""
+    function fib(n) {
+        jodi n < 2 {
+            ferot n;
+        }
+        ferot fib(n - 1) + fib(n - 2);
+    }
+    lekho fib(15);
+
+    function banao(step) {
+        function barao(x) {
+            ferot x + step;
+        }
+        ferot barao;
+    }
+    dhoro tin = banao(3);
+    tin(4);
+    """, engine)
+    assert capsys.readouterr().out == "610\n"
+    assert result == 7
+
+
+def test_return_from_nested_loop(engine):
+    result = run_source("""
+    function khojo(limit) {
+        dhoro i = 0;
+        jokhon sotti {
+            jodi i * i > limit {
+                ferot i;
+            }
+            i = i + 1;
+        }
+    }
+    khojo(50) + khojo(10);
+    """, engine)
+    assert result == 12
+
+
+@pytest.mark.parametrize(
+    ("source", "message"),
+    [
+        ("dhoro a = 1;\nlekho b;", "Line 2, Col 8: Chena jai na: 'b' variable nai."),
+        ("x = 3;", "Line 1, Col 2: Chena jai na: 'x' variable nai."),
+        ("lekho 1 / 0;", "Bhag kora jabe na: 0 diye vag."),
+        ('lekho 1 + "a";', "Number dorkar chilo."),
+        ("dhoro a = 1; a(2);", "Function na emon kisu call kora jacche na."),
+        ("function f(x) { ferot x; } f();", "Argument shonkha milche na."),
+    ],
+)
+def test_runtime_errors(engine, source, message):
+    with pytest.raises(BanglaRuntimeError) as excinfo:
+        run_source(source, engine)
+    assert str(excinfo.value) == message
+
+
+COUNT_DOWN = """
+function nicche(n, acc) {
+    jodi n == 0 {
+        ferot acc;
+    }
+    ferot nicche(n - 1, acc + 1);
+}
+nicche(%d, 0);
+"""
+
+DEPTH = """
+function gobhir(n) {
+    jodi n == 0 {
+        ferot 0;
+    }
+    ferot 1 + gobhir(n - 1);
+}
+gobhir(%d);
+"""
+
+
+def test_vm_tail_calls_run_in_constant_space():
+    assert run_source(COUNT_DOWN % 100000, "vm", max_call_depth=10) == 100000
+
+
+def test_vm_deep_recursion_uses_heap_stack():
+    assert run_source(DEPTH % 50000, "vm") == 50000
+
+
+def test_vm_call_depth_limit():
+    with pytest.raises(BanglaRuntimeError) as excinfo:
+        run_source(DEPTH % 200, "vm", max_call_depth=100)
+    assert str(excinfo.value) == "Recursion onek gobhir: 100 tar beshi call ekshathe chola jabe na."
+
+
+@pytest.mark.parametrize("engine", ["tree", "closure"])
+def test_python_stack_overflow_is_runtime_error(engine):
+    with pytest.raises(BanglaRuntimeError):
+        run_source(DEPTH % 50000, engine)
+
+
+@pytest.mark.parametrize(
+    "source, expected",
+    [
+        ("dhoro x = 1; jodi sotti { x = 2; } x;", 2),
+        ("dhoro x = 1; jodi sotti { dhoro x = 2; } x;", 1),
+        ("dhoro x = 1; { x = x + 1; } { dhoro x = 5; } x;", 2),
+        ("dhoro i = 0; dhoro s = 0; jokhon i < 5 { s = s + i; i = i + 1; } s;", 10),
+        ("function f(n) { jodi n > 0 { ferot n; } ferot 0; } f(3) + f(-1);", 3),
+        (
+            "function banao(a) { function bhitore() { ferot a; } ferot bhitore; }"
+            " dhoro f = banao(5); dhoro g = banao(7); f() + g();",
+            12,
+        ),
+        ("function f(n) { jodi n == 0 { ferot 0; } ferot n + f(n - 1); } f(10) + f(3);", 61),
+    ],
+)
+def test_scopes_and_reused_frames(engine, source, expected):
+    assert run_source(source, engine) == expected
+
+
+def test_tree_walker_skips_scopes_it_does_not_need(monkeypatch):
+    created = []
+    original = resolver.SlotEnvironment.__init__
+
+    def counting(self, values, outer):
+        created.append(self)
+        original(self, values, outer)
+
+    monkeypatch.setattr(resolver.SlotEnvironment, "__init__", counting)
+    source = """
+    function fib(n) {
+        jodi n < 2 { ferot n; }
+        ferot fib(n - 1) + fib(n - 2);
+    }
+    dhoro i = 0;
+    jokhon i < 10 { jodi i % 2 == 0 { lekho i; } i = i + 1; }
+    fib(12);
+    """
+    program = parse(source)
+    interp = Interpreter("tree")
+    assert interp.run(program) == 144
+    # One frame per level of the deepest fib call, and no block scopes.
+    assert len(created) == 12
+    assert all(frame.values == [resolver.UNSET] for frame in interp.global_env.store["fib"].frames)
+
+
+def test_tree_walker_reuses_the_slot_list_of_a_kept_frame():
+    interp = Interpreter("tree")
+    interp.run(parse("function jog(a, b) { dhoro c = a + b; ferot c; } jog(1, 2);"))
+    jog = interp.global_env.store["jog"]
+    [frame] = jog.frames
+    values = frame.values
+    assert interp.run(parse("jog(3, 4) + jog(5, 6);")) == 18
+    assert jog.frames == [frame] and frame.values is values
+    assert values == [resolver.UNSET] * 3
+
+
+def test_vm_reads_locals_from_slots():
+    from compiler import ENTER_SCOPE, LOAD_GLOBAL, LOAD_LOCAL, NEW_SCOPE, compile_program
+
+    program = compile_program(parse("""
+    function fib(n) {
+        jodi n < 2 { ferot n; }
+        ferot fib(n - 1) + fib(n - 2);
+    }
+    dhoro i = 0;
+    jokhon i < 10 { i = i + 1; }
+    fib(12);
+    """))
+    fib = next(constant for constant in program.constants if getattr(constant, "name", None) == "fib")
+    ops = fib.code[::2]
+    assert (fib.scope_size, fib.param_slots) == (1, [0])
+    assert ops.count(LOAD_LOCAL) == 4 and ops.count(LOAD_GLOBAL) == 2
+    # Neither the `jodi` block nor the loop declares anything.
+    assert ENTER_SCOPE not in ops and NEW_SCOPE not in program.code[::2]
+
+
+def test_compiler_keeps_one_entry_per_constant_and_name():
+    from compiler import compile_program
+
+    program = compile_program(parse('dhoro a = 1; dhoro b = sotti; a = a + 1; b = "1"; lekho a; lekho b; 1;'))
+    assert program.names == ["a", "b"]
+    # `1` and `sotti` compare equal but stay apart.
+    assert [(type(value), value) for value in program.constants] == [(int, 1), (bool, True), (str, "1")]
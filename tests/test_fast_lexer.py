@@ -0,0 +1,86 @@
+from pathlib import Path
+import random
+
+import pytest
+
+from bangla_token import TokenType
+from fast_lexer import BufferedLexer, FastLexer, TokenBuffer, tokenize
+from lexer import Lexer
+from parser import Parser
+
+
+def reference_tokens(source: str) -> list:
+    lexer = Lexer(source)
+    tokens = [lexer.next_token()]
+    while tokens[-1].type is not TokenType.EOF:
+        tokens.append(lexer.next_token())
+    return tokens
+
+
+def test_matches_reference_on_example():
+    source = (Path(__file__).parent.parent / "examples" / "hello.bn").read_text(encoding="utf-8")
+    assert tokenize(source) == reference_tokens(source)
+
+
+@pytest.mark.parametrize(
+    "source",
+    [
+        "",
+        "   \n\t ",
+        "ab = 1;",
+        "dhoro x = 10 ** 2 <= 3 != 4 >= 5 == 6;\n",
+        "lekho \"a\"\nlekho 1\n",
+        '"ekta \\" quote" "\\\\" "shesh\\"',
+        '"khola string',
+        '"',
+        "x # comment\n# second comment\ny",
+        "#shudhu comment",
+        "a ! b @ c",
+        "নাম = ১২৩ + x১ + 1২",
+        "ab² ½ 3²",
+        "\r\n\r\nfunction f(a, b) { ferot a % b; }\r\n",
+        "dhoro a = [1, [2]]; a[0] = doirgho a[1];",
+    ],
+)
+def test_matches_reference_on_edge_cases(source):
+    assert tokenize(source) == reference_tokens(source)
+
+
+def test_matches_reference_on_random_sources():
+    pieces = list('ab_ 9\n\t#"\\=*<>!;{}()[],+-/%ক১²') + ["dhoro", "ar", "# c\n", '"s"', "==", "**"]
+    rng = random.Random(9)
+    for _ in range(2000):
+        source = "".join(rng.choice(pieces) for _ in range(rng.randint(0, 25)))
+        assert tokenize(source) == reference_tokens(source), source
+
+
+def test_next_token_repeats_eof():
+    lexer = FastLexer("x")
+    assert lexer.next_token().type is TokenType.IDENT
+    assert lexer.next_token() == lexer.next_token() == reference_tokens("x")[-1]
+
+
+def test_parser_accepts_fast_lexer():
+    source = "function f(n) { jodi n < 2 { ferot n; } ferot f(n - 1) + f(n - 2); } lekho f(10);"
+    assert Parser(FastLexer(source)).parse_program() == Parser(Lexer(source)).parse_program()
+
+
+@pytest.mark.parametrize("source", ['dhoro x = "ek\\"dui";\nlekho x', '"khola', "নাম = ১২৩;", ""])
+def test_token_buffer_holds_the_same_tokens(source):
+    buffer = TokenBuffer(source)
+    assert [buffer.token(index) for index in range(len(buffer))] == tokenize(source)
+
+
+def test_buffered_lexer_reads_like_a_lexer():
+    lexer = BufferedLexer("lekho 12;")
+    first = lexer.next_token()
+    assert (first.type, first.literal, first.line, first.column) == (TokenType.LEKHO, "lekho", 1, 6)
+    second = lexer.next_token()
+    assert (second.type, second.literal, second.column) == (TokenType.INT, "12", 9)
+    assert lexer.next_token().type is TokenType.SEMICOLON
+    assert lexer.next_token().type is lexer.next_token().type is TokenType.EOF
+
+
+def test_parser_accepts_buffered_lexer():
+    source = (Path(__file__).parent.parent / "examples" / "hello.bn").read_text(encoding="utf-8")
+    assert Parser(BufferedLexer(source)).parse_program() == Parser(Lexer(source)).parse_program()
@@ -0,0 +1,76 @@
+import random
+
+import pytest
+
+from incremental import IncrementalParser
+from lexer import Lexer
+from parser import Parser
+
+
+def parse(source: str):
+    parser = Parser(Lexer(source))
+    return parser.parse_program(), parser.errors
+
+
+SOURCE = """function jog(a, b) {
+    jodi a > b { ferot a; } nahole { ferot b; }
+}
+dhoro x = jog(1, 2);
+jokhon x < 10 { x = x + 1; { lekho x; } }
+lekho "shesh";
+"""
+
+
+def test_edit_matches_full_parse_and_reuses_the_rest():
+    document = IncrementalParser(SOURCE)
+    offset = SOURCE.index("1, 2")
+    program = document.edit(offset, 1, "15")
+    assert (program, document.errors) == parse(document.source)
+    assert document.reparsed == 1
+
+
+def test_positions_after_the_edit_move():
+    document = IncrementalParser(SOURCE)
+    document.edit(0, 0, "\n\n  dhoro y = 1; ")
+    program, _ = parse(document.source)
+    assert document.program == program
+    assert document.program.statements[-1].expression.line == 8
+    assert document.reparsed == 1
+
+
+def test_untouched_blocks_are_reused():
+    document = IncrementalParser(SOURCE)
+    offset = SOURCE.index("ferot b")
+    document.edit(offset + len("ferot "), 1, "a + b")
+    assert (document.program, document.errors) == parse(document.source)
+    assert document.reused_blocks == 1
+
+
+def test_errors_follow_their_statements():
+    source = "dhoro = 1;\nlekho 2;\ndhoro = 3;\n"
+    document = IncrementalParser(source)
+    document.edit(0, 0, "lekho 0;\n")
+    assert document.errors == parse(document.source)[1]
+    assert document.errors[-1].startswith("Line 4, ")
+
+
+def test_edit_outside_the_source_is_rejected():
+    with pytest.raises(ValueError):
+        IncrementalParser("lekho 1;").edit(5, 10, "")
+
+
+def test_random_edits_match_full_parse():
+    pieces = [
+        "dhoro x = 1;", "lekho x;", "\n", " ", "jodi x > 1 { lekho 2; }", "nahole { y = 3; }",
+        "function f(a, b) { ferot a + b; }", "jokhon i < 3 { i = i + 1; { lekho i; } }",
+        '"str"', "#c\n", "#", "{", "}", ";", "(", ")", "ক", "12", "ab", '"', "=", "==",
+    ]
+    rng = random.Random(17)
+    for _ in range(400):
+        document = IncrementalParser("".join(rng.choice(pieces) for _ in range(rng.randint(0, 20))))
+        for _ in range(5):
+            offset = rng.randint(0, len(document.source))
+            deleted = rng.randint(0, min(6, len(document.source) - offset))
+            before = document.source
+            document.edit(offset, deleted, rng.choice(["", "x", "\n", rng.choice(pieces)]))
+            assert (document.program, document.errors) == parse(document.source), (before, offset, deleted)
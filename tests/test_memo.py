@@ -0,0 +1,114 @@
+import asyncio
+import io
+
+import pytest
+
+from helpers import parse, run
+from interpreter import ENGINES, Interpreter
+from memo import MISSING, MemoCache, MemoStats, memo_key
+from output import OutputSink
+
+FIB = "function fib(n) { jodi n < 2 { ferot n; } ferot fib(n - 1) + fib(n - 2); } fib({n});"
+LOOP = "function loop(n, acc) { jodi n == 0 { ferot acc; } ferot loop(n - 1, acc + n); }"
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize(
+    "source",
+    [
+        FIB.replace("{n}", "20"),
+        LOOP + " lekho loop(5, 0); lekho loop(4, 5); loop(3, 9);",
+        "function jog(a, b) { ferot a + b; } lekho jog(1, 2); lekho jog(1, sotti); jog(1, 2);",
+        "function ulta(x) { ferot na x; } lekho ulta(sotti); lekho ulta(1); ulta(0);",
+    ],
+)
+def test_memoized_runs_match_plain_runs(engine, source):
+    assert run(source, engine, memoize_pure=True)[:2] == run(source, engine)[:2]
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_each_subproblem_is_computed_once(engine):
+    value, _, interpreter = run(FIB.replace("{n}", "60"), engine, memoize_pure=True)
+    assert value == 1548008755920
+    assert interpreter.memo_stats() == {"fib": MemoStats(hits=58, misses=61, size=61)}
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_tail_calls_fill_the_cache_for_every_call_they_replace(engine):
+    _, out, interpreter = run(LOOP + " lekho loop(5, 0); lekho loop(4, 5);", engine, memoize_pure=True)
+    assert out == "15\n15\n"
+    assert interpreter.memo_stats() == {"loop": MemoStats(hits=1, misses=6, size=6)}
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_impure_functions_are_not_memoized(engine):
+    source = (
+        "dhoro mot = 0;"
+        "function jog(x) { mot = mot + x; ferot mot; }"
+        "function bol(x) { lekho x; ferot x; }"
+        "lekho jog(1); lekho jog(1); bol(2); bol(2);"
+    )
+    _, out, interpreter = run(source, engine, memoize_pure=True)
+    assert out == "1\n2\n2\n2\n"
+    assert interpreter.memo_stats() == {}
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_named_functions_are_memoized_even_if_impure(engine):
+    source = "function bol(x) { lekho x; ferot x; } bol(2); bol(2);"
+    _, out, interpreter = run(source, engine, memoize={"bol"})
+    assert out == "2\n"
+    assert interpreter.memo_stats() == {"bol": MemoStats(hits=1, misses=1, size=1)}
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_a_definition_run_again_keeps_one_cache(engine):
+    source = (
+        "dhoro i = 0; dhoro mot = 0;"
+        "jokhon i < 5 { function borgo(n) { ferot n * n; } mot = mot + borgo(3); i = i + 1; }"
+        "mot;"
+    )
+    value, _, interpreter = run(source, engine, memoize={"borgo"})
+    assert value == 45
+    assert interpreter.memo_stats() == {"borgo": MemoStats(hits=4, misses=1, size=1)}
+    assert len(interpreter._memos) == 1
+
+
+def test_statements_run_one_by_one_only_memoize_named_functions():
+    interpreter = Interpreter(output=OutputSink(io.StringIO()), memoize_pure=True, memoize={"ek"})
+    program = parse("function ek() { ferot 1; } function dui() { ferot 2; } ek(); ek(); dui(); dui();")
+    interpreter.run_statements(program.statements)
+    assert interpreter.memo_stats() == {"ek": MemoStats(hits=1, misses=1, size=1)}
+
+
+def test_run_async_memoizes_on_the_vm():
+    interpreter = Interpreter(output=OutputSink(io.StringIO()), memoize_pure=True)
+    value = asyncio.run(interpreter.run_async(parse(FIB.replace("{n}", "60")), slice_steps=7))
+    assert value == 1548008755920
+    assert interpreter.memo_stats()["fib"].misses == 61
+
+
+def test_unkeyable_arguments_skip_the_cache():
+    source = "function ek() { ferot 1; } function dak(f) { ferot f(); } dak(ek); dak(ek);"
+    for engine in ENGINES:
+        value, _, interpreter = run(source, engine, memoize={"dak"})
+        assert value == 1
+        assert interpreter.memo_stats()["dak"] == MemoStats(0, 0, 0)
+
+
+def test_keys_tell_booleans_from_numbers():
+    assert memo_key([True]) != memo_key([1])
+    assert memo_key([0, None]) != memo_key([False, None])
+    assert memo_key([[1]]) is None
+
+
+def test_cache_drops_the_least_recently_used_result():
+    cache = MemoCache("f", maxsize=2)
+    cache.put((1, int), "ek")
+    cache.put((2, int), "dui")
+    assert cache.get((1, int)) == "ek"
+    cache.put((3, int), "tin")
+    assert cache.get((2, int)) is MISSING
+    assert cache.get((1, int)) == "ek"
+    assert len(cache) == 2
+    assert (cache.hits, cache.misses) == (2, 1)
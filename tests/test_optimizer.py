@@ -0,0 +1,155 @@
+import pytest
+
+import bangla_ast
+from helpers import parse
+from interpreter import ENGINES, BanglaRuntimeError, Interpreter
+from optimizer import optimize
+from purity import walk
+
+
+def test_folds_literal_arithmetic():
+    program = optimize(parse("dhoro size = 60 * 60 * 24; dhoro s = -(2 ** 3) + 1;"))
+    assert isinstance(program.statements[0].value, bangla_ast.IntegerLiteral)
+    assert program.statements[0].value.value == 86400
+    assert program.statements[1].value.value == -7
+
+
+def test_folds_comparisons_and_logic():
+    program = optimize(parse('lekho 3 < 4 ar "x" == "x"; lekho na 0; lekho mittha ar f(); lekho sotti ba f();'))
+    values = [stmt.expression for stmt in program.statements]
+    assert all(isinstance(value, bangla_ast.BooleanLiteral) for value in values)
+    assert [value.value for value in values] == [True, True, False, True]
+
+
+def test_keeps_runtime_errors_for_runtime():
+    program = optimize(parse('dhoro a = 10 / 0; dhoro b = 1 + "x";'))
+    assert isinstance(program.statements[0].value, bangla_ast.InfixExpr)
+    assert isinstance(program.statements[1].value, bangla_ast.InfixExpr)
+    with pytest.raises(BanglaRuntimeError, match="Bhag kora jabe na"):
+        Interpreter().run(program)
+
+
+def test_drops_dead_branches_and_loops():
+    program = optimize(parse("""
+    jodi sotti { lekho 1; } nahole { lekho 2; }
+    jodi 0 { lekho 3; }
+    jodi "" { lekho 4; } nahole { dhoro x = 5; }
+    jokhon mittha { lekho 6; }
+    lekho 7;
+    """))
+    first, second, third = program.statements
+    assert isinstance(first, bangla_ast.PrintStmt) and first.expression.value == 1
+    assert isinstance(second, bangla_ast.Block)
+    assert isinstance(second.statements[0], bangla_ast.VarDecl)
+    assert isinstance(third, bangla_ast.PrintStmt) and third.expression.value == 7
+
+
+def test_drops_statements_after_return():
+    program = optimize(parse("function f() { ferot 1; lekho 2; } f();"))
+    [only] = program.statements[0].body.statements
+    assert isinstance(only, bangla_ast.ReturnStmt) and only.value.value == 1
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_optimized_program_keeps_results(engine, capsys):
+    source = """
+    function f(n) {
+        dhoro total = 0;
+        jokhon n > 0 {
+            jodi 2 > 1 {
+                total = total + n * (3 - 1);
+            }
+            n = n - 1;
+        }
+        total;
+        jodi mittha { lekho "kokhono na"; }
+    }
+    lekho f(4);
+    dhoro last = 1;
+    jokhon 1 > 2 { last = 2; }
+    """
+    expected = Interpreter(engine).run(parse(source))
+    expected_output = capsys.readouterr().out
+    assert Interpreter(engine).run(optimize(parse(source))) == expected
+    assert capsys.readouterr().out == expected_output == "null\n"
+
+
+def loop_body(program: bangla_ast.Program, index: int = -1) -> list:
+    loop = [stmt for stmt in program.statements if isinstance(stmt, bangla_ast.WhileStmt)][index]
+    return loop.body.statements
+
+
+def test_hoists_invariant_subexpressions():
+    program = optimize(parse("""
+    dhoro base = 3; dhoro scale = 4; dhoro i = 0;
+    jokhon i < 3 {
+        lekho base * scale + i;
+        i = i + 1;
+    }
+    """))
+    printed = loop_body(program)[0].expression
+    assert isinstance(printed, bangla_ast.InfixExpr)
+    assert isinstance(printed.left, bangla_ast.CachedExpr)
+    assert printed.left.expression.operator == "*"
+    assert program.statements[-1].hoisted == [printed.left.slot]
+
+
+def test_hoists_pure_calls_but_not_impure_ones():
+    source = """
+    function borgo(x) { ferot x * x; }
+    function dekhao(x) { lekho x; ferot x; }
+    dhoro n = 5; dhoro i = 0; dhoro s = 0;
+    jokhon i < 3 { s = s + borgo(n); i = i + 1; }
+    jokhon i < 6 { s = s + borgo(n) + dekhao(i); i = i + 1; }
+    """
+    program = optimize(parse(source))
+    assert isinstance(loop_body(program, 0)[0].value.right, bangla_ast.CachedExpr)
+    assert not any(isinstance(node, bangla_ast.CachedExpr) for node in walk(loop_body(program, 1)))
+
+
+def test_does_not_hoist_names_written_in_the_loop():
+    program = optimize(parse("""
+    dhoro a = 1; dhoro b = 2; dhoro i = 0;
+    jokhon i < 3 {
+        lekho a * b;
+        jodi i == 1 { b = 5; }
+        i = i + 1;
+    }
+    """))
+    assert not any(isinstance(node, bangla_ast.CachedExpr) for node in walk(loop_body(program)))
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_hoisted_loops_keep_results_and_errors(engine, capsys):
+    source = """
+    function kaj(n, d) {
+        dhoro total = 0;
+        dhoro i = 0;
+        jokhon i < n {
+            dhoro j = 0;
+            jokhon j < 3 {
+                total = total + (n * 100) / d + j * (d + 1);
+                j = j + 1;
+            }
+            i = i + 1;
+        }
+        ferot total;
+    }
+    lekho kaj(3, 7);
+    lekho kaj(2, 5);
+    lekho kaj(0, 0);
+    kaj(1, 0);
+    """
+    with pytest.raises(BanglaRuntimeError, match="Bhag kora jabe na"):
+        Interpreter(engine).run(parse(source))
+    expected_output = capsys.readouterr().out
+    with pytest.raises(BanglaRuntimeError, match="Bhag kora jabe na"):
+        Interpreter(engine).run(optimize(parse(source)))
+    assert capsys.readouterr().out == expected_output == "450\n276\n0\n"
+
+
+def test_ast_nodes_have_no_instance_dict():
+    program = optimize(parse("function f(n, k) { jokhon n > 0 { n = n - k * 2; } ferot n; } lekho f(9, 1);"))
+    nodes = list(walk(program))
+    assert any(isinstance(node, bangla_ast.CachedExpr) for node in nodes)
+    assert not any(hasattr(node, "__dict__") for node in nodes)
@@ -0,0 +1,62 @@
+import io
+
+import pytest
+
+from helpers import parse
+from interpreter import ENGINES, BanglaRuntimeError, Interpreter
+from lexer import Lexer
+from main import main
+from output import OutputSink
+from parser import Parser
+
+
+class CountingStream(io.StringIO):
+    def __init__(self) -> None:
+        super().__init__()
+        self.writes = 0
+
+    def write(self, text: str) -> int:
+        self.writes += 1
+        return super().write(text)
+
+
+def run(source: str, engine: str, output: OutputSink):
+    return Interpreter(engine, output=output).run(parse(source))
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_lines_are_written_in_chunks(engine):
+    stream = CountingStream()
+    run("dhoro i = 0; jokhon i < 1000 { lekho i; i = i + 1; }", engine, OutputSink(stream, buffer_size=1000))
+    assert stream.getvalue() == "".join(f"{i}\n" for i in range(1000))
+    assert 2 < stream.writes < 10
+
+
+def test_zero_buffer_writes_every_line():
+    stream = CountingStream()
+    sink = OutputSink(stream, buffer_size=0)
+    sink.write_line("ek")
+    assert stream.getvalue() == "ek\n"
+    sink.write_line("dui")
+    assert stream.writes == 2
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_runtime_error_flushes_pending_output(engine):
+    stream = io.StringIO()
+    with pytest.raises(BanglaRuntimeError, match="Bhag kora jabe na"):
+        run('lekho "age"; lekho 1 + 1; lekho 1 / 0; lekho "pore";', engine, OutputSink(stream))
+    assert stream.getvalue() == "age\n2\n"
+
+
+def test_evaluate_with_the_default_sink_prints_right_away(capsys):
+    Interpreter().evaluate(Parser(Lexer("lekho 42;")).parse_program())
+    assert capsys.readouterr().out == "42\n"
+
+
+def test_main_reports_errors_after_output(tmp_path, capsys):
+    script = tmp_path / "bhul.bn"
+    script.write_text('lekho "shuru"; lekho x;', encoding="utf-8")
+    assert main([str(script), "--output-buffer", "4096"]) == 1
+    out = capsys.readouterr().out
+    assert out.startswith("shuru\nRuntime error: ")
@@ -0,0 +1,74 @@
+import io
+
+import pytest
+
+from helpers import parse
+from interpreter import Interpreter
+from main import main
+from output import OutputSink
+from profiler import PROGRAM_FRAME, ProfilingInterpreter
+
+SOURCE = """function fib(n) {
+    jodi n < 2 { ferot n; }
+    ferot fib(n - 1) + fib(n - 2);
+}
+dhoro i = 0;
+jokhon i < 50 {
+    i = i + 1;
+}
+lekho fib(10);
+"""
+
+
+def test_statements_carry_positions():
+    # The same positions the lexer gives the statement's first token.
+    program = parse("dhoro x = 1;\n  lekho x;\nx = 2;\njodi x { ferot x; }")
+    assert [(stmt.line, stmt.column) for stmt in program.statements] == [(1, 6), (2, 8), (3, 2), (4, 5)]
+    assert program.statements[3].consequence.statements[0].line == 4
+
+
+def test_profile_counts_lines_and_calls():
+    out = io.StringIO()
+    interpreter = ProfilingInterpreter(output=OutputSink(out))
+    interpreter.run(parse(SOURCE))
+    profile = interpreter.profile
+    assert out.getvalue() == "55\n"
+    assert profile.lines[7].count == 50
+    assert profile.lines[6].count == 1
+    # Every call runs the `jodi`, and 89 of them its `ferot` too.
+    assert profile.lines[2].count == 177 + 89
+    assert profile.functions["fib"].count == 177
+    # Recursive calls are inside the outermost one, so they are not added again.
+    assert profile.functions["fib"].total <= profile.lines[9].total
+    assert profile.lines[6].total >= profile.lines[7].total
+    assert sum(t.own for t in profile.lines.values()) == pytest.approx(sum(profile.stacks.values()))
+    assert f"{PROGRAM_FRAME};fib;fib;line 3" in profile.stacks
+
+
+def test_profile_matches_plain_run():
+    source = "dhoro a = 1; function f(x) { ferot x * 2; } a = f(a) + f(3); a;"
+    assert ProfilingInterpreter().run(parse(source)) == Interpreter().run(parse(source)) == 8
+
+
+def test_report_and_collapsed_stacks():
+    interpreter = ProfilingInterpreter(output=OutputSink(io.StringIO()))
+    interpreter.run(parse(SOURCE))
+    report = interpreter.profile.report(SOURCE)
+    assert "i = i + 1;" in report
+    assert "fib" in report.split("\n\n")[1]
+    stream = io.StringIO()
+    interpreter.profile.write_collapsed(stream)
+    for row in stream.getvalue().splitlines():
+        stack, microseconds = row.rsplit(" ", 1)
+        assert stack.startswith(PROGRAM_FRAME) and int(microseconds) > 0
+
+
+def test_main_profile(tmp_path, capsys):
+    script = tmp_path / "script.bn"
+    script.write_text(SOURCE, encoding="utf-8")
+    flamegraph = tmp_path / "stacks.txt"
+    assert main(["--engine", "vm", "--profile", "--flamegraph", str(flamegraph), str(script)]) == 0
+    captured = capsys.readouterr()
+    assert captured.out == "55\n"
+    assert "ferot fib(n - 1) + fib(n - 2);" in captured.err
+    assert f"{PROGRAM_FRAME};line 9" in flamegraph.read_text(encoding="utf-8")
@@ -0,0 +1,87 @@
+import os
+
+import pytest
+
+import main
+import program_cache
+from program_cache import CACHE_DIRNAME, ProgramCache
+from lexer import Lexer
+from parser import Parser
+
+
+def parse(source: str):
+    return Parser(Lexer(source)).parse_program()
+
+
+@pytest.fixture
+def script(tmp_path):
+    path = tmp_path / "kaj.bn"
+    path.write_text("dhoro a = 2 * 3;\nlekho a;\n", encoding="utf-8")
+    return path
+
+
+def test_round_trip(script):
+    cache = ProgramCache()
+    source = script.read_text(encoding="utf-8")
+    assert cache.load(script, source) is None
+    cache.store(script, source, parse(source))
+    assert cache.load(script, source) == parse(source)
+    assert cache.load(script, source, optimize=True) is None
+    assert (cache.hits, cache.misses) == (1, 2)
+    assert len(list((script.parent / CACHE_DIRNAME).iterdir())) == 1
+
+
+def test_changed_source_misses_and_replaces_stale_entry(script):
+    cache = ProgramCache()
+    cache.store(script, "lekho 1;", parse("lekho 1;"))
+    assert cache.load(script, "lekho 2;") is None
+    cache.store(script, "lekho 2;", parse("lekho 2;"))
+    assert len(list((script.parent / CACHE_DIRNAME).iterdir())) == 1
+    assert cache.load(script, "lekho 2;") == parse("lekho 2;")
+
+
+def test_interpreter_version_is_part_of_the_key(script, monkeypatch):
+    cache = ProgramCache()
+    cache.store(script, "lekho 1;", parse("lekho 1;"))
+    monkeypatch.setattr(program_cache, "interpreter_version", lambda: "onno version")
+    assert cache.load(script, "lekho 1;") is None
+
+
+def test_corrupt_entry_is_a_miss(script):
+    cache = ProgramCache()
+    cache.store(script, "lekho 1;", parse("lekho 1;"))
+    [entry] = (script.parent / CACHE_DIRNAME).iterdir()
+    entry.write_bytes(b"bhanga")
+    assert cache.load(script, "lekho 1;") is None
+    assert not entry.exists()
+
+
+def test_evicts_least_recently_used_entries(tmp_path):
+    cache = ProgramCache(tmp_path / "cache", max_bytes=0)
+    cache.store(tmp_path / "a.bn", "lekho 1;", parse("lekho 1;"))
+    assert list((tmp_path / "cache").iterdir()) == []
+
+    cache.max_bytes = 10_000
+    sources = [f"lekho {n};" for n in range(3)]
+    for index, source in enumerate(sources):
+        cache.store(tmp_path / f"s{index}.bn", source, parse(source))
+    entries = sorted((tmp_path / "cache").iterdir(), key=lambda entry: entry.name)
+    for age, entry in enumerate(entries):
+        os.utime(entry, (1000 + age, 1000 + age))
+    cache.load(tmp_path / "s0.bn", sources[0])
+    cache.max_bytes = sum(entry.stat().st_size for entry in entries)
+    cache.store(tmp_path / "s3.bn", "lekho 3;", parse("lekho 3;"))
+    names = {entry.name.split("-")[0] for entry in (tmp_path / "cache").iterdir()}
+    assert names == {"s0", "s2", "s3"}
+
+
+def test_main_uses_the_cache(script, capsys):
+    assert main.main([str(script), "--no-cache"]) == 0
+    assert not (script.parent / CACHE_DIRNAME).exists()
+    # Only sources large enough to be worth it are cached.
+    script.write_text("dhoro a = 2 * 3;\n" * 2000 + "lekho a;\n", encoding="utf-8")
+    assert main.main([str(script)]) == 0
+    assert main.main([str(script), "-O"]) == 0
+    assert len(list((script.parent / CACHE_DIRNAME).iterdir())) == 2
+    assert main.main([str(script), "--no-cache"]) == 0
+    assert capsys.readouterr().out == "6\n6\n6\n6\n"
@@ -0,0 +1,70 @@
+import io
+
+import pytest
+
+from compiler import Compiler
+from interpreter import ENGINES, BanglaRuntimeError
+from main import main
+from output import OutputSink
+from session import BanglaSyntaxError, Session, is_complete
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_session_keeps_globals_between_inputs(engine):
+    out = io.StringIO()
+    session = Session(engine, output=OutputSink(out, buffer_size=0))
+    session.run("function jog(a, b) { ferot a + b; }")
+    session.run("dhoro x = jog(2, 3);")
+    assert session.run("jog(x, 10);") == 15
+    session.run("x = x * 2; lekho x;")
+    assert out.getvalue() == "10\n"
+    assert session.globals["x"] == 10
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_session_survives_errors(engine):
+    session = Session(engine, output=OutputSink(io.StringIO()))
+    session.run("dhoro x = 1;")
+    with pytest.raises(BanglaSyntaxError):
+        session.run("dhoro = ;")
+    with pytest.raises(BanglaRuntimeError):
+        session.run("x = x / 0;")
+    assert session.run("x;") == 1
+
+
+def test_session_does_not_recompile_defined_functions(monkeypatch):
+    session = Session("vm", output=OutputSink(io.StringIO()))
+    session.run("function sq(n) { ferot n * n; }")
+    compiled = []
+    original = Compiler.compile_function
+    monkeypatch.setattr(Compiler, "compile_function", lambda self, *args: compiled.append(args) or original(self, *args))
+    assert session.run("sq(7);") == 49
+    assert session.run("sq(sq(2));") == 16
+    assert compiled == []
+
+
+@pytest.mark.parametrize(
+    "source, complete",
+    [
+        ("dhoro x = 1;", True),
+        ("function f(a) {", False),
+        ("function f(a) {\n ferot a;\n}", True),
+        ("dhoro x =", False),
+        ('lekho "abc', False),
+        ("lekho (1 +", False),
+        ("dhoro = 1;", True),
+    ],
+)
+def test_is_complete(source, complete):
+    assert is_complete(source) == complete
+
+
+def test_main_without_file_starts_repl(monkeypatch, capsys):
+    stdin = io.StringIO("function sq(n) {\n  ferot n * n;\n}\ndhoro x = sq(4);\nx + 1;\nlekho y;\nlekho x;\n")
+    monkeypatch.setattr("sys.stdin", stdin)
+    assert main(["--engine", "closure"]) == 0
+    assert capsys.readouterr().out.splitlines() == [
+        "17",
+        "Runtime error: Line 1, Col 8: Chena jai na: 'y' variable nai.",
+        "16",
+    ]
@@ -0,0 +1,50 @@
+import pytest
+
+from bangla_token import TokenType
+from fast_lexer import StreamingLexer
+from lexer import Lexer
+from source_file import MappedSource, read_source
+
+SOURCES = [
+    "",
+    "lekho 1;\n",
+    'dhoro naam = "কলম";\r\nlekho naam;\r\n',
+    "a\rb\r\n\r\nক১ ২\r",
+]
+
+
+def write(tmp_path, text: str):
+    path = tmp_path / "input.bn"
+    path.write_bytes(text.encode("utf-8"))
+    return path
+
+
+@pytest.mark.parametrize("text", SOURCES)
+def test_read_source_matches_open(tmp_path, text):
+    path = write(tmp_path, text)
+    with open(path, encoding="utf-8") as handle:
+        assert read_source(path) == handle.read()
+
+
+@pytest.mark.parametrize("text", SOURCES)
+@pytest.mark.parametrize("size", [1, 2, 3, 7])
+def test_chunks_decode_to_the_whole_file(tmp_path, text, size):
+    path = write(tmp_path, text)
+    chunks = []
+    with MappedSource(path) as source:
+        while chunk := source.read(size):
+            chunks.append(chunk)
+        assert source.read(size) == ""
+    assert "".join(chunks) == read_source(path)
+
+
+def test_streaming_lexer_over_mapped_source(tmp_path):
+    text = 'function f(x) {\r\n  ferot x * ২;\r\n}\r\nlekho "শেষ" + f(3);\r\n'
+    path = write(tmp_path, text)
+    with MappedSource(path) as source:
+        lexer = StreamingLexer(source, 5)
+        tokens = [lexer.next_token()]
+        while tokens[-1].type is not TokenType.EOF:
+            tokens.append(lexer.next_token())
+    reference = Lexer(read_source(path))
+    assert tokens == [reference.next_token() for _ in tokens]
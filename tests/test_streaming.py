@@ -0,0 +1,81 @@
+import io
+import random
+
+import pytest
+
+from bangla_token import TokenType
+from fast_lexer import StreamingLexer
+from interpreter import ENGINES, Interpreter
+from lexer import Lexer
+from main import main
+from output import OutputSink
+from parser import Parser
+
+
+def all_tokens(lexer) -> list:
+    tokens = [lexer.next_token()]
+    while tokens[-1].type is not TokenType.EOF:
+        tokens.append(lexer.next_token())
+    return tokens
+
+
+class ReadCounter(io.StringIO):
+    def __init__(self, text: str) -> None:
+        super().__init__(text)
+        self.reads = 0
+
+    def read(self, size: int = -1) -> str:
+        self.reads += 1
+        return super().read(size)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 5, 64])
+def test_streaming_lexer_matches_reference(chunk_size):
+    pieces = list('ab_ 9\n\t#"\\=*<>!;{}(),+-/%ক১²') + ["dhoro", "# c\n", '"s"', "==", "**", "\n\n"]
+    rng = random.Random(chunk_size)
+    for _ in range(500):
+        source = "".join(rng.choice(pieces) for _ in range(rng.randint(0, 40)))
+        assert all_tokens(StreamingLexer(source, chunk_size)) == all_tokens(Lexer(source)), source
+
+
+def test_streaming_lexer_repeats_eof():
+    lexer = StreamingLexer(io.StringIO("x"), 1)
+    assert lexer.next_token().type is TokenType.IDENT
+    assert lexer.next_token() == lexer.next_token() == all_tokens(Lexer("x"))[-1]
+
+
+def test_statements_are_parsed_before_the_stream_is_read():
+    stream = ReadCounter("lekho 1;\n" * 1000)
+    statements = Parser(StreamingLexer(stream, 64)).parse_statements()
+    next(statements)
+    assert stream.reads < 5
+    assert len(list(statements)) == 999
+
+
+SOURCE = """
+function f(n) { jodi n < 2 { ferot n; } ferot f(n - 1) + f(n - 2); }
+dhoro x = f(10);
+lekho x;
+jodi x > 50 { ferot x + 1; }
+lekho "pore";
+"""
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("source", [SOURCE, "function g() { ferot 7; } lekho 1; ferot g(); lekho 2;", "lekho 3; 4;"])
+def test_run_statements_matches_run(engine, source):
+    whole = io.StringIO()
+    expected = Interpreter(engine, output=OutputSink(whole)).run(Parser(Lexer(source)).parse_program())
+    streamed = io.StringIO()
+    statements = Parser(StreamingLexer(source, 8)).parse_statements()
+    assert Interpreter(engine, output=OutputSink(streamed)).run_statements(statements) == expected
+    assert streamed.getvalue() == whole.getvalue()
+
+
+def test_main_streams_until_a_parser_error(tmp_path, capsys):
+    script = tmp_path / "stream.bn"
+    script.write_text('lekho "ek";\ndhoro = 2;\nlekho "dui";\n', encoding="utf-8")
+    assert main([str(script), "--stream"]) == 1
+    out = capsys.readouterr().out
+    assert out.startswith("ek\nParser error: Line 2")
+    assert "dui" not in out
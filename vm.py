@@ -0,0 +1,378 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Any, Generator, List, Optional
+
+from compiler import (
+    ADD,
+    ASSIGN_GLOBAL,
+    ASSIGN_LOCAL,
+    ASSIGN_SCOPED,
+    BUILD_ARRAY,
+    CALL,
+    DEFINE_GLOBAL,
+    DEFINE_LOCAL,
+    DIV,
+    ENTER_SCOPE,
+    EQ,
+    EXIT_SCOPE,
+    GE,
+    GT,
+    INDEX,
+    JUMP,
+    JUMP_IF_FALSE,
+    JUMP_IF_NOT_NONE,
+    JUMP_IF_TRUE,
+    LE,
+    LENGTH,
+    LOAD_CONST,
+    LOAD_GLOBAL,
+    LOAD_LOCAL,
+    LOAD_SCOPED,
+    LT,
+    MAKE_FUNCTION,
+    MOD,
+    MUL,
+    NEG,
+    NEQ,
+    NEW_SCOPE,
+    NOT,
+    POP,
+    POP_UNDER,
+    POS,
+    POW,
+    PRINT,
+    RETURN,
+    STORE_INDEX,
+    SUB,
+    TAIL_CALL,
+    TO_BOOL,
+    USE_SCOPE,
+    CodeObject,
+)
+from bangla_array import BanglaArray
+from interpreter import BanglaRuntimeError, Interpreter
+from memo import MISSING, MemoCache, memo_key
+from resolver import UNSET, SlotEnvironment
+
+MATH_OPERATORS = {ADD: "+", SUB: "-", MUL: "*", DIV: "/", MOD: "%", POW: "**"}
+COMPARE_OPERATORS = {LT: "<", GT: ">", LE: "<=", GE: ">="}
+
+
+@dataclass
+class CompiledFunction:
+    name: str
+    params: List[str]
+    code: CodeObject
+    env: Any
+    memo: Optional[MemoCache] = field(default=None, repr=False, compare=False)
+
+
+class VM:
+    """Stack machine for `CodeObject`s produced by `compiler.Compiler`.
+
+    Calls push a frame onto a Python list instead of recursing, so the depth
+    of `.bn` recursion is bounded by `Interpreter.max_call_depth` rather
+    than by Python's recursion limit, and tail calls reuse the caller's
+    frame. Locals live in the slots of a `SlotEnvironment` per scope,
+    globals in the interpreter's global store. The arithmetic helpers are
+    shared with `Interpreter` so both engines report the same errors.
+    """
+
+    def __init__(self, interpreter: Optional[Interpreter] = None) -> None:
+        self.interpreter = interpreter if interpreter is not None else Interpreter()
+        # Whether the last `run` ended at a top-level `ferot`.
+        self.returned = False
+
+    def run(self, code_object: CodeObject) -> Any:
+        # Without `ticks` the steps never pause, so one `next` runs it all.
+        try:
+            next(self.run_steps(code_object))
+        except StopIteration as stop:
+            return stop.value
+
+    def run_steps(self, code_object: CodeObject, ticks: int = 0) -> Generator[None, int, Any]:
+        """`run` as a generator that pauses every so many steps.
+
+        A step is a jump or a call, so every loop iteration and every call
+        takes at least one and no program runs long without taking steps. It
+        pauses after `ticks` steps (never when 0), and the number sent back
+        in when it resumes is how many steps to take before the next pause.
+        The generator returns what `run` returns.
+        """
+        interp = self.interpreter
+        is_truthy = interp._is_truthy
+        stringify = interp._stringify
+        eval_math = interp._eval_math
+        eval_compare = interp._eval_compare
+        eval_prefix = interp._eval_prefix
+        eval_index = interp._eval_index
+        eval_set_index = interp._eval_set_index
+        memo_for = interp._memo_for
+        write_line = interp.output.write_line
+
+        max_call_depth = interp.max_call_depth
+        # (cache, key) pairs to store the current frame's return value in:
+        # its own call's, and those of the memoized tail calls it replaced.
+        pending: Optional[List[tuple]] = None
+        frames: List[tuple] = []
+        stack: List[Any] = []
+        push = stack.append
+        pop = stack.pop
+
+        globals_store = interp.global_env.store
+        env = interp.global_env
+        program = code_object
+        code = code_object.code
+        constants = code_object.constants
+        names = code_object.names
+        base = 0
+        ip = 0
+
+        while True:
+            op = code[ip]
+            arg = code[ip + 1]
+            ip += 2
+
+            if op == LOAD_LOCAL:
+                value = env.values[arg]
+                push(value if value is not UNSET else self._load(code_object, ip - 2, env))
+            elif op == LOAD_GLOBAL:
+                name = names[arg]
+                if name in globals_store:
+                    push(globals_store[name])
+                else:
+                    raise self._name_error(code_object, ip - 2, name)
+            elif op == LOAD_CONST:
+                push(constants[arg])
+            elif op == POP:
+                pop()
+            elif op == JUMP_IF_FALSE:
+                value = pop()
+                if value is not True and (value is False or not is_truthy(value)):
+                    ip = arg
+            elif op == JUMP:
+                ip = arg
+                ticks -= 1
+                if not ticks:
+                    ticks = yield
+            elif op == ADD or op == SUB or op == MUL:
+                right = pop()
+                left = stack[-1]
+                if type(left) is int and type(right) is int:
+                    if op == ADD:
+                        stack[-1] = left + right
+                    elif op == SUB:
+                        stack[-1] = left - right
+                    else:
+                        stack[-1] = left * right
+                else:
+                    stack[-1] = eval_math(MATH_OPERATORS[op], left, right)
+            elif op == LT or op == GT or op == LE or op == GE:
+                right = pop()
+                left = stack[-1]
+                if type(left) is int and type(right) is int:
+                    if op == LT:
+                        stack[-1] = left < right
+                    elif op == GT:
+                        stack[-1] = left > right
+                    elif op == LE:
+                        stack[-1] = left <= right
+                    else:
+                        stack[-1] = left >= right
+                else:
+                    stack[-1] = eval_compare(COMPARE_OPERATORS[op], left, right)
+            elif op == ASSIGN_LOCAL:
+                values = env.values
+                if values[arg] is not UNSET:
+                    values[arg] = stack[-1]
+                else:
+                    self._assign(code_object, ip - 2, env, stack[-1])
+            elif op == ASSIGN_GLOBAL:
+                name = names[arg]
+                if name in globals_store:
+                    globals_store[name] = stack[-1]
+                else:
+                    raise self._name_error(code_object, ip - 2, name)
+            elif op == DEFINE_LOCAL:
+                env.values[arg] = stack[-1]
+            elif op == DEFINE_GLOBAL:
+                globals_store[names[arg]] = stack[-1]
+            elif op == LOAD_SCOPED:
+                push(self._load(code_object, ip - 2, env))
+            elif op == ASSIGN_SCOPED:
+                self._assign(code_object, ip - 2, env, stack[-1])
+            elif op == EQ:
+                right = pop()
+                stack[-1] = stack[-1] == right
+            elif op == NEQ:
+                right = pop()
+                stack[-1] = stack[-1] != right
+            elif op == DIV or op == MOD or op == POW:
+                right = pop()
+                stack[-1] = eval_math(MATH_OPERATORS[op], stack[-1], right)
+            elif op == INDEX:
+                index = pop()
+                collection = stack[-1]
+                if type(collection) is BanglaArray and type(index) is int and 0 <= index < len(collection.items):
+                    stack[-1] = collection.items[index]
+                else:
+                    stack[-1] = eval_index(collection, index)
+            elif op == STORE_INDEX:
+                value = pop()
+                index = pop()
+                eval_set_index(stack[-1], index, value)
+                stack[-1] = value
+            elif op == JUMP_IF_TRUE:
+                value = pop()
+                if value is True or (value is not False and is_truthy(value)):
+                    ip = arg
+            elif op == JUMP_IF_NOT_NONE:
+                if stack[-1] is not None:
+                    ip = arg
+                else:
+                    pop()
+            elif op == TO_BOOL:
+                stack[-1] = is_truthy(stack[-1])
+            elif op == NOT:
+                stack[-1] = not is_truthy(stack[-1])
+            elif op == NEG:
+                stack[-1] = eval_prefix("-", stack[-1])
+            elif op == POS:
+                stack[-1] = eval_prefix("+", stack[-1])
+            elif op == PRINT:
+                write_line(stringify(stack[-1]))
+            elif op == CALL or op == TAIL_CALL:
+                function = stack[-arg - 1]
+                if not isinstance(function, CompiledFunction):
+                    raise BanglaRuntimeError("Function na emon kisu call kora jacche na.")
+                if arg != len(function.params):
+                    raise BanglaRuntimeError("Argument shonkha milche na.")
+                memo = function.memo
+                entry = None
+                if memo is not None:
+                    key = memo_key(stack[len(stack) - arg:])
+                    if key is not None:
+                        value = memo.get(key)
+                        if value is not MISSING:
+                            del stack[-arg - 1:]
+                            push(value)
+                            continue
+                        entry = (memo, key)
+                size = function.code.scope_size
+                if size:
+                    values = [UNSET] * size
+                    if arg:
+                        for slot, value in zip(function.code.param_slots, stack[-arg:]):
+                            values[slot] = value
+                    call_env = SlotEnvironment(values, function.env)
+                else:
+                    call_env = function.env
+                if op == CALL:
+                    if len(frames) >= max_call_depth:
+                        raise BanglaRuntimeError(
+                            f"Recursion onek gobhir: {max_call_depth} tar beshi call ekshathe chola jabe na."
+                        )
+                    del stack[-arg - 1:]
+                    frames.append((code_object, ip, env, base, pending))
+                    base = len(stack)
+                    pending = [entry] if entry is not None else None
+                else:
+                    del stack[base:]
+                    if entry is not None:
+                        if pending is None:
+                            pending = [entry]
+                        else:
+                            pending.append(entry)
+                code_object = function.code
+                code = code_object.code
+                constants = code_object.constants
+                names = code_object.names
+                env = call_env
+                ip = 0
+                ticks -= 1
+                if not ticks:
+                    ticks = yield
+            elif op == RETURN:
+                value = pop()
+                if pending is not None:
+                    for cache, key in pending:
+                        cache.put(key, value)
+                if not frames:
+                    # The program's own final RETURN is its last instruction;
+                    # anything else is a `ferot` (or `ferot f()`, which
+                    # replaced the program's frame).
+                    self.returned = code_object is not program or ip != len(code)
+                    return value
+                del stack[base:]
+                push(value)
+                code_object, ip, env, base, pending = frames.pop()
+                code = code_object.code
+                constants = code_object.constants
+                names = code_object.names
+            elif op == ENTER_SCOPE:
+                env = SlotEnvironment([UNSET] * arg, env)
+            elif op == EXIT_SCOPE:
+                env = env.outer
+            elif op == NEW_SCOPE:
+                push(SlotEnvironment([UNSET] * arg, env))
+            elif op == USE_SCOPE:
+                env = stack[-1]
+            elif op == POP_UNDER:
+                del stack[-2]
+            elif op == BUILD_ARRAY:
+                if arg:
+                    elements = stack[-arg:]
+                    del stack[-arg:]
+                else:
+                    elements = []
+                push(BanglaArray.of(elements))
+            elif op == LENGTH:
+                stack[-1] = eval_prefix("doirgho", stack[-1])
+            elif op == MAKE_FUNCTION:
+                function_code = constants[arg]
+                memo = memo_for(function_code.name, function_code.definition)
+                push(CompiledFunction(function_code.name, function_code.params, function_code, env, memo))
+            else:
+                raise BanglaRuntimeError("Bujhte parchi na emon ekta expression.")
+
+    def _load(self, code_object: CodeObject, offset: int, env: Any) -> Any:
+        # The slots that may hold the name, innermost first; a slot whose
+        # `dhoro` has not run yet is UNSET and passed over.
+        candidates, name = code_object.bindings[offset]
+        scope = env
+        depth = 0
+        for target, slot in candidates:
+            while depth < target:
+                scope = scope.outer
+                depth += 1
+            value = scope.values[slot]
+            if value is not UNSET:
+                return value
+        store = self.interpreter.global_env.store
+        if name in store:
+            return store[name]
+        raise self._name_error(code_object, offset, name)
+
+    def _assign(self, code_object: CodeObject, offset: int, env: Any, value: Any) -> None:
+        candidates, name = code_object.bindings[offset]
+        scope = env
+        depth = 0
+        for target, slot in candidates:
+            while depth < target:
+                scope = scope.outer
+                depth += 1
+            if scope.values[slot] is not UNSET:
+                scope.values[slot] = value
+                return
+        store = self.interpreter.global_env.store
+        if name not in store:
+            raise self._name_error(code_object, offset, name)
+        store[name] = value
+
+    def _name_error(self, code_object: CodeObject, offset: int, name: str) -> BanglaRuntimeError:
+        message = f"Chena jai na: '{name}' variable nai."
+        line, column = code_object.positions.get(offset, (0, 0))
+        if line and column:
+            message = f"Line {line}, Col {column}: {message}"
+        return BanglaRuntimeError(message)